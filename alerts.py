@@ -1,27 +1,18 @@
 # alerts.py
 
-import sqlite3
 import datetime
+from storage import get_connection
 
 def get_current_alerts(limit=5):
     try:
-        conn = sqlite3.connect("qmmx.db")
+        conn = get_connection()
         cur = conn.cursor()
-        # Create table if it doesn’t exist
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS alerts (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              message TEXT,
-              timestamp TEXT
-            )
-        """)
-        # Now read the latest alerts
+        # Table is created by migrate.py; read the latest alerts
         cur.execute(
             "SELECT message, timestamp FROM alerts ORDER BY timestamp DESC LIMIT ?",
             (limit,)
         )
         rows = cur.fetchall()
-        conn.close()
 
         # Format as “timestamp – message”
         return [f"{row[1]} – {row[0]}" for row in rows]
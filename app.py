@@ -1,12 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import sqlite3
 import time
 import os
-import requests
+import json
 
 import migrate; migrate.migrate()
 from backend.pattern_resilience import record_resilience
+from backend.confidence_adjuster import outcome_view, get_confidence_score
 from exit_strategy import ExitStrategy
 from trade_recommender import TradeRecommender
 from diagnostic_state import diagnostic_monitor
@@ -18,66 +18,70 @@ from settings_store import save_settings
 from portfolio_tracker import PortfolioTracker
 from threading import Thread
 from candlestick_chart_provider import get_candlestick_chart_payload
+from level_loader import load_levels, bump_levels_version
+from heartbeat import HeartbeatListener, normalize_module
+from http_client import polygon_client
+from market_stream import TickBuffer, PolygonStream
+from quote_cache import get_quote_cache, QUOTE_MAX_AGE
+from bar_ring import open_ring
+from storage import get_connection, pooled_connection, release_thread_connections
 
 app = Flask(__name__)
 CORS(app)
 
+
+@app.teardown_request
+def _release_db(exc):
+    # Each request runs on a fresh thread: hand its connection back to the pool
+    # (rolled back if a handler failed mid-transaction) instead of leaking it
+    release_thread_connections()
+
+
 from routes_patch import bp as patch_bp
 app.register_blueprint(patch_bp)
 
 exit_strategy = ExitStrategy()
 disc_engine = PatternDiscoveryEngine()
-portfolio_tracker = PortfolioTracker()
+# The engine owns the book; this read-only view reloads from the DB at most once a second
+portfolio_tracker = PortfolioTracker(reload_interval=1.0)
 recommender = TradeRecommender()
 
-DB_PATH = os.getenv("QMMX_DB", "qmmx.db")
-
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS price_levels (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            color TEXT,
-            level_type TEXT,
-            level_index INTEGER,
-            price REAL
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS trades_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT,
-            direction TEXT,
-            entry_price REAL,
-            exit_price REAL,
-            entry_time TEXT,
-            exit_time TEXT,
-            confidence REAL,
-            status TEXT,
-            pattern_id TEXT,
-            contact_event TEXT,
-            exit_reason TEXT
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS patterns_memory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pattern_signature TEXT,
-            direction TEXT,
-            success_rate REAL,
-            total_trades INTEGER,
-            successful_trades INTEGER
-        )
-    """)
-
-    conn.commit()
-    conn.close()
-
-init_db()
+
+# Engine heartbeats arrive over local UDP (see heartbeat.py). Under the debug
+# reloader only the serving child (WERKZEUG_RUN_MAIN) binds the port.
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    try:
+        HeartbeatListener(diagnostic_monitor).start()
+    except OSError as e:
+        print("⚠️ Heartbeat listener not started:", e)
+
+# With Q_PRICE_SOURCE=stream /price reads streamed ticks and only falls back
+# to REST when the last tick is older than Q_STREAM_MAX_AGE seconds.
+STREAM_MAX_AGE = float(os.environ.get("Q_STREAM_MAX_AGE", "5"))
+stream_buffer = None
+if os.environ.get("Q_PRICE_SOURCE", "poll").lower() == "stream" and (
+        __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+    stream_buffer = TickBuffer()
+    try:
+        PolygonStream(stream_buffer, symbols=["SPY"]).start()
+    except RuntimeError as e:
+        print("⚠️ Market stream not started:", e)
+        stream_buffer = None
+
+# Last quotes written by the engine; routes go to Polygon only when these are stale
+quote_cache = get_quote_cache()
+
+def get_quote(symbol):
+    """Freshest known price for `symbol`: streamed tick, shared quote cache, then REST."""
+    tick = stream_buffer.latest(symbol) if stream_buffer else None
+    if tick and time.time() - tick["received"] <= STREAM_MAX_AGE:
+        return tick["price"]
+    cached = quote_cache.get(symbol, max_age=QUOTE_MAX_AGE)
+    if cached:
+        return cached["price"]
+    # The engine is the cache's only writer; the API never claims slots
+    return get_live_price(symbol)
+
 
 @app.route("/module_status")
 def module_status():
@@ -87,26 +91,16 @@ def module_status():
     except Exception as e:
         return jsonify(success=False, error=str(e)), 200
 
-@app.route("/view_memory/false_missed_analysis", methods=["GET"])
-def view_false_missed_analysis():
-    try:
-        conn = sqlite3.connect("qmmx.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM false_missed_analysis ORDER BY timestamp DESC")
-        rows = cursor.fetchall()
-        columns = [description[0] for description in cursor.description]
-        results = [dict(zip(columns, row)) for row in rows]
-        conn.close()
-        return jsonify({"success": True, "data": results})
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+@app.route("/http_stats")
+def http_stats():
+    # Per-endpoint Polygon latency histograms for this process
+    return jsonify(success=True, endpoints=polygon_client.latency_stats())
 
 @app.route("/price")
 def price():
     symbol = request.args.get("symbol", "SPY")
     try:
-        p = get_live_price(symbol)
-        return jsonify(success=True, price=p)
+        return jsonify(success=True, price=get_quote(symbol))
     except Exception as e:
         return jsonify(success=False, error=str(e)), 200
 
@@ -116,6 +110,15 @@ def get_recs():
     # Return an array so the frontend's .length works
     return jsonify(success=True, recommendations=([rec] if rec else []))
 
+@app.route("/pattern_outcomes")
+def pattern_outcomes():
+    # Engine's win/loss counters, read from its latest snapshot
+    view = outcome_view()
+    outcomes = view.items()
+    for key, counts in outcomes.items():
+        counts["confidence"] = get_confidence_score(key, store=view)
+    return jsonify(success=True, outcomes=outcomes)
+
 @app.route("/get_alerts")
 def get_alerts():
     alerts = get_current_alerts()
@@ -123,10 +126,6 @@ def get_alerts():
 
 @app.route("/view_memory/<table_name>", methods=["GET"])
 def view_memory_table(table_name):
-    import sqlite3
-    import os
-    db_path = os.path.join(os.getcwd(), "qmmx.db")
-
     # Supported tables for dropdown viewing
     allowed_tables = [
         "trades_history",
@@ -161,17 +160,83 @@ def view_memory_table(table_name):
     if table_name not in allowed_tables:
         return jsonify({"success": False, "error": f"Table '{table_name}' is not accessible."}), 400
 
-    try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    return stream_memory_rows(table_name)
 
-        cursor.execute(f"SELECT * FROM {table_name} ORDER BY id DESC LIMIT 500;")
-        rows = [dict(row) for row in cursor.fetchall()]
-        return jsonify({"success": True, "rows": rows})
 
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+# /view_memory paging: newest first, keyed on id so every page is an index range scan
+VIEW_MEMORY_DEFAULT_LIMIT = 500
+VIEW_MEMORY_MAX_LIMIT = 5000
+
+def stream_memory_rows(table_name):
+    """
+    NDJSON rows of `table_name`, newest id first. Query params:
+      before_id  only rows with id < before_id (pass the previous page's next_before_id)
+      limit      rows per page (default 500, max 5000)
+      columns    comma-separated projection (id is always included)
+      symbol     rows for one symbol (tables with a symbol column)
+      since / until  time range on the table's timestamp/ts column
+    The last line is {"_meta": {"rows": n, "next_before_id": id or null}}.
+    """
+    # Everything is validated before the body's cursor exists, so early returns leak nothing
+    table_columns = [r[1] for r in get_connection().execute(f"PRAGMA table_info({table_name})").fetchall()]
+    if not table_columns:
+        return jsonify({"success": False, "error": f"Table '{table_name}' does not exist."}), 404
+
+    try:
+        limit = min(max(int(request.args.get("limit", VIEW_MEMORY_DEFAULT_LIMIT)), 1), VIEW_MEMORY_MAX_LIMIT)
+        before_id = request.args.get("before_id", type=int)
+    except ValueError:
+        return jsonify({"success": False, "error": "limit must be an integer"}), 400
+
+    columns = table_columns
+    if request.args.get("columns"):
+        wanted = [c.strip() for c in request.args["columns"].split(",") if c.strip()]
+        unknown = [c for c in wanted if c not in table_columns]
+        if unknown:
+            return jsonify({"success": False, "error": f"Unknown columns: {', '.join(unknown)}"}), 400
+        columns = ["id"] + [c for c in wanted if c != "id"]
+
+    clauses, params = [], []
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if request.args.get("symbol") and "symbol" in table_columns:
+        clauses.append("symbol = ?")
+        params.append(request.args["symbol"])
+    ts_column = next((c for c in ("timestamp", "ts") if c in table_columns), None)
+    if ts_column and request.args.get("since"):
+        clauses.append(f"{ts_column} >= ?")
+        params.append(request.args["since"])
+    if ts_column and request.args.get("until"):
+        clauses.append(f"{ts_column} < ?")
+        params.append(request.args["until"])
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT {', '.join(columns)} FROM {table_name}{where} ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+
+    def generate():
+        # The body streams after teardown_request has released the thread's
+        # connection, so it checks out its own for as long as it runs
+        count, last_id = 0, None
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                while True:
+                    batch = cursor.fetchmany(200)
+                    if not batch:
+                        break
+                    for row in batch:
+                        count += 1
+                        last_id = row[0]
+                        yield json.dumps(dict(zip(columns, row)), default=str) + "\n"
+                yield json.dumps({"_meta": {"rows": count, "next_before_id": last_id if count == limit else None}}) + "\n"
+            except Exception as e:
+                yield json.dumps({"_error": str(e)}) + "\n"
+            finally:
+                cursor.close()
+
+    return Response(generate(), mimetype="application/x-ndjson")
 
 
 #@app.route("/view_memory/<table_name>")
@@ -190,43 +255,23 @@ def view_memory_table(table_name):
 
 @app.route("/chart_data")
 def chart_data():
-    from polygon_io_provider import get_live_price_and_volume
-    from polygon_io_provider import load_settings
+    # Bars are written by the engine into rings/<SYMBOL>.ring; this is a read of the mapping
     symbol = request.args.get("symbol", "SPY")
-
-    # Static memory cache
-    if not hasattr(chart_data, "history") or len(chart_data.history) < 2:
-        chart_data.history = []
-
-        # ⬇️ Bootstrap with 30 previous 1-min bars
-        try:
-            settings = load_settings()
-            api_key = settings.get("polygon_api_key", "")
-            url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/minute/now-30/minute/now?apiKey={api_key}&limit=30&adjusted=true&sort=asc"
-            resp = requests.get(url)
-            resp.raise_for_status()
-            bars = resp.json().get("results", [])
-            for b in bars:
-                ts = time.strftime("%H:%M:%S", time.localtime(b["t"] / 1000))
-                chart_data.history.append({
-                    "time": ts,
-                    "price": round(b["c"], 2),
-                    "volume": b["v"]
-                })
-        except Exception as e:
-            print("Polygon backfill error:", str(e))
-
-    # Live update every hit
-    price, volume = get_live_price_and_volume(symbol)
-    if price is not None and volume is not None:
-        chart_data.history.append({
-            "time": time.strftime("%H:%M:%S"),
-            "price": round(price, 2),
-            "volume": volume
-        })
-        chart_data.history = chart_data.history[-60:]
-
-    return jsonify(success=True, data=chart_data.history)
+    try:
+        points = min(max(int(request.args.get("points", 60)), 1), 1440)
+    except ValueError:
+        points = 60
+    ring = open_ring(symbol, readonly=True)
+    if ring is None:
+        return jsonify(success=True, data=[])
+
+    times, prices, volumes = ring.last(points)
+    data = [{
+        "time": time.strftime("%H:%M:%S", time.localtime(t)),
+        "price": round(float(p), 2),
+        "volume": float(v),
+    } for t, p, v in zip(times, prices, volumes)]
+    return jsonify(success=True, data=data)
 
 # in backend (Flask)
 @app.route("/candlestick_chart_data", methods=["GET"])
@@ -268,30 +313,32 @@ def submit_pattern_decision():
 def submit_levels():
     data = request.get_json() or {}
     levels_by_color = data.get("levels_by_color", {})
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("DELETE FROM price_levels")
-    for color, groups in levels_by_color.items():
-        for level_type in ("solid", "dashed"):
-            for idx, price in enumerate(groups.get(level_type, [])):
-                try:
-                    p = float(price)
-                except (TypeError, ValueError):
-                    continue
-                cur.execute("""INSERT INTO price_levels
-                    (color, level_type, level_index, price)
-                    VALUES (?, ?, ?, ?)""", (color, level_type, idx, p))
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with conn:  # one transaction; rolled back if anything below raises
+        cur = conn.cursor()
+        cur.execute("DELETE FROM price_levels")
+        for color, groups in levels_by_color.items():
+            for level_type in ("solid", "dashed"):
+                for idx, price in enumerate(groups.get(level_type, [])):
+                    try:
+                        p = float(price)
+                    except (TypeError, ValueError):
+                        continue
+                    cur.execute("""INSERT INTO price_levels
+                        (color, level_type, level_index, price)
+                        VALUES (?, ?, ?, ?)""", (color, level_type, idx, p))
+        # Same transaction: engine caches reload only when this version moves
+        bump_levels_version(conn)
     return jsonify(success=True)
 
 @app.route("/get_portfolio")
 def get_portfolio():
     state = portfolio_tracker.get_portfolio()
+    current = get_quote("SPY") if state.get("open_positions") else None
     for pos in state.get("open_positions", []):
-        current = get_live_price("SPY")
         pos["current_price"] = current
-        pos["profit"] = (current - pos["entry_price"]) * 1  # buying 1 share
+        # No quote (cache miss + provider failure) → profit unknown, not a 500
+        pos["profit"] = (current - pos["entry_price"]) * 1 if current is not None else None  # buying 1 share
     return jsonify(success=True, **state)
 
 @app.route("/settings", methods=["POST"])
@@ -326,17 +373,12 @@ def resilience_route():
 @app.route("/ping", methods=["POST"])
 def ping_module():
     name = request.json.get("module")
-    diagnostic_monitor.ping(name)
+    diagnostic_monitor.ping(normalize_module(name))
     return jsonify(success=True)
 
 @app.route("/get_levels", methods=["GET"])
 def get_levels():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    cur.execute("SELECT color, level_type, price FROM price_levels")
-    rows = cur.fetchall()
-    conn.close()
+    rows = [(lvl["color"], lvl["type"], lvl["price"]) for lvl in load_levels()]
 
     grouped = {
         "blue": {"solid": [], "dashed": []},
@@ -50,7 +50,7 @@ def analyze():
         context.update(json_data.get("context", {}))
 
         # Update levels
-        pattern_discovery.levels_by_color = levels
+        pattern_discovery.set_levels(levels)
 
         # Feature engineering
         features = feature_engineer.extract_features(price_data, levels)
@@ -67,7 +67,8 @@ def analyze():
         return jsonify({
             "patterns": recognized_patterns,
             "strategy_output": strategy_output,
-            "ml_decision": ml_decision
+            "ml_decision": ml_decision,
+            "model_version": ml_engine.last_model_version
         })
 
     except Exception as e:
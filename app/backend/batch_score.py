@@ -0,0 +1,86 @@
+# batch_score.py — offline scoring of recorded contacts with the recognizer model
+#
+#   python batch_score.py dataset_full.parquet --out scored.csv
+#
+# Input is a contacts table such as dataset_builder.py --full writes
+# (level, level_color, level_type, direction, reaction, contact_order,
+# timestamp, optional entry_price / volume). Every row goes through
+# FeatureEngineer.extract_features_batch and one
+# PatternRecognizer.recognize_batch call instead of a Python loop per row.
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from qmms_feature_engineer import FeatureEngineer
+from qmms_pattern_recognizer import PatternRecognizer
+
+# Recorded reaction names -> the ones FeatureEngineer encodes
+_REACTION = {"breakthrough": "break", "break": "break", "rejection": "rejection"}
+
+
+def contact_patterns(contacts):
+    """Column mapping of pattern fields (what extract_features reads) for a contacts DataFrame."""
+    lower = lambda name: contacts[name].astype(str).str.lower().to_numpy(dtype=object)
+    reaction = contacts["reaction"].astype(str).str.lower().map(_REACTION).fillna("hesitation")
+    confluence = contacts["is_confluence"] if "is_confluence" in contacts else pd.Series(False, index=contacts.index)
+    return {
+        "level": pd.to_numeric(contacts["level"], errors="coerce").to_numpy(),
+        "color": lower("level_color"),
+        "level_type": lower("level_type"),
+        "dominant_reaction": reaction.to_numpy(dtype=object),
+        "contact_order": pd.to_numeric(contacts["contact_order"], errors="coerce").fillna(1).to_numpy(),
+        "approach_direction": lower("direction"),
+        "is_confluence": confluence.fillna(False).astype(bool).to_numpy(),
+    }
+
+
+def score_contacts(contacts, recognizer=None, context=None):
+    """contacts plus confidence / label / model_version columns, scored in one batch."""
+    contacts = contacts.reset_index(drop=True)
+    if context is None:
+        volume = pd.to_numeric(contacts.get("volume"), errors="coerce") if "volume" in contacts else None
+        context = {
+            "all_levels": pd.to_numeric(contacts["level"], errors="coerce").dropna().unique().tolist(),
+            "volume_norm": float(volume.median()) if volume is not None and volume.notna().any() else 1.0,
+        }
+    recognizer = recognizer or PatternRecognizer()
+
+    price_col = "entry_price" if "entry_price" in contacts else "level"
+    price = pd.to_numeric(contacts[price_col], errors="coerce")
+    price = price.fillna(pd.to_numeric(contacts["level"], errors="coerce")).to_numpy(dtype=np.float64)
+    volume = (pd.to_numeric(contacts["volume"], errors="coerce").fillna(context.get("volume_norm", 1.0))
+              if "volume" in contacts else context.get("volume_norm", 1.0))
+    stamps = pd.to_datetime(contacts["timestamp"], errors="coerce", format="mixed")
+
+    X = FeatureEngineer(context).extract_features_batch(contact_patterns(contacts), price, volume, stamps)
+    results = pd.DataFrame(recognizer.recognize_batch(X), index=contacts.index,
+                           columns=["confidence", "label", "model_version"])
+    return pd.concat([contacts, results], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score recorded contacts with the recognizer model")
+    parser.add_argument("contacts", help="CSV/Parquet contacts table (e.g. dataset_builder.py --full)")
+    parser.add_argument("--out", required=True, help="scored .csv or .parquet")
+    parser.add_argument("--model", default="models/qmmx_model_v1.joblib")
+    parser.add_argument("--force", action="store_true", help="replace --out if it exists")
+    args = parser.parse_args()
+    if os.path.exists(args.out) and not args.force:
+        parser.error(f"{args.out} already exists; pass --force to replace it")
+
+    started = time.perf_counter()
+    path = args.contacts
+    contacts = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    scored = score_contacts(contacts, PatternRecognizer(model_path=args.model))
+    scored.to_parquet(args.out) if args.out.endswith(".parquet") else scored.to_csv(args.out, index=False)
+    version = scored["model_version"].iloc[0] if len(scored) else None
+    print(f"🧪 {len(scored)} contacts scored with {version} → {args.out} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
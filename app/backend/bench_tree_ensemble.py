@@ -0,0 +1,61 @@
+# bench_tree_ensemble.py — per-decision latency: sklearn + DataFrame vs CompiledForest
+#
+#   python bench_tree_ensemble.py --model models/qmmx_model_v1.joblib
+
+import argparse
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from tree_ensemble import CompiledForest
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-row and batch scoring latency")
+    parser.add_argument("--model", default="models/qmmx_model_v1.joblib")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=100_000)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")  # sklearn version-mismatch noise on unpickle
+    model = joblib.load(args.model)
+    forest = CompiledForest.from_sklearn(model)
+    names = forest.feature_names or [f"f{i}" for i in range(forest.n_features)]
+
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 3, size=(args.batch, forest.n_features)).astype(np.float32)
+    row = dict(zip(names, X[0].tolist()))
+    assert np.array_equal(forest.predict_proba(X[:1000]), model.predict_proba(pd.DataFrame(X[:1000], columns=names)))
+
+    rows = [
+        ("sklearn predict(DataFrame) 1 row", per_call_us(lambda: model.predict(pd.DataFrame([row])), args.repeat // 10)),
+        ("sklearn predict_proba(ndarray) 1 row", per_call_us(lambda: model.predict_proba(X[:1]), args.repeat // 10)),
+        ("CompiledForest predict_one(dict)", per_call_us(lambda: forest.predict_one(forest.row(row)) if forest.feature_names else forest.predict_one(X[0]), args.repeat)),
+        ("CompiledForest predict_proba_one", per_call_us(lambda: forest.predict_proba_one(X[0]), args.repeat)),
+    ]
+    start = time.perf_counter()
+    model.predict_proba(X)
+    sk_batch = (time.perf_counter() - start) / len(X) * 1e6
+    start = time.perf_counter()
+    forest.predict_proba(X)
+    cf_batch = (time.perf_counter() - start) / len(X) * 1e6
+    rows += [(f"sklearn predict_proba batch of {len(X):,}", sk_batch),
+             (f"CompiledForest predict_proba batch of {len(X):,}", cf_batch)]
+
+    print(f"🌲 {forest._n_trees} trees, {len(forest.feature)} nodes, depth {forest.depth}")
+    for name, us in rows:
+        print(f"{name:<48}{us:>12.2f} µs/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# level_index.py
+
+import numpy as np
+
+# Slack added to the searchsorted bounds; the exact |price - level| <= window
+# test is applied afterwards so results match the old linear scans.
+_EPS = 1e-9
+
+
+class LevelIndex:
+    """
+    Sorted price index over a level set.
+
+    Holds a sorted float64 price array plus parallel color/type arrays and the
+    original level dicts, so "all levels within ±window of price" is two
+    binary searches plus a slice: O(log n + k) instead of a scan per tick.
+    """
+
+    def __init__(self, levels=()):
+        levels = [lvl for lvl in levels if lvl.get("price") is not None]
+        prices = np.fromiter((float(lvl["price"]) for lvl in levels), dtype=np.float64, count=len(levels))
+        order = np.argsort(prices, kind="stable")
+
+        self.prices = prices[order]
+        self.levels = [levels[i] for i in order]
+        self.colors = np.array([lvl.get("color") for lvl in self.levels], dtype=object)
+        self.types = np.array([lvl.get("type") for lvl in self.levels], dtype=object)
+
+    @classmethod
+    def from_levels_by_color(cls, levels_by_color):
+        """Build from the {color: {"solid": [...], "dashed": [...]}} shape used by the UI."""
+        levels = []
+        for color, groups in (levels_by_color or {}).items():
+            for level_type in ("solid", "dashed"):
+                for price in (groups or {}).get(level_type, []) or []:
+                    levels.append({"price": price, "color": color, "type": level_type})
+        return cls(levels)
+
+    def __len__(self):
+        return len(self.levels)
+
+    def within_indices(self, price, window):
+        """Positions (into the sorted arrays) of levels with |price - level| <= window."""
+        lo = np.searchsorted(self.prices, price - window - _EPS, side="left")
+        hi = np.searchsorted(self.prices, price + window + _EPS, side="right")
+        idx = np.arange(lo, hi)
+        return idx[np.abs(price - self.prices[lo:hi]) <= window]
+
+    def within(self, price, window):
+        """Level dicts within ±window of price, in ascending price order."""
+        return [self.levels[i] for i in self.within_indices(price, window)]
+
+    def nearest(self, price, window=None):
+        """Closest level to price (optionally only if within window), or None."""
+        if not self.levels:
+            return None
+        pos = int(np.searchsorted(self.prices, price))
+        candidates = [i for i in (pos - 1, pos) if 0 <= i < len(self.levels)]
+        best = min(candidates, key=lambda i: abs(price - self.prices[i]))
+        if window is not None and abs(price - self.prices[best]) > window:
+            return None
+        return self.levels[best]
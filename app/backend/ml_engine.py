@@ -1,28 +1,54 @@
+import json
 import os
-import joblib
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
+from datetime import datetime
+
+import numpy as np
+
+from model_registry import get_model, publish
+
+try:
+    # Write-behind writer from the repo root (the API runs there); absent when app/backend runs alone
+    from db_writer import get_writer
+except ImportError:
+    get_writer = None
+
+# Outcome the model is trained on (dataset_builder's label), stored with each prediction
+PREDICTION_TARGET = os.environ.get("Q_LABEL_TARGET", "level_hold")
+PREDICTION_HORIZON = os.environ.get("Q_LABEL_HORIZON", "15m")
+
+PREDICTION_SQL = ("INSERT INTO predictions (ts, symbol, horizon, target, prob, features_json, model_version)"
+                  " VALUES (?, ?, ?, ?, ?, ?, ?)")
 
 
 class MLDecisionEngine:
-    def __init__(self, model_path='models/qmmx_model_v1.joblib'):
+    def __init__(self, model_path='models/qmmx_model_v1.joblib', db_path=None):
         self.model_path = model_path
-        self.model = None
-        self._load_model()
-
-    def _load_model(self):
-        if os.path.exists(self.model_path):
-            try:
-                self.model = joblib.load(self.model_path)
-                print(f"✅ Loaded ML model from {self.model_path}")
-            except Exception as e:
-                print(f"⚠️ Error loading ML model: {e}")
-        else:
-            print("⚠️ No pre-trained ML model found. Run training first.")
+        self.db_path = db_path  # predictions rows go here (storage.DB_PATH by default)
+        # Shared per-process handle: loaded on first predict, swapped when the file changes
+        self._handle = get_model(model_path)
+        self.last_model_version = None  # tag for predictions.model_version
+
+    @property
+    def model(self):
+        return self._handle.model
+
+    @property
+    def model_version(self):
+        return self._handle.version
+
+    def train(self, training_csv, search=False, **search_args):
+        if search:
+            # Cross-validated search over a process pool (see train_pipeline.py)
+            from train_pipeline import load_training_frame, run_search
+            X, y = load_training_frame(training_csv)
+            return run_search(X, y, model_path=self.model_path, **search_args)
+
+        # Training-only dependencies stay off the import path of the API
+        import pandas as pd
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import classification_report
 
-    def train(self, training_csv):
         try:
             df = pd.read_csv(training_csv)
             if 'label' not in df.columns:
@@ -32,28 +58,50 @@ class MLDecisionEngine:
             y = df['label']
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-            self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-            self.model.fit(X_train, y_train)
-            y_pred = self.model.predict(X_test)
+            model = RandomForestClassifier(n_estimators=100, random_state=42)
+            model.fit(X_train, y_train)
+            y_pred = model.predict(X_test)
 
             print("✅ Model training complete.")
             print("📊 Classification Report:")
             print(classification_report(y_test, y_pred))
 
-            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            joblib.dump(self.model, self.model_path)
-            print(f"💾 Model saved to {self.model_path}")
+            # Atomic replace: every process watching this file swaps to the new version
+            version = publish(model, self.model_path)
+            print(f"💾 Model {version} saved to {self._handle.path}")
 
         except Exception as e:
             print(f"❌ Failed to train model: {e}")
 
-    def predict(self, input_data: dict) -> int:
-        if not self.model:
+    def predict(self, input_data: dict, symbol="SPY") -> int:
+        model, version = self._handle.current()
+        if model is None:
             raise Exception("No trained model available. Please train first.")
 
-        df = pd.DataFrame([input_data])
-        prediction = self.model.predict(df)[0]
-        return int(prediction)
+        forest, forest_version = self._handle.forest()
+        if forest is not None and forest.feature_names is not None:
+            # No DataFrame / sklearn call per decision: ~30µs instead of ~ms
+            proba = forest.predict_proba_one(forest.row(input_data))
+            classes, version = forest.classes, forest_version
+        else:
+            import pandas as pd
+            proba = model.predict_proba(pd.DataFrame([input_data]))[0]
+            classes = model.classes_
+
+        self.last_model_version = version
+        self._record_prediction(symbol, classes, proba, input_data, version)
+        return int(classes[int(np.argmax(proba))])
+
+    def _record_prediction(self, symbol, classes, proba, input_data, version):
+        # One predictions row per decision (read by /predictions/current), queued off the request thread
+        if get_writer is None:
+            return
+        classes = list(classes)
+        positive = classes.index(1) if 1 in classes else int(np.argmax(proba))
+        get_writer(self.db_path).submit(PREDICTION_SQL, (
+            datetime.utcnow().isoformat(), symbol, PREDICTION_HORIZON, PREDICTION_TARGET,
+            round(float(proba[positive]), 4), json.dumps(input_data, default=float), version,
+        ))
 
 
 # Optional: Run training manually
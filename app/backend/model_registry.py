@@ -0,0 +1,158 @@
+# model_registry.py — one lazily loaded, hot-swappable copy of each model per process
+
+import hashlib
+import os
+import threading
+import time
+import warnings
+
+import joblib
+
+from tree_ensemble import CompiledForest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.environ.get("QMMX_MODEL_DIR", os.path.join(BASE_DIR, "models"))
+DEFAULT_MODEL = os.environ.get("QMMX_MODEL", "qmmx_model_v1.joblib")
+# Seconds between stat() checks of a model file for a newer version
+WATCH_SEC = float(os.environ.get("Q_MODEL_WATCH_SEC", "5"))
+
+
+def resolve_path(path=None):
+    """Model paths are relative to MODEL_DIR (or this directory for 'models/...'), never to the cwd."""
+    path = path or DEFAULT_MODEL
+    if os.path.isabs(path):
+        return path
+    if os.path.dirname(path):
+        return os.path.join(BASE_DIR, path)
+    return os.path.join(MODEL_DIR, path)
+
+
+def file_version(path):
+    """Version tag: file stem plus a short content hash (same in every process)."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return f"{os.path.splitext(os.path.basename(path))[0]}@{digest.hexdigest()[:10]}"
+
+
+class ModelHandle:
+    """
+    A model file loaded on first use and swapped in place when it changes.
+
+    `current()` returns an immutable (model, version) pair; readers keep
+    whichever pair they got, so a swap never mixes two versions inside one
+    prediction. The file is stat()ed at most every `watch_sec` on access, or
+    continuously by watch(). Publish new versions with os.replace() so a
+    reader never sees a half-written file. Models are read fully into memory
+    (no mmap): a forest's tree arrays unpickle as plain ndarrays anyway, and
+    an open mapping would block the os.replace() swap on Windows.
+    """
+
+    def __init__(self, path, watch_sec=WATCH_SEC):
+        self.path = path
+        self.watch_sec = watch_sec
+        self._lock = threading.Lock()
+        self._current = (None, None)
+        self._forest = (None, None)
+        self._signature = None
+        self._checked_at = 0.0
+        self._thread = None
+        self.error = None
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load(self):
+        signature = self._stat()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # sklearn version-mismatch noise on unpickle
+            model = joblib.load(self.path)
+        return model, file_version(self.path), signature
+
+    def reload(self, force=False):
+        """Load the file if it changed (or on first use). Returns True when a new version was swapped in."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                if not force and self._current[0] is not None and self._stat() == self._signature:
+                    return False
+                model, version, signature = self._load()
+            except Exception as e:
+                if self.error != str(e):
+                    print(f"⚠️ Model load failed for {self.path}: {e}")
+                self.error = str(e)
+                return False
+            previous = self._current[1]
+            self._current, self._signature, self.error = (model, version), signature, None
+        if previous and previous != version:
+            print(f"🔁 Model swapped: {previous} → {version}")
+        elif not previous:
+            print(f"✅ Loaded ML model {version} from {self.path}")
+        return True
+
+    def current(self):
+        """(model, version), loading or refreshing first when due; (None, None) if unavailable."""
+        if self._current[0] is None or (self._thread is None and time.monotonic() - self._checked_at >= self.watch_sec):
+            self.reload()
+        return self._current
+
+    @property
+    def model(self):
+        return self.current()[0]
+
+    @property
+    def version(self):
+        return self.current()[1]
+
+    def forest(self):
+        """(CompiledForest, version) for the current model, compiled once per version."""
+        model, version = self.current()
+        forest, forest_version = self._forest
+        if model is None or forest_version == version:
+            return forest, forest_version
+        try:
+            forest = CompiledForest.from_sklearn(model)
+        except Exception:
+            forest = None  # not a tree ensemble: callers fall back to the model itself
+        self._forest = (forest, version)
+        return self._forest
+
+    def watch(self):
+        """Check the file every `watch_sec` in a background thread instead of on access."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def _watch(self):
+        while True:
+            time.sleep(self.watch_sec)
+            self.reload()
+
+
+_handles = {}
+_handles_lock = threading.Lock()
+
+
+def get_model(path=None):
+    """Process-wide ModelHandle for `path` (nothing is loaded until first use)."""
+    path = os.path.realpath(resolve_path(path))
+    with _handles_lock:
+        handle = _handles.get(path)
+        if handle is None:
+            handle = _handles[path] = ModelHandle(path)
+        return handle
+
+
+def publish(model, path=None):
+    """Write `model` next to its target and os.replace() it in; watchers pick it up."""
+    target = resolve_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, target)
+    handle = get_model(target)
+    handle.reload()
+    return handle.version
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 
 class FeatureEngineer:
     def __init__(self, context):
@@ -47,6 +48,64 @@ class FeatureEngineer:
 
         return features
 
+    def extract_features_batch(self, patterns, current_price, current_volume, timestamp):
+        """
+        Feature matrix (N x 12, float32) for N patterns, same columns as
+        extract_features. `patterns` is a list of pattern dicts or a
+        column mapping / DataFrame; price, volume and timestamp may be
+        scalars (one tick, several patterns) or length-N arrays (history).
+        """
+        columnar = hasattr(patterns, "keys")
+        n = len(patterns[next(iter(patterns.keys()))]) if columnar else len(patterns)
+        col = lambda name, default=None: self._column(patterns, name, default, n)
+
+        price = np.broadcast_to(np.asarray(current_price, dtype=np.float64), (n,))
+        volume = np.broadcast_to(np.asarray(current_volume, dtype=np.float64), (n,))
+        X = np.empty((n, 12), dtype=np.float32)
+
+        # --- Volume Behavior ---
+        norm_volume = self.context.get("volume_norm", 1.0)
+        X[:, 0] = np.round(volume / norm_volume, 3) if norm_volume > 0 else 1.0
+
+        # --- Distance to Next Level: binary search in the sorted levels, not a scan per row ---
+        all_levels = np.sort(np.asarray(self.context.get("all_levels", []), dtype=np.float64))
+        if len(all_levels):
+            pos = np.searchsorted(all_levels, price)
+            below = all_levels[np.clip(pos - 1, 0, len(all_levels) - 1)]
+            above = all_levels[np.clip(pos, 0, len(all_levels) - 1)]
+            X[:, 1] = np.round(np.minimum(np.abs(price - below), np.abs(price - above)), 2)
+        else:
+            X[:, 1] = 999999.0
+
+        # --- Time Features ---
+        if isinstance(timestamp, str):
+            X[:, 2] = self._minutes_since_open(timestamp)
+        else:
+            X[:, 2] = self._minutes_since_open_batch(timestamp)
+
+        # --- Contact Order / Reaction ---
+        reaction = col("dominant_reaction")
+        X[:, 3] = col("contact_order", 0).astype(np.float64)
+        X[:, 4] = col("level_type") == "solid"
+        X[:, 5] = np.where(reaction == "rejection", 1, np.where(reaction == "break", 2, 0))
+        X[:, 6] = col("approach_direction") == "from_above"
+        X[:, 7] = col("is_confluence", False).astype(bool)
+
+        # --- Color encoding ---
+        color = col("color")
+        for i, name in enumerate(("blue", "orange", "black", "teal")):
+            X[:, 8 + i] = color == name
+
+        return X
+
+    @staticmethod
+    def _column(patterns, name, default, n):
+        if hasattr(patterns, "keys"):
+            values = patterns[name] if name in patterns else [default] * n
+        else:
+            values = [p.get(name, default) for p in patterns]
+        return np.asarray(values, dtype=object) if not isinstance(values, np.ndarray) else values
+
     def _minutes_since_open(self, timestamp):
         try:
             hour = int(timestamp.split(":")[0])
@@ -56,6 +115,27 @@ class FeatureEngineer:
         except:
             return 0
 
+    @staticmethod
+    def _minutes_since_open_batch(timestamps):
+        """
+        _minutes_since_open for a whole column, parsed once by pandas.
+        "HH:MM[:SS]" strings (what extract_features reads) or datetimes;
+        anything unparseable is 0, as in the single-row version.
+        """
+        stamps = pd.Series(timestamps)
+        if pd.api.types.is_datetime64_any_dtype(stamps):
+            parsed = stamps
+        else:
+            stamps = stamps.astype(str)
+            parsed = pd.to_datetime(stamps, errors="coerce", format="%H:%M:%S")
+            for fmt in ("%H:%M", "%H:%M:%S.%f"):
+                missing = parsed.isna()
+                if not missing.any():
+                    break
+                parsed[missing] = pd.to_datetime(stamps[missing], errors="coerce", format=fmt)
+        minutes = parsed.dt.hour * 60 + parsed.dt.minute - (9 * 60 + 30)
+        return minutes.clip(lower=0).fillna(0).to_numpy(dtype=np.float64)
+
     def _encode_color(self, color):
         # One-hot: [blue, orange, black, teal]
         return [
@@ -1,36 +1,76 @@
-import joblib
 import numpy as np
 
+from model_registry import get_model
+
 class PatternRecognizer:
     def __init__(self, model_path="models/qmmx_model_v1.joblib"):
-        try:
-            self.model = joblib.load(model_path)
-        except Exception as e:
-            print("Error loading ML model:", e)
-            self.model = None
+        # Shared, lazily loaded handle (see model_registry); nothing is read here
+        self._handle = get_model(model_path)
+        self._pinned = None
+
+    @property
+    def model(self):
+        return self._pinned if self._pinned is not None else self._handle.model
+
+    @model.setter
+    def model(self, model):
+        # Pin an in-memory model (tests, notebooks) instead of the registry's file
+        self._pinned = model
+
+    @property
+    def model_version(self):
+        return self._current()[1]
+
+    def _current(self):
+        # One (model, version) pair per call, so a hot swap can't split a prediction
+        return (self._pinned, "pinned") if self._pinned is not None else self._handle.current()
 
     def recognize(self, feature_vector):
         """
         Takes a feature vector from FeatureEngineer and scores it.
         Returns confidence and decision label.
         """
-        if self.model is None:
+        model, version = self._current()
+        if model is None:
             return {
                 "confidence": 0.0,
-                "label": "review"
+                "label": "review",
+                "model_version": version
             }
 
         X = np.array([feature_vector])
         try:
-            proba = self.model.predict_proba(X)[0]
+            proba = model.predict_proba(X)[0]
             confidence = max(proba)
             label_index = np.argmax(proba)
-            label = self.model.classes_[label_index]
+            label = model.classes_[label_index]
         except:
             confidence = 0.0
             label = "review"
 
         return {
             "confidence": round(confidence, 3),
-            "label": label  # 'approve', 'review', or 'reject'
+            "label": label,  # 'approve', 'review', or 'reject'
+            "model_version": version  # for predictions.model_version
         }
+
+    def recognize_batch(self, X):
+        """
+        Scores N feature vectors (a 2-D array, e.g. from extract_features_batch)
+        with one predict_proba call. Returns one result dict per row.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        model, version = self._current()
+        if model is None or len(X) == 0:
+            return [{"confidence": 0.0, "label": "review", "model_version": version} for _ in range(len(X))]
+
+        try:
+            proba = model.predict_proba(X)
+        except Exception as e:
+            print("Batch scoring failed:", e)
+            return [{"confidence": 0.0, "label": "review", "model_version": version} for _ in range(len(X))]
+
+        confidence = np.round(proba.max(axis=1), 3)
+        labels = model.classes_[proba.argmax(axis=1)]
+        return [{"confidence": float(c), "label": l, "model_version": version}
+                for c, l in zip(confidence, labels.tolist())]
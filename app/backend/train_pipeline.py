@@ -0,0 +1,158 @@
+# train_pipeline.py — cross-validated forest search across a process pool
+#
+#   python train_pipeline.py --csv training_data.csv --jobs -1 --n-iter 20
+#
+# Each candidate's k-fold CV runs in its own worker process; results are
+# printed and appended to <runs dir>/<run id>.jsonl as they finish. The best
+# candidate is refit on all rows and published through model_registry with
+# its metrics next to it (<model>.metrics.json).
+
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+
+from model_registry import BASE_DIR, publish, resolve_path
+
+# Worker processes for the search (-1 = every core)
+TRAIN_JOBS = int(os.environ.get("Q_TRAIN_JOBS", "-1"))
+CV_FOLDS = int(os.environ.get("Q_TRAIN_FOLDS", "5"))
+RUNS_DIR = os.environ.get("QMMX_TRAIN_RUNS_DIR", os.path.join(BASE_DIR, "models", "training_runs"))
+
+# ml_model_design.md's target (150 trees, depth 6) is one point of the grid
+PARAM_GRID = {
+    "n_estimators": [100, 150, 300],
+    "max_depth": [4, 6, 8, None],
+    "min_samples_leaf": [1, 2, 5],
+    "max_features": ["sqrt", 0.5],
+    "class_weight": [None, "balanced"],
+}
+
+_X = _y = None
+
+
+def _init_worker(X, y):
+    # Data is shipped once per worker, not once per candidate
+    global _X, _y
+    _X, _y = X, y
+
+
+def _evaluate(params, folds, scoring, seed):
+    started = time.perf_counter()
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    model = RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    scores = cross_val_score(model, _X, _y, cv=cv, scoring=scoring)
+    return {
+        "params": params,
+        "scoring": scoring,
+        "mean": float(np.mean(scores)),
+        "std": float(np.std(scores)),
+        "folds": [float(s) for s in scores],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def candidates(grid=PARAM_GRID, n_iter=None, seed=42):
+    """Every grid point, or a seeded random sample of n_iter of them."""
+    keys = sorted(grid)
+    points = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    if n_iter and n_iter < len(points):
+        points = random.Random(seed).sample(points, n_iter)
+    return points
+
+
+def load_training_frame(csv_path):
+    df = pd.read_csv(csv_path)
+    if "label" not in df.columns:
+        raise ValueError("Missing 'label' column in training data.")
+    return df.drop("label", axis=1), df["label"]
+
+
+def run_search(X, y, grid=PARAM_GRID, n_iter=None, folds=CV_FOLDS, scoring="balanced_accuracy",
+               jobs=TRAIN_JOBS, seed=42, runs_dir=RUNS_DIR, model_path=None, publish_model=True):
+    """
+    CV every candidate in a process pool, then refit the winner on all rows and
+    publish it. Returns {"best", "results", "version", "results_path"}.
+    """
+    points = candidates(grid, n_iter, seed)
+    jobs = os.cpu_count() if jobs is None or jobs < 1 else jobs
+    folds = max(2, min(folds, int(pd.Series(y).value_counts().min())))
+
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    os.makedirs(runs_dir, exist_ok=True)
+    results_path = os.path.join(runs_dir, f"{run_id}.jsonl")
+    print(f"🔎 Searching {len(points)} candidates × {folds} folds on {len(X)} rows with {jobs} workers")
+
+    results = []
+    with open(results_path, "a") as log, ProcessPoolExecutor(
+            max_workers=min(jobs, len(points)), initializer=_init_worker, initargs=(X, y)) as pool:
+        futures = [pool.submit(_evaluate, p, folds, scoring, seed) for p in points]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"⚠️ Candidate failed: {e}")
+                continue
+            results.append(result)
+            log.write(json.dumps(result) + "\n")
+            log.flush()
+            best = max(results, key=lambda r: r["mean"])
+            print(f"📊 [{done}/{len(points)}] {scoring}={result['mean']:.4f}±{result['std']:.4f} "
+                  f"{result['params']} (best {best['mean']:.4f})")
+
+    if not results:
+        raise RuntimeError("Every candidate failed; nothing to publish")
+    best = max(results, key=lambda r: (r["mean"], -r["std"]))
+    outcome = {"best": best, "results": results, "version": None, "results_path": results_path}
+    if not publish_model:
+        return outcome
+
+    model = RandomForestClassifier(random_state=seed, n_jobs=jobs, **best["params"]).fit(X, y)
+    # Served one row at a time: a joblib pool per predict_proba would cost more than it saves
+    model.set_params(n_jobs=None)
+    version = publish(model, model_path)
+    metrics = {
+        "version": version,
+        "trained_at": datetime.utcnow().isoformat(),
+        "rows": int(len(X)),
+        "features": list(getattr(model, "feature_names_in_", [])),
+        "params": best["params"],
+        "cv": {k: best[k] for k in ("scoring", "mean", "std", "folds")},
+        "candidates": len(results),
+        "results_path": results_path,
+    }
+    with open(os.path.splitext(resolve_path(model_path))[0] + ".metrics.json", "w") as f:
+        json.dump(metrics, f, indent=2)
+    print(f"💾 Published {version}: {scoring}={best['mean']:.4f} with {best['params']}")
+    outcome["version"] = version
+    return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated RandomForest search for MLDecisionEngine")
+    parser.add_argument("--csv", default=os.path.join(BASE_DIR, "training_data.csv"))
+    parser.add_argument("--model", default=None, help="model file to publish (default: registry default)")
+    parser.add_argument("--jobs", type=int, default=TRAIN_JOBS)
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--n-iter", type=int, default=None, help="random sample of the grid (default: full grid)")
+    parser.add_argument("--scoring", default="balanced_accuracy")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dry-run", action="store_true", help="search only; don't publish a model")
+    args = parser.parse_args()
+
+    X, y = load_training_frame(args.csv)
+    run_search(X, y, n_iter=args.n_iter, folds=args.folds, scoring=args.scoring, jobs=args.jobs,
+               seed=args.seed, model_path=args.model, publish_model=not args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
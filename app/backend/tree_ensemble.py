@@ -0,0 +1,175 @@
+# tree_ensemble.py — RandomForest flattened into contiguous NumPy node arrays
+#
+#   python tree_ensemble.py models/qmmx_model_v1.joblib models/qmmx_model_v1.npz
+#
+# The export step needs sklearn/joblib; CompiledForest.load() and scoring
+# only need NumPy, so the decision path never builds a DataFrame or calls
+# into sklearn.
+
+import sys
+
+import numpy as np
+
+_LEAF = -1
+
+
+class CompiledForest:
+    """
+    All trees of a fitted forest in flat arrays (global node ids):
+
+      feature[n]    split feature, -1 at leaves
+      threshold[n]  go left when x[feature] <= threshold (float32 compare, as sklearn)
+      left/right[n] child node ids; leaves point at themselves
+      value[n, k]   class probabilities at the node
+      roots[t]      root node id of tree t
+
+    Nodes are numbered split nodes first, grouped by feature, then leaves.
+    A single row therefore evaluates every split with one np.repeat of x
+    and one compare (no per-node gather), builds the next-node table, and
+    each tree advances one level per gather (depth steps in total).
+    Batches walk all (row, tree) pairs level by level.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, feature_names=None, depth=None,
+                 n_features=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.classes = np.asarray(classes)
+        self.feature_names = None if feature_names is None else [str(n) for n in feature_names]
+        self.depth = int(depth) if depth is not None else self._max_depth()
+        self.n_features = int(n_features or (len(self.feature_names) if self.feature_names else self.feature.max() + 1))
+
+        split = self.feature >= 0
+        self._n_split = int(split.sum())
+        if split[self._n_split:].any() or np.any(np.diff(self.feature[:self._n_split]) < 0):
+            raise ValueError("nodes must be numbered split nodes (sorted by feature) first, then leaves")
+        self._node_feature = np.where(split, self.feature, 0).astype(np.intp)
+        self._node_left = self.left.astype(np.intp)
+        self._node_right = self.right.astype(np.intp)
+        self._roots = self.roots.astype(np.intp)
+        self._split_counts = np.bincount(self.feature[:self._n_split], minlength=self.n_features)
+        self._split_left = self.left[:self._n_split].astype(np.intp)
+        self._split_right = self.right[:self._n_split].astype(np.intp)
+        self._split_threshold = self.threshold[:self._n_split]
+        self._leaf_ids = np.arange(self._n_split, len(self.feature), dtype=np.intp)
+        self._n_trees = len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted RandomForestClassifier (or a single DecisionTreeClassifier)."""
+        trees = getattr(model, "estimators_", None) or [model]
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for est in trees:
+            t = est.tree_
+            ids = np.arange(t.node_count, dtype=np.int64) + offset
+            is_leaf = t.children_left == _LEAF
+            feature.append(np.where(is_leaf, _LEAF, t.feature))
+            threshold.append(np.where(is_leaf, 0.0, t.threshold))
+            left.append(np.where(is_leaf, ids, t.children_left + offset))
+            right.append(np.where(is_leaf, ids, t.children_right + offset))
+            v = t.value[:, 0, :].astype(np.float64)
+            value.append(v / v.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += t.node_count
+            depth = max(depth, t.max_depth)
+        feature = np.concatenate(feature)
+
+        # Renumber: split nodes sorted by feature, then leaves
+        split = np.flatnonzero(feature >= 0)
+        order = np.concatenate([split[np.argsort(feature[split], kind="stable")], np.flatnonzero(feature < 0)])
+        new_id = np.empty_like(order)
+        new_id[order] = np.arange(len(order))
+        return cls(feature[order], np.concatenate(threshold)[order], new_id[np.concatenate(left)[order]],
+                   new_id[np.concatenate(right)[order]], np.concatenate(value)[order], new_id[roots],
+                   model.classes_, getattr(model, "feature_names_in_", None), depth, model.n_features_in_)
+
+    def _max_depth(self):
+        frontier, depth = self.roots, 0
+        while True:
+            internal = frontier[self.feature[frontier] >= 0]
+            if not len(internal):
+                return depth
+            frontier = np.concatenate([self.left[internal], self.right[internal]])
+            depth += 1
+
+    # ---------- persistence ----------
+
+    def save(self, path):
+        names = np.array(self.feature_names if self.feature_names is not None else [], dtype=str)
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 value=self.value, roots=self.roots, classes=self.classes, feature_names=names,
+                 depth=np.array(self.depth), n_features=np.array(self.n_features))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            names = data["feature_names"]
+            return cls(data["feature"], data["threshold"], data["left"], data["right"], data["value"],
+                       data["roots"], data["classes"], list(names) if len(names) else None, int(data["depth"]),
+                       int(data["n_features"]))
+
+    # ---------- scoring ----------
+
+    def row(self, input_data):
+        """Feature vector from a {feature_name: value} dict, in training column order."""
+        return np.array([input_data[name] for name in self.feature_names], dtype=np.float32)
+
+    def predict_proba_one(self, x):
+        """Class probabilities for one feature vector (1-D)."""
+        x = np.asarray(x, dtype=np.float32)
+        go_left = np.repeat(x, self._split_counts) <= self._split_threshold
+        step = np.concatenate((np.where(go_left, self._split_left, self._split_right), self._leaf_ids))
+        idx = self._roots
+        for _ in range(self.depth):
+            idx = step.take(idx)
+        return self.value.take(idx, axis=0).sum(axis=0) / self._n_trees
+
+    def predict_proba(self, X, chunk=1024):
+        """
+        Class probabilities for a 2-D batch (rows x features), `chunk` rows at a
+        time. For very large offline batches sklearn's threaded predict_proba
+        is faster; this path is for scoring without sklearn loaded.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            return self.predict_proba_one(X)[None, :]
+        out = np.empty((len(X), self.value.shape[1]))
+        n_features = X.shape[1]
+        for start in range(0, len(X), chunk):
+            flat = np.ascontiguousarray(X[start:start + chunk]).ravel()
+            n = len(flat) // n_features
+            base = (np.arange(n, dtype=np.intp) * n_features)[:, None]
+            idx = np.broadcast_to(self._roots, (n, self._n_trees)).copy()
+            for _ in range(self.depth):
+                go_left = flat.take(base + self._node_feature.take(idx)) <= self.threshold.take(idx)
+                idx = np.where(go_left, self._node_left.take(idx), self._node_right.take(idx))
+            out[start:start + n] = self.value.take(idx, axis=0).sum(axis=1) / self._n_trees
+        return out
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def predict_one(self, x):
+        return self.classes[int(np.argmax(self.predict_proba_one(x)))]
+
+
+def export_forest(model_path, out_path):
+    """Load a joblib forest and write its compiled .npz next to it."""
+    import joblib
+
+    forest = CompiledForest.from_sklearn(joblib.load(model_path))
+    forest.save(out_path)
+    print(f"💾 Compiled {forest._n_trees} trees / {len(forest.feature)} nodes (depth {forest.depth}) to {out_path}")
+    return forest
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else "models/qmmx_model_v1.joblib"
+    dst = sys.argv[2] if len(sys.argv) > 2 else src.rsplit(".", 1)[0] + ".npz"
+    export_forest(src, dst)
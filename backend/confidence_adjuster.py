@@ -1,33 +1,156 @@
-# confidence_adjuster.py
+# confidence_adjuster.py — pattern win/loss counters, snapshotted to JSON
+#
+# The engine records outcomes into `pattern_outcomes` (an OutcomeStore); a
+# background thread writes a snapshot when counters changed, and the next
+# start restores it. The API opens the same file read-only (outcome_view()).
 
-from collections import defaultdict
+import atexit
+import json
+import os
+import threading
+import time
+
+OUTCOMES_PATH = os.environ.get("QMMX_OUTCOMES_PATH", "qmmx_outcomes.json")
+# Seconds between snapshots (only written when something changed)
+SNAPSHOT_SEC = float(os.environ.get("Q_OUTCOMES_SNAPSHOT_SEC", "30"))
+
+
+class OutcomeStore:
+    """
+    {pattern_key: [wins, losses]} in memory, persisted as a JSON snapshot.
+
+    Writers hold the lock only for a counter bump; snapshots copy the dict
+    under the lock and serialise outside it, then os.replace() the file so
+    readers never see a partial write. A readonly store never writes and
+    re-reads the file when its mtime moves (checked at most every `poll_sec`).
+    """
+
+    def __init__(self, path=OUTCOMES_PATH, snapshot_sec=SNAPSHOT_SEC, readonly=False, poll_sec=1.0):
+        self.path = path
+        self.snapshot_sec = snapshot_sec
+        self.readonly = readonly
+        self.poll_sec = poll_sec
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._dirty = False
+        self._mtime = None
+        self._checked_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self.load()
+
+    def load(self):
+        """Restore counters from the snapshot (missing or unreadable file = empty)."""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print("⚠️ Outcome snapshot unreadable:", e)
+            return
+        counts = {key: [int(w), int(l)] for key, (w, l) in data.get("outcomes", {}).items()}
+        with self._lock:
+            self._counts = counts
+            self._mtime = mtime
+
+    def record(self, key, was_successful):
+        if self.readonly:
+            raise RuntimeError("OutcomeStore opened read-only")
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0, 0]
+            counts[0 if was_successful else 1] += 1
+            self._dirty = True
+
+    def get(self, key):
+        """(wins, losses) for key; unseen keys are not added."""
+        self._maybe_reload()
+        counts = self._counts.get(key)
+        return (counts[0], counts[1]) if counts else (0, 0)
+
+    def items(self):
+        self._maybe_reload()
+        with self._lock:
+            return {key: {"wins": w, "losses": l} for key, (w, l) in self._counts.items()}
+
+    def _maybe_reload(self):
+        if not self.readonly or time.monotonic() - self._checked_at < self.poll_sec:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            if os.path.getmtime(self.path) != self._mtime:
+                self.load()
+        except OSError:
+            pass
+
+    def snapshot(self):
+        """Write the counters if they changed since the last snapshot. Returns True if written."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = {key: list(c) for key, c in self._counts.items()}
+            self._dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"saved_at": time.time(), "outcomes": data}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self._dirty = True
+            print("⚠️ Outcome snapshot failed:", e)
+            return False
+        return True
+
+    def start(self):
+        """Snapshot every `snapshot_sec` in the background, and once more at exit."""
+        if self._thread is None and not self.readonly:
+            self._thread = threading.Thread(target=self._run, name="outcome-snapshots", daemon=True)
+            self._thread.start()
+            atexit.register(self.snapshot)
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.snapshot_sec):
+            self.snapshot()
+
+
+# Pattern outcome history (restored from the last snapshot)
+pattern_outcomes = OutcomeStore()
 
-# Pattern outcome history
-pattern_outcomes = defaultdict(lambda: {"wins": 0, "losses": 0})
 
 def record_pattern_outcome(pattern_signature, was_successful):
     """
     Logs whether a pattern setup resulted in a successful trade.
     """
-    key = _pattern_key(pattern_signature)
-    if was_successful:
-        pattern_outcomes[key]["wins"] += 1
-    else:
-        pattern_outcomes[key]["losses"] += 1
+    pattern_outcomes.start()
+    pattern_outcomes.record(_pattern_key(pattern_signature), was_successful)
 
-def get_confidence_score(pattern_signature):
+def get_confidence_score(pattern_signature, store=None):
     """
     Returns a confidence score between 0.0 and 1.0 for the given pattern.
     """
-    key = _pattern_key(pattern_signature)
-    history = pattern_outcomes[key]
-    total = history["wins"] + history["losses"]
+    wins, losses = (store or pattern_outcomes).get(_pattern_key(pattern_signature))
+    total = wins + losses
     if total == 0:
         return 0.5  # Neutral confidence if no history yet
-    return history["wins"] / total
+    return wins / total
+
+_view = None
+
+def outcome_view():
+    """Read-only store for other processes (the API); follows the engine's snapshots."""
+    global _view
+    if _view is None:
+        _view = OutcomeStore(readonly=True)
+    return _view
 
 def _pattern_key(signature):
     """
-    Converts a pattern signature dictionary into a hashable string key.
+    Converts a pattern signature (dict or an already-built key / pattern name) into a hashable string key.
     """
+    if not isinstance(signature, dict):
+        return str(signature)
     return f"{signature.get('level_type')}|{signature.get('reaction_type')}|{signature.get('approach_direction')}|{signature.get('macro_position')}"
@@ -1,18 +1,21 @@
-import requests
 import os
 from datetime import datetime
 from diagnostic_monitor import diagnostic_monitor  # ✅ Added
+from http_client import polygon_client
 
 class PolygonDataProvider:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, client=None):
         self.api_key = api_key or os.getenv("POLYGON_API_KEY")
-        self.base_url = "https://api.polygon.io"
+        self.client = client or polygon_client  # pooled keep-alive session with timeouts
+        self.base_url = self.client.base_url
 
     def get_current_price(self, ticker="SPY"):
-        url = f"{self.base_url}/v2/last/trade/{ticker}?apiKey={self.api_key}"
         try:
-            resp = requests.get(url)
-            data = resp.json()
+            data = self.client.get_json(
+                f"/v2/last/trade/{ticker}",
+                params={"apiKey": self.api_key},
+                endpoint="/v2/last/trade/{ticker}",
+            )
             price = float(data["results"]["p"])
             diagnostic_monitor.ping("data_provider")  # ✅ Ping on success
             return price
@@ -24,10 +27,12 @@ class PolygonDataProvider:
     def get_current_volume(self, ticker="SPY"):
         now = datetime.now()
         date_str = now.strftime("%Y-%m-%d")
-        url = f"{self.base_url}/v2/aggs/ticker/{ticker}/range/1/minute/{date_str}/{date_str}?adjusted=true&sort=desc&limit=1&apiKey={self.api_key}"
         try:
-            resp = requests.get(url)
-            bars = resp.json().get("results", [])
+            bars = self.client.get_json(
+                f"/v2/aggs/ticker/{ticker}/range/1/minute/{date_str}/{date_str}",
+                params={"adjusted": "true", "sort": "desc", "limit": 1, "apiKey": self.api_key},
+                endpoint="/v2/aggs/ticker/{ticker}/range/1/minute",
+            ).get("results", [])
             if bars:
                 volume = bars[0].get("v", 0)
                 diagnostic_monitor.ping("data_provider")  # ✅ Track volume ping
@@ -40,10 +45,12 @@ class PolygonDataProvider:
             return 0
 
     def get_option_chain(self, ticker="SPY"):
-        url = f"{self.base_url}/v3/snapshot/options/{ticker}?apiKey={self.api_key}"
         try:
-            resp = requests.get(url)
-            options_data = resp.json().get("results", {}).get("options", [])
+            options_data = self.client.get_json(
+                f"/v3/snapshot/options/{ticker}",
+                params={"apiKey": self.api_key},
+                endpoint="/v3/snapshot/options/{ticker}",
+            ).get("results", {}).get("options", [])
             chain = []
             for opt in options_data:
                 chain.append({
@@ -1,10 +1,21 @@
 from datetime import datetime
 from diagnostic_monitor import diagnostic_monitor  # ✅ Added
+from level_index import LevelIndex
 
 class PatternDiscovery:
+    touch_window = 0.2       # price distance that counts as a touch
+    confluence_window = 0.4  # other-color levels this close make a confluence zone
+
     def __init__(self, levels_by_color):
-        self.levels = levels_by_color  # Dict of lists: {color: {solid: [], dashed: []}}
         self.active_patterns = []
+        self.set_levels(levels_by_color)
+
+    def set_levels(self, levels_by_color):
+        """
+        Replace the level set and rebuild the sorted level index.
+        """
+        self.levels = levels_by_color  # Dict of lists: {color: {solid: [], dashed: []}}
+        self.index = LevelIndex.from_levels_by_color(levels_by_color)
 
     def detect_pattern(self, price, volume, timestamp):
         """
@@ -14,23 +25,22 @@ class PatternDiscovery:
         detected = []
 
         try:
-            for color in self.levels:
-                for level_type in ["solid", "dashed"]:
-                    for level in self.levels[color][level_type]:
-                        if self._price_touch(price, level):
-                            pattern = {
-                                "timestamp": timestamp,
-                                "color": color,
-                                "level": level,
-                                "level_type": level_type,
-                                "volume": volume,
-                                "contact_order": self._infer_contact_order(level),
-                                "approach_direction": self._infer_approach(price, level),
-                                "is_confluence": self._check_confluence(price, color),
-                                "dominant_reaction": self._guess_reaction(price, level),
-                            }
-                            detected.append(pattern)
-                            self._store(pattern)
+            for touched in self.index.within(price, self.touch_window):
+                color = touched["color"]
+                level = touched["price"]
+                pattern = {
+                    "timestamp": timestamp,
+                    "color": color,
+                    "level": level,
+                    "level_type": touched["type"],
+                    "volume": volume,
+                    "contact_order": self._infer_contact_order(level),
+                    "approach_direction": self._infer_approach(price, level),
+                    "is_confluence": self._check_confluence(price, color),
+                    "dominant_reaction": self._guess_reaction(price, level),
+                }
+                detected.append(pattern)
+                self._store(pattern)
 
             diagnostic_monitor.ping("pattern_discovery")  # ✅ Success ping
         except Exception as e:
@@ -38,10 +48,6 @@ class PatternDiscovery:
 
         return detected
 
-    def _price_touch(self, price, level):
-        # Consider a 0.2 point tolerance window
-        return abs(price - level) <= 0.2
-
     def _infer_contact_order(self, level):
         # TODO: Track contact frequency dynamically
         return 1
@@ -50,14 +56,8 @@ class PatternDiscovery:
         return "from_above" if price > level else "from_below"
 
     def _check_confluence(self, price, current_color):
-        nearby_hits = 0
-        for color in self.levels:
-            if color == current_color:
-                continue
-            for level in self.levels[color]["solid"] + self.levels[color]["dashed"]:
-                if abs(price - level) <= 0.4:
-                    nearby_hits += 1
-        return nearby_hits >= 1
+        nearby = self.index.colors[self.index.within_indices(price, self.confluence_window)]
+        return bool((nearby != current_color).any())
 
     def _guess_reaction(self, price, level):
         return "rejection"
@@ -0,0 +1,158 @@
+# bar_ring.py — memory-mapped, fixed-capacity per-symbol bar history for /chart_data
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from settings_store import load_settings
+
+RING_DIR = os.environ.get("QMMX_RING_DIR", "rings")
+# Bars kept per symbol (1440 one-minute bars = one day)
+RING_CAPACITY = int(os.environ.get("Q_RING_CAPACITY", "1440"))
+# Bar width in seconds; every quote inside a bar updates its close/volume
+BAR_SEC = int(os.environ.get("Q_CHART_BAR_SEC", "60"))
+# Bars fetched once from Polygon when a ring is first created
+BACKFILL_BARS = int(os.environ.get("Q_RING_BACKFILL_BARS", "30"))
+
+_MAGIC = 0x514D4D5852494E47  # "QMMXRING"
+_HEADER_WORDS = 4            # magic, capacity, bars written, bar seconds
+_HEADER_BYTES = _HEADER_WORDS * 8
+
+
+class BarRing:
+    """
+    Ring of (time, close, volume) bars in one memory-mapped file.
+
+    The engine is the single writer: `update()` folds each quote into the
+    current bar or starts the next slot, then bumps the written-bars counter
+    in the header. The API maps the same file read-only and `last(n)` copies
+    the newest n bars straight out of the mapping. Memory is bounded by
+    `capacity`; the oldest bars are overwritten.
+    """
+
+    def __init__(self, path, capacity=RING_CAPACITY, bar_sec=BAR_SEC, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            header = np.fromfile(path, dtype=np.int64, count=_HEADER_WORDS)
+            if len(header) < _HEADER_WORDS or header[0] != _MAGIC:
+                raise ValueError(f"{path} is not a bar ring")
+            capacity, bar_sec = int(header[1]), int(header[3])
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        size = _HEADER_BYTES + 3 * capacity * 8
+
+        fresh = not readonly and (not os.path.exists(path) or os.path.getsize(path) < size)
+        if fresh:
+            with open(path, "wb") as f:
+                f.truncate(size)
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r" if readonly else "r+", shape=(size,))
+        self._header = self._mm[:_HEADER_BYTES].view(np.int64)
+        self._cols = self._mm[_HEADER_BYTES:].view(np.float64).reshape(3, capacity)
+        if fresh:
+            self._header[:] = (_MAGIC, capacity, 0, bar_sec)
+        self.capacity = int(self._header[1])
+        self.bar_sec = int(self._header[3])
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return int(min(self._header[2], self.capacity))
+
+    @property
+    def written(self):
+        return int(self._header[2])
+
+    def update(self, ts, price, volume=None):
+        """Fold one quote (epoch seconds) into the current bar, or open the next one."""
+        if price is None:
+            return
+        bar_time = float(int(ts) // self.bar_sec * self.bar_sec)
+        vol = float(volume or 0.0)
+        with self._lock:
+            count = int(self._header[2])
+            times, prices, volumes = self._cols
+            if count:
+                last = (count - 1) % self.capacity
+                if times[last] == bar_time:
+                    prices[last] = price
+                    volumes[last] += vol
+                    return
+                if bar_time < times[last]:
+                    return  # late quote for a bar that's already closed
+            slot = count % self.capacity
+            times[slot], prices[slot], volumes[slot] = bar_time, price, vol
+            self._header[2] = count + 1  # publish after the slot is filled
+
+    def extend(self, bars):
+        """Append historical bars [(time, close, volume), ...] in time order (backfill)."""
+        for ts, price, volume in bars:
+            self.update(ts, price, volume)
+
+    def last(self, n=60):
+        """Copies of the newest n bars as (times, prices, volumes) arrays, oldest first."""
+        for _ in range(5):
+            count = int(self._header[2])
+            n_avail = min(n, count, self.capacity)
+            idx = (np.arange(count - n_avail, count) % self.capacity) if n_avail else np.arange(0)
+            out = self._cols[:, idx].copy()
+            # The writer lapped the slots we copied: read again
+            if int(self._header[2]) - count < self.capacity - n_avail:
+                return out[0], out[1], out[2]
+        return out[0], out[1], out[2]
+
+    def flush(self):
+        if not self.readonly:
+            self._mm.flush()
+
+
+def fetch_minute_bars(symbol, count=BACKFILL_BARS):
+    """One REST call: the last `count` one-minute aggregates as [(time, close, volume)]."""
+    from http_client import polygon_client
+
+    api_key = load_settings().get("polygon_api_key", "")
+    if not api_key:
+        return []
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - count * 60 * 1000 * 3  # room for gaps in thin trading
+    bars = polygon_client.get_json(
+        f"/v2/aggs/ticker/{symbol}/range/1/minute/{start_ms}/{end_ms}",
+        params={"adjusted": "true", "sort": "desc", "limit": count, "apiKey": api_key},
+        endpoint="/v2/aggs/ticker/{symbol}/range/1/minute",
+    ).get("results", [])
+    return [(b["t"] / 1000.0, b["c"], b.get("v", 0)) for b in reversed(bars)]
+
+
+def ring_path(symbol):
+    return os.path.join(RING_DIR, f"{symbol.upper()}.ring")
+
+
+_rings = {}
+_rings_lock = threading.Lock()
+
+
+def open_ring(symbol, readonly=False, backfill=fetch_minute_bars):
+    """
+    Process-wide BarRing for `symbol`. The writer side backfills a brand-new
+    (empty) ring once; read-only opens return None until the engine created it.
+    """
+    key = (symbol.upper(), readonly)
+    with _rings_lock:
+        ring = _rings.get(key)
+        if ring is not None:
+            return ring
+        path = ring_path(symbol)
+        if readonly:
+            if not os.path.exists(path):
+                return None
+            ring = BarRing(path, readonly=True)
+        else:
+            ring = BarRing(path)
+            if not ring.written and backfill:
+                try:
+                    ring.extend(backfill(symbol))
+                except Exception as e:
+                    print("⚠️ Bar ring backfill failed:", e)
+        _rings[key] = ring
+        return ring
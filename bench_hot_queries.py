@@ -0,0 +1,120 @@
+# bench_hot_queries.py — per-tick query cost with and without the migrate.INDEXES
+#
+#   python bench_hot_queries.py --rows 1000000
+#
+# Builds a throwaway DB, times each hot query on the bare tables, then applies
+# migrate.ensure_indexes() and times them again.
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import migrate
+from storage import connect
+
+PATTERNS_DDL = """CREATE TABLE patterns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    timestamp TEXT,
+    reviewed INTEGER DEFAULT 0,
+    decision TEXT,
+    decision_time TEXT
+)"""
+
+
+def _ts(i):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(1_700_000_000 + i))
+
+
+def populate(conn, rows, seed=7):
+    rnd = random.Random(seed)
+    cur = conn.cursor()
+    for stmt in migrate.SCHEMA:
+        cur.execute(stmt)
+    migrate._ensure_columns(cur)
+    # pattern_memory_engine reads patterns.timestamp, not the ts column in migrate.SCHEMA
+    cur.execute("DROP TABLE patterns")
+    cur.execute(PATTERNS_DDL)
+
+    cur.executemany(
+        "INSERT INTO trades (trade_id, symbol, direction, entry_price, entry_time, status) VALUES (?, 'SPY', ?, ?, ?, 'closed')",
+        ((i, rnd.choice(("long", "short")), round(600 + rnd.random() * 50, 2), _ts(i)) for i in range(rows)))
+    # pattern_evolution holds one row per (key, direction); keep it at a tenth of the others
+    cur.executemany(
+        "INSERT INTO pattern_evolution (pattern_key, direction, confidence_weight, wins, losses, last_updated) VALUES (?, ?, 0.5, 1, 1, ?)",
+        ((f"k{i}", d, _ts(i)) for i in range(max(rows // 20, 1)) for d in ("long", "short")))
+    cur.executemany(
+        "INSERT INTO patterns (name, timestamp, reviewed) VALUES (?, ?, ?)",
+        ((f"p{i}", _ts(i), 0 if i > rows - 5 else 1) for i in range(rows)))
+    cur.executemany(
+        "INSERT INTO alerts (message, timestamp) VALUES (?, ?)",
+        ((f"alert {i}", _ts(i)) for i in range(rows)))
+    cur.executemany(
+        "INSERT INTO pattern_resilience (pattern_id, timestamp, outcome, volatility_score, duration_minutes) VALUES (?, ?, ?, ?, ?)",
+        ((f"p{rnd.randrange(rows // 100 or 1)}", _ts(i), rnd.choice(("win", "loss")), rnd.random(), rnd.randrange(60))
+         for i in range(rows)))
+    conn.commit()
+
+
+def hot_queries(rows):
+    mid = rows // 2
+    return [
+        ("exit update by trade_id",
+         "UPDATE trades SET status = 'closed' WHERE trade_id = ?", (mid,)),
+        ("pattern_evolution lookup",
+         "SELECT wins, losses FROM pattern_evolution WHERE pattern_key = ? AND direction = ?", (f"k{rows // 40}", "long")),
+        ("current unreviewed pattern",
+         "SELECT * FROM patterns WHERE reviewed = 0 ORDER BY timestamp ASC LIMIT 1", ()),
+        ("latest alerts",
+         "SELECT message, timestamp FROM alerts ORDER BY timestamp DESC LIMIT 5", ()),
+        ("resilience by pattern",
+         "SELECT outcome, volatility_score, duration_minutes FROM pattern_resilience "
+         "WHERE pattern_id = ? ORDER BY timestamp DESC LIMIT 10", ("p3",)),
+    ]
+
+
+def time_query(conn, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    conn.rollback()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        conn = connect(path)
+        started = time.perf_counter()
+        populate(conn, args.rows)
+        print(f"📦 Populated {args.rows:,} rows per table in {time.perf_counter() - started:.1f}s")
+
+        queries = hot_queries(args.rows)
+        before = [time_query(conn, sql, params, args.repeat) for _, sql, params in queries]
+        migrate.ensure_indexes(conn.cursor())
+        conn.execute("ANALYZE")
+        after = [time_query(conn, sql, params, args.repeat) for _, sql, params in queries]
+
+        print(f"{'query':<30}{'no index ms':>14}{'indexed ms':>14}{'speedup':>10}")
+        for (name, _, _), b, a in zip(queries, before, after):
+            print(f"{name:<30}{b:>14.3f}{a:>14.3f}{b / a if a else float('inf'):>9.0f}x")
+        conn.close()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,10 @@
 import json
 from datetime import datetime, timedelta
 import pandas as pd
-import requests
 
 from settings_manager import load_settings
 from polygon_io_provider import get_live_price_and_volume
+from http_client import polygon_client
 
 TICKER = "SPY"
 DAYS_BACK = 30
@@ -24,15 +24,12 @@ def fetch_daily_spy_data():
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=DAYS_BACK)
 
-    url = (
-        f"https://api.polygon.io/v2/aggs/ticker/{TICKER}/range/1/day/"
-        f"{start_date}/{end_date}?adjusted=true&sort=asc&apiKey={api_key}"
-    )
-
     try:
-        res = requests.get(url)
-        res.raise_for_status()
-        results = res.json().get("results", [])
+        results = polygon_client.get_json(
+            f"/v2/aggs/ticker/{TICKER}/range/1/day/{start_date}/{end_date}",
+            params={"adjusted": "true", "sort": "asc", "apiKey": api_key},
+            endpoint="/v2/aggs/ticker/{symbol}/range/1/day",
+        ).get("results", [])
         records = []
 
         for item in results:
@@ -1,5 +1,5 @@
 import datetime
-import requests
+from heartbeat import heartbeat
 
 class ContactEventEvaluator:
     def __init__(self):
@@ -31,10 +31,7 @@ class ContactEventEvaluator:
         confidence = self._assign_confidence(reaction, volume)
 
         # ✅ Heartbeat ping
-        try:
-            requests.post("http://127.0.0.1:5000/ping", json={"module": "contact_event_evaluator"})
-        except:
-            pass
+        heartbeat.beat("contact_event_evaluator")
 
         return {
             "symbol": symbol,
@@ -1,6 +1,6 @@
-import sqlite3
+from storage import connect
 
-conn = sqlite3.connect("qmmx.db")
+conn = connect()
 cursor = conn.cursor()
 
 cursor.execute("""
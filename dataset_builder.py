@@ -0,0 +1,369 @@
+# dataset_builder.py — labeled training rows from what the engine recorded
+#
+#   python dataset_builder.py --prices spy_ticks.parquet --since 2026-01-01 \
+#       --out app/backend/training_data.built.csv --full dataset_full.parquet
+#
+# Existing output files are only replaced with --force (the shipped
+# app/backend/training_data.csv is never the default target).
+#
+# Contacts come from contact_events and false_missed_analysis (archived and
+# live rows, see retention.query_rows). Each is labeled against the price
+# history with np.searchsorted (price at t + horizon) and a block sparse
+# table (extremes inside the window): forward return, level hold and level break at
+# 5m / 15m / 60m. trade_recommendations (also archived + live) and trades are
+# joined the same way.
+# app/backend/batch_score.py scores a --full table with the recognizer model.
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import tzlocal
+
+import migrate
+from retention import query_rows
+from storage import get_connection
+
+# Forward windows labeled for every contact (name -> seconds)
+HORIZONS = {"5m": 300, "15m": 900, "60m": 3600}
+# Price must close/trade this far through the level to count as a break
+LEVEL_TOL = float(os.environ.get("Q_LEVEL_TOL", "0.10"))
+# A recommendation or trade this many seconds after a contact is attributed to it
+JOIN_WINDOW_SEC = float(os.environ.get("Q_DATASET_JOIN_SEC", "120"))
+# Outcome the model learns: label = <target>_<horizon>
+LABEL_TARGET = os.environ.get("Q_LABEL_TARGET", "level_hold")
+LABEL_HORIZON = os.environ.get("Q_LABEL_HORIZON", "15m")
+# IANA zone of the engine's naive timestamps, e.g. America/New_York (default: this host's zone)
+LOCAL_TZ = os.environ.get("Q_LOCAL_TZ", "")
+
+# Column layout of app/backend/training_data.csv / the model's feature_names_in_
+FEATURE_COLUMNS = [
+    "contact_order",
+    "level_type_BlackDashed", "level_type_BlackSolid", "level_type_BlueDashed", "level_type_BlueSolid",
+    "level_type_OrangeDashed", "level_type_OrangeSolid", "level_type_TealSolid",
+    "approach_direction_Downward", "approach_direction_Upward",
+    "reaction_type_Break", "reaction_type_Hesitation", "reaction_type_Rejection",
+    "time_of_day_Afternoon", "time_of_day_Midday", "time_of_day_Morning",
+]
+
+_APPROACH = {"from_above": "Downward", "from_below": "Upward", "downward": "Downward", "upward": "Upward"}
+_REACTION = {"rejection": "Rejection", "breakthrough": "Break", "break": "Break", "hesitation": "Hesitation"}
+
+
+# ---------- loading ----------
+
+def to_epoch(values, utc=False):
+    """Timestamps (ISO strings or epoch numbers) -> float64 epoch seconds; NaN where unparseable.
+    Naive strings are host-local time (what the engine writes) unless utc=True."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        secs = values.to_numpy(dtype=np.float64)
+        return np.where(secs > 1e11, secs / 1000.0, secs)  # milliseconds
+    parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+    if parsed.dt.tz is None and not utc:
+        # Per-timestamp offset, so rows on either side of a DST switch convert correctly;
+        # the repeated autumn hour is read as the first (DST) pass, the skipped spring hour shifts forward
+        parsed = parsed.dt.tz_localize(LOCAL_TZ or tzlocal(), ambiguous=True, nonexistent="shift_forward")
+    if parsed.dt.tz is not None:
+        parsed = parsed.dt.tz_convert("UTC").dt.tz_localize(None)
+    ns = parsed.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    return np.where(parsed.isna().to_numpy(), np.nan, ns / 1e9)
+
+
+def load_price_history(path=None, symbol="SPY"):
+    """
+    (times, prices) sorted by time. From a CSV/Parquet file with a
+    timestamp|t|time column and a price|close|c column, else the engine's bar
+    ring for `symbol` (the last RING_CAPACITY bars).
+    """
+    if path:
+        df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+        if "symbol" in df.columns:
+            df = df[df["symbol"].astype(str).str.upper() == symbol.upper()]
+        t_col = next(c for c in ("timestamp", "t", "time") if c in df.columns)
+        p_col = next(c for c in ("price", "close", "c") if c in df.columns)
+        times, prices = to_epoch(df[t_col]), df[p_col].to_numpy(dtype=np.float64)
+    else:
+        from bar_ring import open_ring
+
+        ring = open_ring(symbol, readonly=True)
+        if ring is None:
+            return np.empty(0), np.empty(0)
+        times, prices, _ = ring.last(ring.capacity)
+    keep = ~(np.isnan(times) | np.isnan(prices))
+    order = np.argsort(times[keep], kind="stable")
+    return times[keep][order], prices[keep][order]
+
+
+def load_contacts(since=None, until=None, db_path=None):
+    """contact_events + false_missed_analysis as one DataFrame of contacts."""
+    contacts = pd.DataFrame(query_rows("contact_events", since, until, db_path=db_path))
+    if len(contacts):
+        contacts = pd.DataFrame({
+            "source": "contact_events", "id": contacts["id"], "timestamp": contacts["timestamp"],
+            "t": to_epoch(contacts["timestamp"]), "symbol": contacts["symbol"],
+            "level": contacts["level_price"], "level_color": contacts["level_color"],
+            "level_type": contacts["level_type"], "direction": contacts["direction"],
+            "reaction": contacts["reaction"], "contact_order": contacts["contact_order"],
+        })
+    missed = pd.DataFrame(query_rows("false_missed_analysis", since, until, db_path=db_path))
+    if len(missed):
+        missed = pd.DataFrame({
+            "source": "false_missed_analysis", "id": missed["id"], "timestamp": missed["timestamp"],
+            # DATETIME('now') rows are UTC
+            "t": to_epoch(missed["timestamp"], utc=True), "symbol": missed["symbol"],
+            "level": missed["level"], "level_color": missed["level_color"],
+            "level_type": missed["level_type"], "direction": None,
+            "reaction": missed["reaction"], "contact_order": missed["contact_order"],
+        })
+    frames = [f for f in (contacts, missed) if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=["source", "id", "timestamp", "t", "symbol", "level", "level_color",
+                                     "level_type", "direction", "reaction", "contact_order"])
+    return pd.concat(frames, ignore_index=True).sort_values("t", kind="stable").reset_index(drop=True)
+
+
+def _events(sql, db_path=None):
+    # No fallback: a join that can't be read fails the build instead of silently unlabeling it
+    return pd.read_sql_query(sql, get_connection(db_path))
+
+
+# ---------- labeling ----------
+
+# Block size for the range-extreme tables (windows inside one block are reduced directly)
+_BLOCK = 64
+
+
+class _RangeExtreme:
+    """
+    O(1) min (or max) of values[l:r] for many windows at once: in-block
+    prefix/suffix scans plus a sparse table over block extremes. Building is
+    O(n log n / _BLOCK); a window inside one block is reduced directly.
+    """
+
+    def __init__(self, values, op, identity):
+        self.op, self.values, self.identity = op, values, identity
+        n = len(values)
+        nb = -(-n // _BLOCK)
+        blocks = np.full(nb * _BLOCK, identity)
+        blocks[:n] = values
+        blocks = blocks.reshape(nb, _BLOCK)
+        self.prefix = op.accumulate(blocks, axis=1).ravel()
+        self.suffix = op.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+        levels = [op.reduce(blocks, axis=1)]
+        while (1 << len(levels)) <= nb:
+            prev, half = levels[-1], 1 << (len(levels) - 1)
+            nxt = np.full(nb, identity)
+            nxt[:nb - half] = op(prev[:nb - half], prev[half:])
+            levels.append(nxt)
+        self.sparse = np.vstack(levels)
+
+    def query(self, start, end):
+        """Extreme of values[start:end] per window; windows must be non-empty."""
+        last = end - 1
+        bl, br = start // _BLOCK, last // _BLOCK
+        out = self.op(self.suffix[start], self.prefix[last])
+
+        lo, hi = bl + 1, br - 1
+        mid = hi >= lo
+        if mid.any():
+            span = hi[mid] - lo[mid] + 1
+            k = np.floor(np.log2(span)).astype(np.intp)
+            out[mid] = self.op(out[mid], self.op(self.sparse[k, lo[mid]], self.sparse[k, hi[mid] - (1 << k) + 1]))
+
+        same = bl == br
+        if same.any():
+            # Short windows: gather up to _BLOCK items each, padding past `end` with the identity
+            idx = start[same][:, None] + np.arange(_BLOCK)
+            window = np.where(idx < end[same][:, None], self.values[np.minimum(idx, len(self.values) - 1)], self.identity)
+            out[same] = self.op.reduce(window, axis=1)
+        return out
+
+
+def _window_extremes(lows, highs, start, end):
+    """min/max of prices[start:end] for many (possibly overlapping) windows; empty windows get NaN."""
+    mins = np.full(len(start), np.nan)
+    maxs = np.full(len(start), np.nan)
+    ok = end > start
+    if ok.any():
+        mins[ok] = lows.query(start[ok], end[ok])
+        maxs[ok] = highs.query(start[ok], end[ok])
+    return mins, maxs
+
+
+def label_contacts(t, level, side, times, prices, horizons=HORIZONS, tol=LEVEL_TOL):
+    """
+    Forward outcomes for contacts at epoch times `t` on `level`. side is +1 when
+    price came down onto the level (support test), -1 when it came up into it.
+    Returns {column: array}; outcomes are NaN where history doesn't cover t + h.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    level = np.asarray(level, dtype=np.float64)
+    side = np.asarray(side, dtype=np.float64)
+    out = {"entry_price": np.full(len(t), np.nan)}
+    if not len(times) or not len(t):
+        for name in horizons:
+            for col in ("fwd_ret", "level_hold", "level_break"):
+                out[f"{col}_{name}"] = np.full(len(t), np.nan)
+        return out
+
+    i0 = np.searchsorted(times, t, side="right") - 1
+    has_entry = i0 >= 0
+    i0 = np.clip(i0, 0, len(times) - 1)
+    p0 = prices[i0]
+    out["entry_price"] = np.where(has_entry, p0, np.nan)
+    lows = _RangeExtreme(prices, np.minimum, np.inf)
+    highs = _RangeExtreme(prices, np.maximum, -np.inf)
+
+    for name, seconds in horizons.items():
+        i1 = np.searchsorted(times, t + seconds, side="right") - 1
+        covered = has_entry & (times[-1] >= t + seconds)
+        i1 = np.clip(i1, 0, len(times) - 1)
+        p1 = prices[i1]
+
+        start, end = i0 + 1, np.maximum(i1 + 1, i0 + 1)
+        mins, maxs = _window_extremes(lows, highs, start, end)
+        empty = end <= start
+        mins, maxs = np.where(empty, p1, mins), np.where(empty, p1, maxs)
+
+        # How far price went through the level on the far side of the approach
+        penetration = np.where(side > 0, level - mins, maxs - level)
+        closed_through = np.where(side > 0, level - p1, p1 - level)
+
+        out[f"fwd_ret_{name}"] = np.where(covered, (p1 - p0) / p0, np.nan)
+        out[f"level_hold_{name}"] = np.where(covered, (penetration <= tol).astype(float), np.nan)
+        out[f"level_break_{name}"] = np.where(covered, (closed_through > tol).astype(float), np.nan)
+    return out
+
+
+def _entry_prices(t, times, prices):
+    """Last price at or before each t (NaN before the history starts)."""
+    if not len(times):
+        return np.full(len(t), np.nan)
+    i0 = np.searchsorted(times, np.asarray(t, dtype=np.float64), side="right") - 1
+    return np.where(i0 >= 0, prices[np.clip(i0, 0, None)], np.nan)
+
+
+def _sides(direction, entry_price, level):
+    approach = pd.Series(direction, dtype=object).astype(str).str.lower().map(_APPROACH)
+    inferred = np.where(np.asarray(entry_price) >= np.asarray(level), 1.0, -1.0)
+    return np.where(approach == "Downward", 1.0, np.where(approach == "Upward", -1.0, inferred))
+
+
+def _attach_following(contacts, events, time_col, columns, utc=False, window=JOIN_WINDOW_SEC):
+    """For each contact, the first event of the same symbol within `window` seconds after it."""
+    result = {col: np.full(len(contacts), np.nan, dtype=object) for col in columns}
+    result["matched"] = np.zeros(len(contacts), dtype=bool)
+    if events.empty or time_col not in events:
+        return result
+    events = events.assign(_t=to_epoch(events[time_col], utc=utc)).dropna(subset=["_t"])
+    for symbol, group in events.groupby(events["symbol"].astype(str).str.upper()):
+        group = group.sort_values("_t", kind="stable")
+        rows = np.flatnonzero(contacts["symbol"].astype(str).str.upper().to_numpy() == symbol)
+        if not len(rows):
+            continue
+        et = group["_t"].to_numpy()
+        j = np.searchsorted(et, contacts["t"].to_numpy()[rows], side="left")
+        ok = j < len(et)
+        ok[ok] = et[j[ok]] - contacts["t"].to_numpy()[rows[ok]] <= window
+        for col in columns:
+            if col in group:
+                result[col][rows[ok]] = group[col].to_numpy()[j[ok]]
+        result["matched"][rows[ok]] = True
+    return result
+
+
+# ---------- features ----------
+
+def one_hot_features(contacts):
+    """The model's one-hot layout (FEATURE_COLUMNS) for a contacts DataFrame with t set."""
+    X = pd.DataFrame(0, index=contacts.index, columns=FEATURE_COLUMNS, dtype=np.int64)
+    X["contact_order"] = pd.to_numeric(contacts["contact_order"], errors="coerce").fillna(1).astype(np.int64)
+
+    level_type = (contacts["level_color"].astype(str).str.capitalize()
+                  + contacts["level_type"].astype(str).str.capitalize()).to_numpy()
+    approach = contacts["direction"].astype(str).str.lower().map(_APPROACH)
+    approach = np.where(approach.isna(), np.where(contacts["side"] > 0, "Downward", "Upward"), approach)
+    reaction = contacts["reaction"].astype(str).str.lower().map(_REACTION).to_numpy()
+
+    # Session blocks on the wall clock the engine logged in
+    clock = pd.to_datetime(contacts["timestamp"], errors="coerce", format="mixed")
+    mins = (clock.dt.hour * 60 + clock.dt.minute).to_numpy(dtype=np.float64)
+    tod = np.where(mins < 11 * 60 + 30, "Morning", np.where(mins < 14 * 60, "Midday", "Afternoon"))
+
+    for prefix, values in (("level_type", level_type), ("approach_direction", approach),
+                           ("reaction_type", reaction), ("time_of_day", tod)):
+        for col in FEATURE_COLUMNS:
+            if col.startswith(prefix + "_"):
+                X[col] = (values == col[len(prefix) + 1:]).astype(np.int64)
+    return X
+
+
+# ---------- pipeline ----------
+
+def build_dataset(since=None, until=None, prices_path=None, db_path=None, horizons=HORIZONS, tol=LEVEL_TOL):
+    """Every contact with features, forward outcomes and the recommendation/trade that followed it."""
+    migrate.migrate(db_path)
+    contacts = load_contacts(since, until, db_path).dropna(subset=["t", "level"]).reset_index(drop=True)
+    frames = []
+    for symbol, group in contacts.groupby(contacts["symbol"].astype(str).str.upper()):
+        times, prices = load_price_history(prices_path, symbol)
+        group = group.copy()
+        group["side"] = _sides(group["direction"], _entry_prices(group["t"], times, prices), group["level"])
+        labels = label_contacts(group["t"], group["level"], group["side"], times, prices, horizons, tol)
+        frames.append(group.assign(**labels))
+    if not frames:
+        return pd.DataFrame(columns=list(contacts.columns) + FEATURE_COLUMNS)
+    dataset = pd.concat(frames).sort_values("t", kind="stable").reset_index(drop=True)
+
+    recs = _attach_following(dataset, pd.DataFrame(query_rows("trade_recommendations", since, until, db_path=db_path)),
+                             "timestamp", ["direction"])
+    dataset["recommended"] = recs["matched"]
+    dataset["recommended_direction"] = recs["direction"]
+    trades = _attach_following(dataset, _events("SELECT entry_time, symbol, direction, pnl FROM trades", db_path),
+                               "entry_time", ["direction", "pnl"])
+    dataset["traded"] = trades["matched"]
+    dataset["trade_pnl"] = pd.to_numeric(pd.Series(trades["pnl"]), errors="coerce").to_numpy()
+
+    features = one_hot_features(dataset)
+    return pd.concat([dataset.drop(columns=["contact_order"]), features], axis=1)
+
+
+def training_frame(dataset, target=LABEL_TARGET, horizon=LABEL_HORIZON):
+    """FEATURE_COLUMNS + label (0/1) for rows whose outcome is known."""
+    column = f"{target}_{horizon}"
+    known = dataset[column].notna() if column in dataset else pd.Series(False, index=dataset.index)
+    frame = dataset.loc[known, FEATURE_COLUMNS].copy()
+    frame["label"] = dataset.loc[known, column].astype(int)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build labeled training data from recorded contacts")
+    parser.add_argument("--since", default=None)
+    parser.add_argument("--until", default=None)
+    parser.add_argument("--prices", default=None, help="CSV/Parquet tick or bar history (default: bar rings)")
+    parser.add_argument("--out", default=os.path.join("app", "backend", "training_data.built.csv"))
+    parser.add_argument("--full", default=None, help="also write every column (.csv or .parquet)")
+    parser.add_argument("--force", action="store_true", help="replace --out / --full if they exist")
+    parser.add_argument("--target", default=LABEL_TARGET, choices=["level_hold", "level_break"])
+    parser.add_argument("--horizon", default=LABEL_HORIZON, choices=list(HORIZONS))
+    args = parser.parse_args()
+    existing = [p for p in (args.out, args.full) if p and os.path.exists(p)]
+    if existing and not args.force:
+        parser.error(f"{', '.join(existing)} already exists; pass --force to replace it")
+
+    started = time.perf_counter()
+    dataset = build_dataset(args.since, args.until, args.prices)
+    frame = training_frame(dataset, args.target, args.horizon)
+    frame.to_csv(args.out, index=False)
+    if args.full:
+        dataset.to_parquet(args.full) if args.full.endswith(".parquet") else dataset.to_csv(args.full, index=False)
+    print(f"🧪 {len(dataset)} contacts, {len(frame)} labeled rows → {args.out} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# db_writer.py — write-behind SQLite writer for engine logging
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+import storage
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """
+    Background writer that batches INSERT/UPDATE statements off the engine thread.
+
+    Callers `submit(sql, params)` into a bounded queue and return immediately.
+    A single writer thread drains the queue and commits everything it collected
+    in one transaction, either when `batch_size` rows are waiting or when
+    `flush_interval` seconds have passed since the first pending row.
+    Rows are applied in submission order, so an UPDATE always sees the INSERT
+    that was queued before it.
+    """
+
+    def __init__(self, db_path=None, max_queue=10000, batch_size=200,
+                 flush_interval=0.5, put_timeout=1.0):
+        self.db_path = db_path or storage.DB_PATH
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+            "last_batch": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "last_error": None,
+        }
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout=5.0):
+        """Flush whatever is queued and stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # ---------- producer side ----------
+
+    def submit(self, sql, params=()):
+        """
+        Queue one statement. Returns False (and counts a drop) only if the queue
+        stays full for `put_timeout` seconds.
+        """
+        try:
+            self._queue.put((sql, tuple(params)), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            print(f"⚠️ DB writer queue full ({self._queue.maxsize}); dropped write")
+            return False
+
+    def flush(self):
+        """Block until every row submitted so far has been committed."""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+        out["queue_depth"] = self._queue.qsize()
+        out["queue_capacity"] = self._queue.maxsize
+        return out
+
+    # ---------- writer thread ----------
+
+    def _connect(self):
+        # Dedicated connection owned by the writer thread, same pragmas as storage.get_connection
+        return storage.connect(self.db_path)
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    self._queue.task_done()
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(conn, batch)
+                for _ in batch:
+                    self._queue.task_done()
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        started = time.perf_counter()
+        failed = 0
+        try:
+            with conn:
+                for sql, params in batch:
+                    conn.execute(sql, params)
+        except sqlite3.Error as e:
+            # Retry row by row so one bad statement doesn't lose the whole batch
+            failed = self._write_rows(conn, batch, e)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self._stats["written"] += len(batch) - failed
+            self._stats["failed"] += failed
+            self._stats["flushes"] += 1
+            self._stats["last_batch"] = len(batch)
+            self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+            self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed_ms), 3)
+
+    def _write_rows(self, conn, batch, batch_error):
+        failed = 0
+        for sql, params in batch:
+            try:
+                with conn:
+                    conn.execute(sql, params)
+            except sqlite3.Error as e:
+                failed += 1
+                with self._lock:
+                    self._stats["last_error"] = str(e)
+                print("⚠️ DB writer failed row:", e)
+        if failed == 0:
+            with self._lock:
+                self._stats["last_error"] = str(batch_error)
+        return failed
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path=None):
+    """Shared, started writer for `db_path`; flushed automatically at interpreter exit."""
+    db_path = db_path or storage.DB_PATH
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = WriteBehindWriter(db_path).start()
+            _writers[db_path] = writer
+            atexit.register(writer.close)
+        return writer
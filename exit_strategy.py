@@ -1,5 +1,4 @@
-import sqlite3
-import requests  # ✅ Added
+from heartbeat import heartbeat
 from datetime import datetime
 from pattern_memory_engine import get_pattern_id
 
@@ -8,17 +7,18 @@ class ExitStrategy:
     def __init__(self):
         self.max_loss_pct = 0.30  # 30% default max loss before forced exit
 
-    def evaluate_exit_conditions(self, portfolio, current_price, timestamp):
+    def evaluate_exit_conditions(self, portfolio, current_price, timestamp, snapshot=None):
         """
         Loop through all open positions and decide whether to exit.
         Returns a list of exits with reasons.
         """
         exits = []
+        levels = snapshot.levels if snapshot is not None else ()
 
         for trade in portfolio.open_positions:
             entry_price = trade["entry_price"]
             direction = trade["direction"]
-            contract = trade["contract"]
+            contract = trade.get("contract")
             size = trade.get("quantity", 1)
             pattern_id = trade.get("pattern_id", None)
 
@@ -33,6 +33,7 @@ class ExitStrategy:
             # Rule: Max Loss Exceeded
             if pct_change <= -self.max_loss_pct:
                 exits.append({
+                    "trade_id": trade.get("id"),
                     "symbol": trade["symbol"],
                     "contract": contract,
                     "exit_price": current_price,
@@ -46,8 +47,9 @@ class ExitStrategy:
                 continue
 
             # Rule: Reaction at key level (basic placeholder for now)
-            if self.level_reaction_detected(current_price):
+            if self.level_reaction_detected(current_price, levels):
                 exits.append({
+                    "trade_id": trade.get("id"),
                     "symbol": trade["symbol"],
                     "contract": contract,
                     "exit_price": current_price,
@@ -60,14 +62,11 @@ class ExitStrategy:
                 })
 
         # ✅ Pulse after evaluation
-        try:
-            requests.post("http://127.0.0.1:5000/ping", json={"module": "exit_strategy"})
-        except:
-            pass
+        heartbeat.beat("exit_strategy")
 
         return exits
 
-    def level_reaction_detected(self, price):
+    def level_reaction_detected(self, price, levels=()):
         # Placeholder for now — return False to avoid dummy exits
         # You can plug in real logic here later based on Contact Event Evaluator
         return False
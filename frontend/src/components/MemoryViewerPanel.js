@@ -18,12 +18,32 @@ const MemoryViewerPanel = () => {
     "pattern_evolution"
   ];
 
+  const [nextBeforeId, setNextBeforeId] = useState(null);
+
+  // /view_memory streams NDJSON: one row per line, then a {"_meta": {...}} line
+  const loadPage = (beforeId) => {
+    const params = beforeId ? `?before_id=${beforeId}` : "";
+    return fetch(`http://127.0.0.1:5000/view_memory/${selectedTable}${params}`)
+      .then((res) => res.text())
+      .then((text) => {
+        const rows = [];
+        let meta = {};
+        text.split("\n").forEach((line) => {
+          if (!line) return;
+          const obj = JSON.parse(line);
+          if (obj._meta) meta = obj._meta;
+          else if (obj._error || obj.error) console.error("Memory viewer:", obj._error || obj.error);
+          else rows.push(obj);
+        });
+        setNextBeforeId(meta.next_before_id || null);
+        return rows;
+      });
+  };
+
   useEffect(() => {
-    fetch(`http://127.0.0.1:5000/view_memory/${selectedTable}`)
-      .then((res) => res.json())
-      .then((result) => {
-        const rows = result.rows || result.data || [];
-        if (result.success && rows.length > 0) {
+    loadPage(null)
+      .then((rows) => {
+        if (rows.length > 0) {
           setData(rows);
           setColumns(Object.keys(rows[0]));
         } else {
@@ -36,8 +56,15 @@ const MemoryViewerPanel = () => {
         setData([]);
         setColumns([]);
       });
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [selectedTable]);
 
+  const loadOlder = () => {
+    loadPage(nextBeforeId)
+      .then((rows) => setData((prev) => prev.concat(rows)))
+      .catch((error) => console.error("Fetch error:", error));
+  };
+
   return (
     <div className="memory-viewer-panel">
       <h2 className="section-title">🧠 Q Memory Viewer</h2>
@@ -78,6 +105,9 @@ const MemoryViewerPanel = () => {
         ) : (
           <p>No data available.</p>
         )}
+        {nextBeforeId && (
+          <button onClick={loadOlder}>Load older rows</button>
+        )}
       </div>
     </div>
   );
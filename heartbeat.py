@@ -0,0 +1,137 @@
+# heartbeat.py — in-process module heartbeats, shipped to the API over local UDP
+
+import json
+import os
+import socket
+import threading
+import time
+
+HEARTBEAT_HOST = os.environ.get("Q_HEARTBEAT_HOST", "127.0.0.1")
+HEARTBEAT_PORT = int(os.environ.get("Q_HEARTBEAT_PORT", "5055"))
+# How often the publisher sends the counters to the API process (seconds)
+PUBLISH_SEC = float(os.environ.get("Q_HEARTBEAT_SEC", "1.0"))
+
+
+def normalize_module(name):
+    """'ml engine' / 'price-feed' → 'ml_engine' / 'price_feed' (diagnostic_monitor keys)."""
+    return str(name).strip().lower().replace(" ", "_").replace("-", "_")
+
+
+class HeartbeatBus:
+    """
+    Per-process heartbeat counters.
+
+    `beat()` only updates a dict entry, so it is safe on the hot path. A
+    daemon thread publishes the counters as one UDP datagram every
+    PUBLISH_SEC; the send is non-blocking and silently dropped when the API
+    is not listening.
+    """
+
+    def __init__(self, host=HEARTBEAT_HOST, port=HEARTBEAT_PORT, interval=PUBLISH_SEC):
+        self.addr = (host, port)
+        self.interval = interval
+        self._beats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._sock = None
+
+    def beat(self, module, detail=""):
+        self._record(module, detail, None)
+
+    def error(self, module, message):
+        """Report a failure; the API marks the module inactive until its next beat."""
+        self._record(module, "", str(message))
+
+    def _record(self, module, detail, error):
+        name = normalize_module(module)
+        now = time.time()
+        with self._lock:
+            entry = self._beats.get(name)
+            if entry is None:
+                entry = self._beats[name] = {"count": 0, "last": now, "detail": detail, "error": error}
+            if error is None:
+                entry["count"] += 1
+                entry["detail"] = detail
+            entry["last"] = now
+            entry["error"] = error
+        if self._thread is None:
+            self.start()
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._beats.items()}
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+            self._thread = threading.Thread(target=self._run, name="heartbeat-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def publish(self):
+        payload = json.dumps({"pid": os.getpid(), "beats": self.snapshot()}).encode("utf-8")
+        try:
+            self._sock.sendto(payload, self.addr)
+        except OSError:
+            pass  # API down or buffer full — next cycle resends the totals
+
+    def _run(self):
+        while True:
+            self.publish()
+            time.sleep(self.interval)
+
+
+class HeartbeatListener:
+    """
+    API-side receiver: applies published heartbeats to a QDiagnosticMonitor.
+    A module is pinged (or its error reported) once per datagram in which
+    its last-event time moved.
+    """
+
+    def __init__(self, monitor, host=HEARTBEAT_HOST, port=HEARTBEAT_PORT):
+        self.monitor = monitor
+        self.addr = (host, port)
+        self._seen = {}
+        self._thread = None
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(self.addr)
+        self._thread = threading.Thread(target=self._run, args=(sock,), name="heartbeat-listener", daemon=True)
+        self._thread.start()
+        return self
+
+    def handle(self, data):
+        try:
+            message = json.loads(data.decode("utf-8"))
+        except ValueError:
+            return
+        pid = message.get("pid")
+        for name, entry in (message.get("beats") or {}).items():
+            key = (pid, name)
+            last = entry.get("last")
+            # count/error disambiguate events inside one clock tick (coarse on Windows)
+            mark = (last, entry.get("count"), entry.get("error"))
+            if last is None or self._seen.get(key) == mark:
+                continue
+            self._seen[key] = mark
+            if entry.get("error"):
+                self.monitor.report_error(name, entry["error"])
+            else:
+                self.monitor.ping(name)
+
+    def _run(self, sock):
+        while True:
+            try:
+                data, _ = sock.recvfrom(65535)
+            except OSError:
+                time.sleep(0.5)
+                continue
+            self.handle(data)
+
+
+# Shared bus for this process
+heartbeat = HeartbeatBus()
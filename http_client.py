@@ -0,0 +1,149 @@
+# http_client.py — shared, pooled HTTP client for Polygon REST calls
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POLYGON_BASE_URL = os.environ.get("POLYGON_BASE_URL", "https://api.polygon.io")
+CONNECT_TIMEOUT = float(os.environ.get("Q_HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("Q_HTTP_READ_TIMEOUT", "5"))
+MAX_RETRIES = int(os.environ.get("Q_HTTP_RETRIES", "2"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds) with error counts."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.errors = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms, error=False):
+        i = 0
+        while i < len(self.buckets) and ms > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        if error:
+            self.errors += 1
+
+    def quantile(self, q):
+        """Upper bucket bound containing quantile q (None if empty)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound if bound != float("inf") else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def snapshot(self):
+        labels = [f"le_{b}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.sum_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PolygonClient:
+    """
+    One keep-alive requests.Session shared by every Polygon call.
+
+    - pooled connections (no TCP+TLS handshake per call)
+    - (connect, read) timeouts on every request, so a stalled socket can't
+      freeze the engine
+    - retries on connection errors / timeouts / 429 / 5xx with jittered
+      exponential backoff
+    - a latency histogram per endpoint label (path template, no API key)
+    """
+
+    def __init__(self, base_url=None, timeout=None, retries=MAX_RETRIES,
+                 backoff_base=0.2, backoff_cap=2.0, pool_size=10):
+        self.base_url = (base_url or POLYGON_BASE_URL).rstrip("/")
+        self.timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, endpoint, ms, error):
+        with self._lock:
+            hist = self._histograms.get(endpoint)
+            if hist is None:
+                hist = self._histograms[endpoint] = LatencyHistogram()
+            hist.observe(ms, error)
+
+    def _backoff(self, attempt):
+        # "Full jitter": sleep a random amount up to the capped exponential step
+        time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt))))
+
+    def get(self, path, params=None, endpoint=None):
+        """
+        GET base_url + path. Returns the final Response (which may still be an
+        HTTP error status); raises the last transport error if every attempt failed.
+        `endpoint` labels the latency metrics — pass the path template.
+        """
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        endpoint = endpoint or path
+
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._observe(endpoint, (time.perf_counter() - started) * 1000.0, True)
+                if attempt >= self.retries:
+                    raise
+                self._backoff(attempt)
+                continue
+
+            self._observe(endpoint, (time.perf_counter() - started) * 1000.0, resp.status_code >= 400)
+            if resp.status_code in RETRY_STATUSES and attempt < self.retries:
+                resp.close()
+                self._backoff(attempt)
+                continue
+            return resp
+
+    def get_json(self, path, params=None, endpoint=None):
+        """GET and decode JSON, raising requests.HTTPError on a non-2xx final status."""
+        resp = self.get(path, params=params, endpoint=endpoint)
+        resp.raise_for_status()
+        return resp.json()
+
+    def latency_stats(self):
+        with self._lock:
+            return {endpoint: hist.snapshot() for endpoint, hist in self._histograms.items()}
+
+    def close(self):
+        self.session.close()
+
+
+# Shared client for this process
+polygon_client = PolygonClient()
@@ -1,11 +1,9 @@
-import sqlite3
+from storage import DB_PATH, connect
 from datetime import datetime, timedelta
 
-# Adjust this if your database file has a different name
-DB_PATH = "qmmx.db"
 
 def get_tables_and_counts(db_path):
-    with sqlite3.connect(db_path) as conn:
+    with connect(db_path) as conn:
         cur = conn.cursor()
         # Get all tables
         cur.execute("SELECT name FROM sqlite_master WHERE type='table';")
@@ -1,22 +1,54 @@
 # level_loader.py
 
+import os
 import sqlite3
+import threading
+import time
+from types import MappingProxyType
 
-DB_PATH = "qmmx.db"
+from level_index import LevelIndex
+from storage import DB_PATH, get_connection
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    return conn
+# /submit_levels bumps this counter in qmmx_meta; readers only re-run the
+# price_levels SELECT when it changes.
+LEVELS_VERSION_KEY = "levels_version"
+# Minimum seconds between version checks (one single-row read) per process
+VERSION_CHECK_SEC = float(os.environ.get("Q_LEVELS_CHECK_SEC", "0.5"))
 
-def load_levels():
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT color, level_type, price
-            FROM price_levels
-        """)
-        rows = cursor.fetchall()
+_UNLOADED = object()
+_cache = {"version": _UNLOADED, "checked_at": 0.0, "levels": (), "index": LevelIndex()}
+_cache_lock = threading.Lock()
+
+def get_levels_version(conn):
+    try:
+        row = conn.execute("SELECT value FROM qmmx_meta WHERE key = ?", (LEVELS_VERSION_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        return None  # pre-migration DB without qmmx_meta
+    return int(row[0]) if row else 0
+
+def bump_levels_version(conn):
+    """
+    Increment the level-set version. Call inside the same transaction that
+    rewrites price_levels so readers never see new levels with an old version.
+    """
+    conn.execute("""
+        INSERT INTO qmmx_meta (key, value) VALUES (?, '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    """, (LEVELS_VERSION_KEY,))
+    invalidate_levels()
+
+def invalidate_levels():
+    """Force the next load to re-check the version immediately."""
+    with _cache_lock:
+        _cache["checked_at"] = 0.0
+
+def _read_levels(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT color, level_type, price
+        FROM price_levels
+    """)
+    rows = cursor.fetchall()
 
     levels = []
     for row in rows:
@@ -29,4 +61,27 @@ def load_levels():
 
     return levels
 
+def load_level_set():
+    """
+    Returns (levels, index): an immutable tuple of level mappings and its
+    LevelIndex, reloaded from the DB only when the levels version changes.
+    """
+    with _cache_lock:
+        now = time.monotonic()
+        if _cache["version"] is not _UNLOADED and now - _cache["checked_at"] < VERSION_CHECK_SEC:
+            return _cache["levels"], _cache["index"]
+
+        conn = get_connection()
+        version = get_levels_version(conn)
+        if version != _cache["version"] or version is None:
+            levels = tuple(MappingProxyType(lvl) for lvl in _read_levels(conn))
+            _cache["levels"] = levels
+            _cache["index"] = LevelIndex(levels)
+            _cache["version"] = version
+        _cache["checked_at"] = now
+        return _cache["levels"], _cache["index"]
+
+def load_levels(symbol=None):
+    return [dict(lvl) for lvl in load_level_set()[0]]
+
 get_today_levels = load_levels
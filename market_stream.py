@@ -0,0 +1,446 @@
+# market_stream.py — streaming market data (Polygon WebSocket) + local replay stand-in
+
+import base64
+import hashlib
+import json
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+from settings_manager import load_settings
+
+try:
+    import websocket  # websocket-client
+except ImportError:  # optional: only needed for Q_PRICE_SOURCE=stream
+    websocket = None
+
+POLYGON_WS_URL = os.environ.get("POLYGON_WS_URL", "wss://socket.polygon.io/stocks")
+TICK_BUFFER_SIZE = int(os.environ.get("Q_TICK_BUFFER_SIZE", "10000"))
+# Seconds of socket silence before the stream pings; a second silent period counts as a disconnect
+STREAM_READ_TIMEOUT = float(os.environ.get("Q_STREAM_READ_TIMEOUT_SEC", "10"))
+# How often the record_path JSONL file is flushed (seconds)
+RECORD_FLUSH_SEC = 1.0
+
+
+# ---------- tick buffer ----------
+
+class TickBuffer:
+    """
+    Bounded per-symbol tick history plus the latest tick per symbol.
+    Subscribers registered with `subscribe()` are called for every appended tick
+    (the engine uses this to publish onto its TickBus). Each tick is stamped
+    with `received` (local epoch seconds) for staleness checks.
+    """
+
+    def __init__(self, capacity=TICK_BUFFER_SIZE):
+        self.capacity = capacity
+        self._ticks = {}
+        self._latest = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def append(self, tick):
+        tick.setdefault("received", time.time())
+        symbol = tick["symbol"]
+        with self._lock:
+            history = self._ticks.get(symbol)
+            if history is None:
+                history = self._ticks[symbol] = deque(maxlen=self.capacity)
+            history.append(tick)
+            self._latest[symbol] = tick
+        for callback in self._subscribers:
+            try:
+                callback(tick)
+            except Exception as e:
+                print("⚠️ Tick subscriber failed:", e)
+
+    def latest(self, symbol):
+        with self._lock:
+            return self._latest.get(symbol)
+
+    def last_timestamp(self, symbol):
+        tick = self.latest(symbol)
+        return tick["timestamp"] if tick else None
+
+    def since(self, symbol, timestamp):
+        with self._lock:
+            return [t for t in self._ticks.get(symbol, ()) if t["timestamp"] > timestamp]
+
+
+def parse_events(events):
+    """
+    Convert a decoded Polygon stream message (list of events) into ticks.
+    T = trade, Q = quote (mid price), A/AM = second/minute aggregate.
+    Timestamps are converted from ms to epoch seconds.
+    """
+    ticks = []
+    for ev in events:
+        kind = ev.get("ev")
+        if kind == "T":
+            ticks.append({"symbol": ev["sym"], "price": ev["p"], "volume": ev.get("s", 0),
+                          "timestamp": ev["t"] / 1000.0, "kind": "T"})
+        elif kind == "Q":
+            bid, ask = ev.get("bp"), ev.get("ap")
+            if bid and ask:
+                ticks.append({"symbol": ev["sym"], "price": round((bid + ask) / 2, 4), "volume": 0,
+                              "timestamp": ev["t"] / 1000.0, "kind": "Q"})
+        elif kind in ("A", "AM"):
+            ticks.append({"symbol": ev["sym"], "price": ev["c"], "volume": ev.get("v", 0),
+                          "timestamp": ev.get("e", ev.get("s")) / 1000.0, "kind": kind})
+    return ticks
+
+
+def fetch_second_bars(symbol, start_ts, end_ts):
+    """REST gap-fill: 1-second aggregates between two epoch-second timestamps."""
+    from http_client import polygon_client
+
+    api_key = load_settings().get("polygon_api_key", "")
+    bars = polygon_client.get_json(
+        f"/v2/aggs/ticker/{symbol}/range/1/second/{int(start_ts * 1000)}/{int(end_ts * 1000)}",
+        params={"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": api_key},
+        endpoint="/v2/aggs/ticker/{symbol}/range/1/second",
+    ).get("results", [])
+    return [{"ev": "A", "sym": symbol, "c": b["c"], "v": b.get("v", 0), "s": b["t"], "e": b["t"] + 1000}
+            for b in bars]
+
+
+# ---------- WebSocket consumer ----------
+
+class PolygonStream:
+    """
+    Consumes trades/quotes/second aggregates for `symbols` into a TickBuffer.
+
+    Reconnects with jittered backoff; after a reconnect it gap-fills each
+    symbol from its last buffered tick up to now via `backfill` (REST second
+    aggregates by default). A socket silent for `read_timeout` seconds is
+    pinged, and one still silent after another `read_timeout` is treated as
+    disconnected, so a half-open connection can't freeze the feed. With
+    `record_path` every raw event is also appended to a JSONL file that
+    ReplayServer can serve later.
+    """
+
+    def __init__(self, buffer, symbols=("SPY",), url=None, api_key=None, channels=("T", "Q", "A"),
+                 backfill=fetch_second_bars, record_path=None, max_backoff=30.0,
+                 read_timeout=STREAM_READ_TIMEOUT):
+        self.buffer = buffer
+        self.symbols = list(symbols)
+        self.url = url or POLYGON_WS_URL
+        self.api_key = api_key
+        self.channels = channels
+        self.backfill = backfill
+        self.record_path = record_path
+        self.max_backoff = max_backoff
+        self.read_timeout = read_timeout
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self._stop = threading.Event()
+        self._ws = None
+        self._thread = None
+        self._record = None
+        self._flushed_at = 0.0
+        # Trades and second aggregates report the same volume: bars sum one kind only
+        self.volume_kind = next((k for k in ("T", "A", "AM") if k in channels), None)
+
+    def start(self):
+        if websocket is None:
+            raise RuntimeError("Streaming mode needs the 'websocket-client' package (pip install websocket-client)")
+        self._thread = threading.Thread(target=self._run, name="polygon-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                self._session(gap_fill=self.reconnects > 0)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                print("⚠️ Market stream disconnected:", e)
+            if self.connected.is_set():
+                attempt = 0  # the session got through; restart the backoff
+            self.connected.clear()
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            attempt += 1
+            self._stop.wait(random.uniform(0, min(self.max_backoff, 0.5 * (2 ** attempt))))
+
+    def _session(self, gap_fill):
+        api_key = self.api_key or load_settings().get("polygon_api_key", "")
+        self._ws = ws = websocket.create_connection(self.url, timeout=10)
+        try:
+            if self.record_path:
+                self._record = open(self.record_path, "a", encoding="utf-8")
+            ws.send(json.dumps({"action": "auth", "params": api_key}))
+            params = ",".join(f"{ch}.{sym}" for sym in self.symbols for ch in self.channels)
+            ws.send(json.dumps({"action": "subscribe", "params": params}))
+            ws.settimeout(self.read_timeout)
+            self.connected.set()
+
+            if gap_fill:
+                self._gap_fill()
+
+            pinged = False
+            while not self._stop.is_set():
+                try:
+                    opcode, raw = ws.recv_data(control_frame=True)
+                except websocket.WebSocketTimeoutException:
+                    if pinged:
+                        raise ConnectionError(f"stream stalled ({2 * self.read_timeout:.0f}s without data)")
+                    ws.ping()
+                    pinged = True
+                    continue
+                pinged = False  # any frame, pong included, proves the connection is alive
+                if opcode == websocket.ABNF.OPCODE_CLOSE:
+                    raise ConnectionError("stream closed")
+                if opcode in (websocket.ABNF.OPCODE_TEXT, websocket.ABNF.OPCODE_BINARY):
+                    if not raw:
+                        raise ConnectionError("stream closed")
+                    self._handle(json.loads(raw))
+        finally:
+            self._ws = None
+            if self._record is not None:
+                self._record.close()
+                self._record = None
+            ws.close()
+
+    def _handle(self, events):
+        if isinstance(events, dict):
+            events = [events]
+        for ev in events:
+            if ev.get("ev") == "status" and ev.get("status") in ("auth_failed", "error"):
+                print("⚠️ Market stream status:", ev.get("message"))
+        if self._record is not None:
+            for ev in events:
+                if ev.get("ev") != "status":
+                    self._record.write(json.dumps(ev) + "\n")
+            now = time.monotonic()
+            if now - self._flushed_at >= RECORD_FLUSH_SEC:
+                self._record.flush()
+                self._flushed_at = now
+        for tick in parse_events(events):
+            self.buffer.append(tick)
+
+    def bar_volume(self, tick):
+        """
+        Volume `tick` adds to a chart bar: its size when it is of `volume_kind`
+        or a gap-fill bar (trades the stream missed), else 0, so subscribing
+        to T and A doesn't count every trade twice.
+        """
+        if tick.get("kind") == self.volume_kind or tick.get("backfill"):
+            return tick.get("volume")
+        return 0
+
+    def _gap_fill(self):
+        if self.backfill is None:
+            return
+        now = time.time()
+        for sym in self.symbols:
+            last = self.buffer.last_timestamp(sym)
+            if last is None or now - last < 1.0:
+                continue
+            try:
+                events = [ev for ev in self.backfill(sym, last, now) if ev.get("e", ev.get("t", 0)) / 1000.0 > last]
+                for tick in parse_events(events):
+                    tick["backfill"] = True
+                    self.buffer.append(tick)
+                print(f"🩹 Gap-filled {sym}: {len(events)} bars over {now - last:.1f}s")
+            except Exception as e:
+                print(f"⚠️ Gap-fill failed for {sym}:", e)
+
+
+# ---------- local replay stand-in ----------
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _ws_accept(conn):
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = conn.recv(4096)
+        if not chunk:
+            raise ConnectionError("handshake aborted")
+        data += chunk
+    headers = {}
+    for line in data.decode("latin-1").split("\r\n")[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + _WS_GUID).encode()).digest()).decode()
+    conn.sendall((
+        "HTTP/1.1 101 Switching Protocols\r\n"
+        "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+        f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+    ).encode())
+
+
+def _ws_send(conn, text, opcode=0x1):
+    payload = text.encode("utf-8") if isinstance(text, str) else text
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    conn.sendall(header + payload)
+
+
+def _recv_exact(conn, n):
+    data = b""
+    while len(data) < n:
+        chunk = conn.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("client closed")
+        data += chunk
+    return data
+
+
+def _ws_recv(conn):
+    """Read one client frame → (opcode, payload bytes). Client frames are always masked."""
+    b1, b2 = _recv_exact(conn, 2)
+    opcode, length = b1 & 0x0F, b2 & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", _recv_exact(conn, 2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", _recv_exact(conn, 8))[0]
+    mask = _recv_exact(conn, 4) if b2 & 0x80 else b"\0\0\0\0"
+    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(_recv_exact(conn, length)))
+    return opcode, payload
+
+
+def _event_time(ev):
+    """Event time in ms: trades/quotes carry `t`, aggregates are emitted at their end `e`."""
+    return ev.get("t", ev.get("e", ev.get("s", 0)))
+
+
+def load_recording(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayServer:
+    """
+    Offline stand-in for the Polygon stocks socket.
+
+    Speaks the same auth/subscribe protocol and replays recorded events (a
+    JSONL file written by PolygonStream(record_path=...)) to each client,
+    pacing them by their original timestamps divided by `speed`
+    (speed=0 sends as fast as possible).
+    """
+
+    def __init__(self, events, host="127.0.0.1", port=8765, speed=1.0, loop=False):
+        self.events = sorted(events, key=_event_time)
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.loop = loop
+        self._sock = None
+        self._stop = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self.port = self._sock.getsockname()[1]
+        self._sock.listen(8)
+        threading.Thread(target=self._accept_loop, name="replay-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            _ws_accept(conn)
+            _ws_send(conn, json.dumps([{"ev": "status", "status": "connected", "message": "Connected Successfully"}]))
+            symbols = self._handshake(conn)
+            self._replay(conn, symbols)
+            _ws_send(conn, b"", opcode=0x8)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _handshake(self, conn):
+        """Wait for auth + subscribe; returns the set of subscribed symbols ('*' = all)."""
+        while True:
+            opcode, payload = _ws_recv(conn)
+            if opcode == 0x8:
+                raise ConnectionError("client closed")
+            msg = json.loads(payload.decode("utf-8"))
+            if msg.get("action") == "auth":
+                _ws_send(conn, json.dumps([{"ev": "status", "status": "auth_success", "message": "authenticated"}]))
+            elif msg.get("action") == "subscribe":
+                params = [p.strip() for p in msg.get("params", "").split(",") if p.strip()]
+                _ws_send(conn, json.dumps([{"ev": "status", "status": "success", "message": f"subscribed to: {p}"}
+                                           for p in params]))
+                return {p.split(".", 1)[1] for p in params if "." in p}
+
+    def _replay(self, conn, symbols):
+        while not self._stop.is_set():
+            prev = None
+            for ev in self.events:
+                if "*" not in symbols and ev.get("sym") not in symbols:
+                    continue
+                ts = _event_time(ev)
+                if prev is not None and self.speed > 0:
+                    time.sleep(max(0.0, (ts - prev) / 1000.0 / self.speed))
+                prev = ts
+                _ws_send(conn, json.dumps([ev]))
+                if self._stop.is_set():
+                    return
+            if not self.loop:
+                return
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay recorded Polygon stream events over a local WebSocket")
+    parser.add_argument("recording", help="JSONL file of recorded events")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--loop", action="store_true")
+    args = parser.parse_args()
+
+    server = ReplayServer(load_recording(args.recording), port=args.port, speed=args.speed, loop=args.loop).start()
+    print(f"▶️ Replaying {len(server.events)} events on {server.url} (set POLYGON_WS_URL to this)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
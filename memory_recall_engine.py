@@ -1,13 +1,22 @@
+import os
 import sqlite3
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
 import pandas as pd
+import migrate
+import storage
+from db_writer import get_writer
 
-DB_PATH = "qmmx_memory.db"
+DB_PATH = storage.MEMORY_DB_PATH
+# Feedback rows the confidence penalty looks back over (newest first)
+FEEDBACK_WINDOW = int(os.environ.get("Q_FEEDBACK_WINDOW", "50"))
+# Seconds between polls for pattern_feedback rows written by other processes
+FEEDBACK_POLL_SEC = float(os.environ.get("Q_FEEDBACK_POLL_SEC", "5"))
 
 def get_connection():
-    conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    return conn
+    return storage.get_connection(DB_PATH)
 
 # 1. Recall pattern memory by ID
 def recall_pattern_memory(pattern_id: str):
@@ -44,3 +53,140 @@ def recall_recent_feedback(limit=50):
         rows = cursor.fetchall()
         df = pd.DataFrame(rows, columns=["pattern_id", "confidence", "outcome", "timestamp"])
         return df
+
+
+# One closed trade folded into patterns_memory: a delta, so concurrent writers add up
+TRADE_UPSERT_SQL = """
+    INSERT INTO patterns_memory (id, name, times_seen, times_successful, avg_confidence)
+    VALUES (?, ?, 1, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        times_seen = COALESCE(times_seen, 0) + 1,
+        times_successful = COALESCE(times_successful, 0) + excluded.times_successful,
+        avg_confidence = CASE WHEN excluded.avg_confidence IS NULL THEN avg_confidence
+            ELSE (COALESCE(avg_confidence, 0) * COALESCE(times_seen, 0) + excluded.avg_confidence)
+                 / (COALESCE(times_seen, 0) + 1) END
+"""
+
+
+def _feedback_kind(outcome):
+    # The review panel sends 'reject' / 'review_further'; older rows say 'Reject' / 'Review Further'
+    return str(outcome or "").strip().lower().replace(" ", "_")
+
+
+class PatternMemoryStats:
+    """
+    Per-pattern aggregates for confidence scoring, kept in memory.
+
+    patterns_memory and the newest FEEDBACK_WINDOW pattern_feedback rows are
+    read once. record_trade() folds a closed trade in and queues the same
+    delta as an upsert on the memory DB's db_writer; record_feedback() (the
+    review panel's decisions) appends a pattern_feedback row, and get()
+    polls pattern_feedback by rowid for rows this or other processes
+    appended. get() returns {times_seen, times_successful, avg_confidence,
+    rejects, reviews} without touching SQLite on the common path.
+    """
+
+    def __init__(self, db_path=None, window=FEEDBACK_WINDOW, poll_sec=FEEDBACK_POLL_SEC):
+        self.db_path = db_path or DB_PATH
+        self.poll_sec = poll_sec
+        self._lock = threading.Lock()
+        self._patterns = {}                      # pattern_id -> [seen, successful, avg_conf]
+        self._feedback = deque(maxlen=window)    # (pattern_id, kind), oldest first
+        self._counts = {}                        # (pattern_id, kind) -> rows in the window
+        self._last_rowid = 0
+        self._polled_at = 0.0
+        migrate.migrate_memory(self.db_path)
+        self._load()
+
+    def _conn(self):
+        return storage.get_connection(self.db_path)
+
+    def _load(self):
+        conn = self._conn()
+        try:
+            for pid, seen, successful, avg_conf in conn.execute(
+                    "SELECT id, times_seen, times_successful, avg_confidence FROM patterns_memory"):
+                self._patterns[pid] = [seen or 0, successful or 0, avg_conf or 0.0]
+        except sqlite3.OperationalError as e:
+            print("⚠️ patterns_memory unavailable:", e)
+        try:
+            rows = conn.execute("""
+                SELECT rowid, pattern_id, outcome FROM pattern_feedback
+                ORDER BY timestamp DESC LIMIT ?
+            """, (self._feedback.maxlen,)).fetchall()
+            for _, pattern_id, outcome in reversed(rows):
+                self._push_feedback(pattern_id, outcome)
+            self._last_rowid = conn.execute("SELECT MAX(rowid) FROM pattern_feedback").fetchone()[0] or 0
+        except sqlite3.OperationalError as e:
+            print("⚠️ pattern_feedback unavailable:", e)
+        self._polled_at = time.monotonic()
+
+    def _push_feedback(self, pattern_id, outcome):
+        if len(self._feedback) == self._feedback.maxlen:
+            evicted = self._feedback[0]
+            self._counts[evicted] -= 1
+            if not self._counts[evicted]:
+                del self._counts[evicted]
+        key = (pattern_id, _feedback_kind(outcome))
+        self._feedback.append(key)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def _poll_feedback(self):
+        self._polled_at = time.monotonic()
+        try:
+            rows = self._conn().execute("""
+                SELECT rowid, pattern_id, outcome FROM pattern_feedback
+                WHERE rowid > ? ORDER BY rowid
+            """, (self._last_rowid,)).fetchall()
+        except sqlite3.OperationalError:
+            return
+        with self._lock:
+            for rowid, pattern_id, outcome in rows:
+                self._push_feedback(pattern_id, outcome)
+                self._last_rowid = max(self._last_rowid, rowid)
+
+    def record_trade(self, pattern_id, was_successful, confidence=None):
+        """Fold one closed trade into the pattern's counters and persist the delta."""
+        with self._lock:
+            stats = self._patterns.setdefault(pattern_id, [0, 0, 0.0])
+            if confidence is not None:
+                stats[2] = (stats[2] * stats[0] + float(confidence)) / (stats[0] + 1)
+            stats[0] += 1
+            stats[1] += 1 if was_successful else 0
+        get_writer(self.db_path).submit(TRADE_UPSERT_SQL, (
+            pattern_id, pattern_id, 1 if was_successful else 0,
+            None if confidence is None else float(confidence)))
+
+    def record_feedback(self, pattern_id, outcome, confidence=None):
+        """Store one review decision and fold it (and any other new rows) into the window."""
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT INTO pattern_feedback (pattern_id, confidence, outcome, timestamp) VALUES (?, ?, ?, ?)",
+                         (pattern_id, confidence, _feedback_kind(outcome), datetime.utcnow().isoformat()))
+        self._poll_feedback()
+
+    def get(self, pattern_id):
+        if self.poll_sec is not None and time.monotonic() - self._polled_at >= self.poll_sec:
+            self._poll_feedback()
+        with self._lock:
+            seen, successful, avg_conf = self._patterns.get(pattern_id, (0, 0, 0.0))
+            return {
+                "times_seen": seen,
+                "times_successful": successful,
+                "avg_confidence": avg_conf,
+                "rejects": self._counts.get((pattern_id, "reject"), 0),
+                "reviews": self._counts.get((pattern_id, "review_further"), 0),
+            }
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_pattern_memory():
+    """Process-wide PatternMemoryStats for the memory DB (loaded on first use)."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = PatternMemoryStats()
+        return _stats
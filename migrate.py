@@ -1,19 +1,20 @@
-# migrate.py — Idempotent DB migrations for QMMX
-import sqlite3, os, datetime
+# migrate.py — versioned, run-once DB migrations for QMMX
+#
+# Each step in MIGRATIONS runs once per database; the applied version lives in
+# PRAGMA user_version (plus a schema_migrations history row per step), so a
+# process that starts against an up-to-date DB only reads one pragma.
+import datetime
 
-DB_PATH = os.environ.get("QMMX_DB_PATH", "qmmx.db")
+from storage import DB_PATH, MEMORY_DB_PATH, connect
 
 SCHEMA = [
-    # price levels entered by user or mobile
+    # price levels entered by user or mobile (/submit_levels, level_loader)
     """CREATE TABLE IF NOT EXISTS price_levels (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        symbol TEXT NOT NULL,
-        price REAL NOT NULL,
-        color TEXT NOT NULL,          -- blue|orange|black|teal
-        style TEXT NOT NULL,          -- solid|dashed
-        idx   INTEGER DEFAULT 1,
-        active INTEGER DEFAULT 1,
-        note TEXT,
+        color TEXT,                   -- blue|orange|black|teal
+        level_type TEXT,              -- solid|dashed
+        level_index INTEGER,
+        price REAL,
         created_at TEXT DEFAULT CURRENT_TIMESTAMP
     )""",
 
@@ -57,6 +58,15 @@ SCHEMA = [
         pnl REAL
     )""",
 
+    # portfolio ledger (OPEN/CLOSE rows per position)
+    """CREATE TABLE IF NOT EXISTS portfolio_ledger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        trade_id INTEGER,
+        action TEXT,                  -- OPEN|CLOSE
+        price REAL,
+        timestamp TEXT
+    )""",
+
     # module status heartbeats
     """CREATE TABLE IF NOT EXISTS module_status (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -79,6 +89,12 @@ SCHEMA = [
         model_version TEXT
     )""",
 
+    # key/value metadata (levels_version is bumped by /submit_levels)
+    """CREATE TABLE IF NOT EXISTS qmmx_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+
     # upgrade monitor snapshots (hardened version expects 'notes')
     """CREATE TABLE IF NOT EXISTS upgrade_score (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -89,27 +105,142 @@ SCHEMA = [
         review_loop_score REAL,
         score INTEGER,
         notes TEXT
+    )""",
+
+    # per (pattern_key, direction) win/loss counters — upserted by PatternEvolutionTracker
+    """CREATE TABLE IF NOT EXISTS pattern_evolution (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern_key TEXT,
+        direction TEXT,
+        confidence_weight REAL,
+        wins INTEGER,
+        losses INTEGER,
+        last_updated TEXT
+    )""",
+
+    # dashboard alerts (alerts.py)
+    """CREATE TABLE IF NOT EXISTS alerts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        message TEXT,
+        timestamp TEXT
+    )""",
+
+    # pattern outcome history (backend/pattern_resilience.py)
+    """CREATE TABLE IF NOT EXISTS pattern_resilience (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern_id TEXT,
+        timestamp TEXT,
+        outcome TEXT,
+        volatility_score REAL,
+        duration_minutes INTEGER
+    )""",
+
+    # engine contact log (ml_engine.process_tick)
+    """CREATE TABLE IF NOT EXISTS contact_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        symbol TEXT,
+        level_price REAL,
+        direction TEXT,
+        contact_type TEXT,
+        reaction TEXT,
+        context TEXT,
+        level_color TEXT,
+        level_type TEXT,
+        contact_order INTEGER
+    )""",
+
+    # false / missed signal review (ml_engine.log_false_missed)
+    """CREATE TABLE IF NOT EXISTS false_missed_analysis (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        type TEXT,
+        symbol TEXT,
+        price REAL,
+        level REAL,
+        level_color TEXT,
+        level_type TEXT,
+        reaction TEXT,
+        pattern_id TEXT,
+        confidence REAL,
+        volume REAL,
+        contact_order INTEGER,
+        notes TEXT
+    )""",
+
+    # memory viewer tables (previously created by app.init_db)
+    """CREATE TABLE IF NOT EXISTS trades_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT,
+        direction TEXT,
+        entry_price REAL,
+        exit_price REAL,
+        entry_time TEXT,
+        exit_time TEXT,
+        confidence REAL,
+        status TEXT,
+        pattern_id TEXT,
+        contact_event TEXT,
+        exit_reason TEXT
+    )""",
+
+    """CREATE TABLE IF NOT EXISTS patterns_memory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern_signature TEXT,
+        direction TEXT,
+        success_rate REAL,
+        total_trades INTEGER,
+        successful_trades INTEGER
     )"""
 ]
 
-# --- Add this to migrate.py (keep your existing code) ---
-import sqlite3
+# Indexes for the queries the engine and API run on every tick/poll:
+# (name, table, columns, unique, partial WHERE). Skipped when the table or a
+# column doesn't exist in this DB yet.
+INDEXES = [
+    # log_exit_to_db: UPDATE trades ... WHERE trade_id = ?
+    ("ux_trades_trade_id", "trades", ("trade_id",), True, None),
+    # PatternEvolutionTracker: lookups and ON CONFLICT target
+    ("ux_pattern_evolution_key_dir", "pattern_evolution", ("pattern_key", "direction"), True, None),
+    # get_current_pattern: WHERE reviewed = 0 ORDER BY timestamp
+    ("idx_patterns_reviewed_ts", "patterns", ("reviewed", "timestamp"), False, None),
+    # get_current_alerts: ORDER BY timestamp DESC LIMIT n
+    ("idx_alerts_ts", "alerts", ("timestamp",), False, None),
+    # get_resilience_score: WHERE pattern_id = ? ORDER BY timestamp DESC; purge by timestamp
+    ("idx_resilience_pattern_ts", "pattern_resilience", ("pattern_id", "timestamp"), False, None),
+    ("idx_resilience_ts", "pattern_resilience", ("timestamp",), False, None),
+    # /view_memory/false_missed_analysis: ORDER BY timestamp DESC
+    ("idx_false_missed_ts", "false_missed_analysis", ("timestamp",), False, None),
+    # PortfolioTracker: open positions by symbol/side
+    ("idx_positions_open", "portfolio_positions", ("symbol", "side"), False, "closed_at IS NULL"),
+]
 
 REQUIRED_TABLES = {
     "trades": {
         "symbol":"TEXT","direction":"TEXT","entry_price":"REAL","entry_time":"TEXT",
         "confidence":"REAL","pattern_id":"TEXT","pattern":"TEXT","contact_event":"TEXT",
-        "status":"TEXT","exit_price":"REAL","exit_time":"TEXT","pnl":"REAL","exit_reason":"TEXT","mode":"TEXT"
+        "status":"TEXT","exit_price":"REAL","exit_time":"TEXT","pnl":"REAL","exit_reason":"TEXT","mode":"TEXT",
+        "pattern_name":"TEXT",
+        "trade_id":"INTEGER"            # portfolio_positions.id — exits are keyed by this
     },
     "trade_recommendations": {
         "timestamp":"TEXT","symbol":"TEXT","direction":"TEXT",
         "level_type":"TEXT","reaction_type":"TEXT","approach_direction":"TEXT",
         "macro_position":"TEXT","mode":"TEXT"
+    },
+    # trade context of open positions, so an engine restart can still learn from their exits
+    "portfolio_positions": {
+        "pattern":"TEXT","pattern_id":"TEXT","confidence":"REAL","contact_event":"TEXT"
+    },
+    # older DBs created upgrade_score before notes existed
+    "upgrade_score": {"notes":"TEXT"},
+    # pattern_memory_engine reads these alongside the scaffold columns
+    "patterns": {
+        "timestamp":"TEXT","name":"TEXT","decision":"TEXT","decision_time":"TEXT"
     }
 }
 
-def ensure_schema(db_path="qmmx.db"):
-    con = sqlite3.connect(db_path); cur = con.cursor()
+def _ensure_columns(cur):
     # ensure base tables exist
     cur.execute("""CREATE TABLE IF NOT EXISTS trades(
         id INTEGER PRIMARY KEY AUTOINCREMENT
@@ -124,16 +255,217 @@ def ensure_schema(db_path="qmmx.db"):
         for col, typ in cols.items():
             if col not in have:
                 cur.execute(f"ALTER TABLE {table} ADD COLUMN {col} {typ}")
+
+def ensure_schema(db_path=DB_PATH):
+    con = connect(db_path); cur = con.cursor()
+    _ensure_columns(cur)
     con.commit(); con.close()
 
-def migrate(db_path: str = DB_PATH):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
+def dedupe_pattern_evolution(cur):
+    """
+    Fold duplicate (pattern_key, direction) rows into the oldest one, summing
+    wins/losses, so the unique index can be created on existing DBs.
+    """
+    dupes = cur.execute("""
+        SELECT pattern_key, direction, MIN(id), SUM(wins), SUM(losses), MAX(last_updated)
+          FROM pattern_evolution
+      GROUP BY pattern_key, direction
+        HAVING COUNT(*) > 1
+    """).fetchall()
+    for key, direction, keep_id, wins, losses, last_updated in dupes:
+        wins, losses = wins or 0, losses or 0
+        total = wins + losses
+        cur.execute("""
+            UPDATE pattern_evolution
+               SET wins = ?, losses = ?, confidence_weight = ?, last_updated = ?
+             WHERE id = ?
+        """, (wins, losses, wins / total if total else 0.5, last_updated, keep_id))
+        cur.execute("""
+            DELETE FROM pattern_evolution
+             WHERE pattern_key IS ? AND direction IS ? AND id != ?
+        """, (key, direction, keep_id))
+    return len(dupes)
+
+def ensure_indexes(cur):
+    for name, table, columns, unique, where in INDEXES:
+        cur.execute(f"PRAGMA table_info({table})")
+        have = {r[1] for r in cur.fetchall()}
+        if not have or not set(columns) <= have:
+            continue
+        sql = f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        if where:
+            sql += f" WHERE {where}"
+        cur.execute(sql)
+
+def rebuild_price_levels(cur):
+    """
+    Move an old scaffold price_levels (symbol/style/idx) onto the columns the
+    API and engine use (color/level_type/level_index/price).
+    """
+    cur.execute("PRAGMA table_info(price_levels)")
+    have = {r[1] for r in cur.fetchall()}
+    if not have or {"level_type", "level_index"} <= have:
+        return False
+    cur.execute("""CREATE TABLE price_levels_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        color TEXT,
+        level_type TEXT,
+        level_index INTEGER,
+        price REAL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )""")
+    level_type = "style" if "style" in have else "NULL"
+    level_index = "idx" if "idx" in have else "NULL"
+    created_at = "created_at" if "created_at" in have else "CURRENT_TIMESTAMP"
+    cur.execute(f"""
+        INSERT INTO price_levels_new (id, color, level_type, level_index, price, created_at)
+        SELECT id, color, {level_type}, {level_index}, price, {created_at} FROM price_levels
+    """)
+    cur.execute("DROP TABLE price_levels")
+    cur.execute("ALTER TABLE price_levels_new RENAME TO price_levels")
+    return True
+
+# ---------- migration registry ----------
+
+MIGRATIONS = []
+
+def migration(version, name):
+    """Register `fn(cur)` as schema step `version`; steps run in version order, once."""
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+@migration(1, "baseline tables and columns")
+def _baseline(cur):
     for stmt in SCHEMA:
         cur.execute(stmt)
-    conn.commit()
-    conn.close()
-    return {"ok": True, "db": db_path, "migrated_at": datetime.datetime.utcnow().isoformat()}
+    _ensure_columns(cur)
+
+@migration(2, "price_levels on color/level_type/level_index")
+def _price_levels(cur):
+    rebuild_price_levels(cur)
+
+@migration(3, "hot-path indexes")
+def _indexes(cur):
+    dedupe_pattern_evolution(cur)
+    ensure_indexes(cur)
+
+@migration(4, "trade context on portfolio_positions")
+def _position_context(cur):
+    _ensure_columns(cur)
+
+# Versions already confirmed in this process, by DB path
+_checked = {}
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(db_path: str = DB_PATH):
+    """Apply pending migrations. Cheap when the DB is current: one PRAGMA read (none if already checked)."""
+    latest = MIGRATIONS[-1][0]
+    if _checked.get(db_path, 0) >= latest:
+        return {"ok": True, "db": db_path, "version": _checked[db_path], "applied": []}
+
+    applied = []
+    conn = connect(db_path)
+    try:
+        version = schema_version(conn)
+        if version < latest:
+            # IMMEDIATE: the engine and API may start together; one of them migrates
+            conn.execute("BEGIN IMMEDIATE")
+            version = schema_version(conn)
+            cur = conn.cursor()
+            cur.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT,
+                applied_at TEXT
+            )""")
+            for step, name, fn in MIGRATIONS:
+                if step <= version:
+                    continue
+                fn(cur)
+                cur.execute("INSERT OR REPLACE INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                            (step, name, datetime.datetime.utcnow().isoformat()))
+                applied.append(name)
+                version = step
+            cur.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    _checked[db_path] = version
+    if applied:
+        print(f"🗄️ Migrated {db_path} to schema v{version}: {', '.join(applied)}")
+    return {"ok": True, "db": db_path, "version": version, "applied": applied,
+            "migrated_at": datetime.datetime.utcnow().isoformat()}
+
+# ---------- memory DB (qmmx_memory.db) ----------
+
+# Aggregates and review feedback read by memory_recall_engine.PatternMemoryStats
+MEMORY_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS patterns_memory (
+        id TEXT PRIMARY KEY,          -- pattern name the scorer looks up
+        name TEXT,
+        times_seen INTEGER DEFAULT 0,
+        times_successful INTEGER DEFAULT 0,
+        avg_confidence REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS pattern_feedback (
+        pattern_id TEXT,
+        confidence REAL,
+        outcome TEXT,                 -- reject|review_further|approve
+        timestamp TEXT
+    )""",
+]
+
+def dedupe_patterns_memory(cur):
+    """
+    Fold duplicate patterns_memory ids (tables created before the schema was
+    owned here) into the oldest row, so the upsert's unique index can exist.
+    """
+    dupes = cur.execute("""
+        SELECT id, MIN(rowid), SUM(COALESCE(times_seen, 0)), SUM(COALESCE(times_successful, 0)),
+               SUM(COALESCE(avg_confidence, 0) * COALESCE(times_seen, 0))
+          FROM patterns_memory
+      GROUP BY id
+        HAVING COUNT(*) > 1
+    """).fetchall()
+    for pid, keep, seen, successful, weighted in dupes:
+        cur.execute("UPDATE patterns_memory SET times_seen = ?, times_successful = ?, avg_confidence = ? WHERE rowid = ?",
+                    (seen, successful, weighted / seen if seen else None, keep))
+        cur.execute("DELETE FROM patterns_memory WHERE id IS ? AND rowid != ?", (pid, keep))
+    return len(dupes)
+
+def migrate_memory(db_path: str = MEMORY_DB_PATH):
+    """Create/upgrade the memory DB tables (idempotent; once per process per path)."""
+    if _checked.get(("memory", db_path)):
+        return
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.cursor()
+        for stmt in MEMORY_SCHEMA:
+            cur.execute(stmt)
+        have = {r[1] for r in cur.execute("PRAGMA table_info(patterns_memory)")}
+        for col, typ in (("name", "TEXT"), ("times_seen", "INTEGER DEFAULT 0"),
+                         ("times_successful", "INTEGER DEFAULT 0"), ("avg_confidence", "REAL")):
+            if col not in have:
+                cur.execute(f"ALTER TABLE patterns_memory ADD COLUMN {col} {typ}")
+        dedupe_patterns_memory(cur)
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_patterns_memory_id ON patterns_memory (id)")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    _checked[("memory", db_path)] = True
 
 if __name__ == "__main__":
     print(migrate())
+    migrate_memory()
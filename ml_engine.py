@@ -1,6 +1,5 @@
 import time
 import threading
-import sqlite3
 from datetime import datetime
 from polygon_io_provider import get_live_stock_price
 from trade_recommender import TradeRecommender
@@ -9,13 +8,22 @@ from portfolio_tracker import PortfolioTracker
 from contact_event_evaluator import evaluate_contact
 from backend.confidence_adjuster import record_pattern_outcome
 from backend.confidence_scorer import adjust_confidence_with_memory
+from memory_recall_engine import get_pattern_memory
 from backend.pattern_resilience import record_resilience
 from qmms_pattern_recognizer import PatternRecognizer
 from diagnostic_engine import run_diagnostics
-from diagnostic_state import diagnostic_monitor
-from level_loader import load_levels
+from heartbeat import heartbeat
+from level_loader import load_level_set
 from smart_entry_planner import SmartEntryPlanner
-from pattern_evolution import PatternEvolutionTracker  # ✅ NEW
+from pattern_evolution import get_tracker  # ✅ NEW
+from tick_bus import TickBus, PollingPriceSource
+from market_stream import TickBuffer, PolygonStream
+from tick_context import TickSnapshot
+from db_writer import get_writer
+from storage import DB_PATH
+from retention import RetentionJob
+from quote_cache import get_quote_cache
+from bar_ring import open_ring
 import migrate; migrate.migrate()
 
 # -------------------- ADDITIONS (safe, optional) --------------------
@@ -45,27 +53,57 @@ _FORCE_ONCE = os.environ.get("Q_FORCE_TEST", "0") == "1"
 
 symbol = "SPY"
 poll_interval = 0.1
-db_path = "qmmx.db"
+db_path = DB_PATH
+CONTACT_WINDOW = 0.05  # price distance that counts as a level touch
+
+# Engine mode: "event" (default) runs the chain only when a new tick is published;
+# "legacy" falls back to the fixed poll_interval loop.
+ENGINE_MODE = os.environ.get("Q_ENGINE_MODE", "event").lower()
+# How often the event-mode price source asks Polygon for a quote (seconds). 1 REST call/s instead of
+# the legacy loop's 10; use Q_PRICE_SOURCE=stream for tick-level touch resolution.
+PRICE_POLL_SEC = float(os.environ.get("Q_PRICE_POLL_SEC", "1.0"))
+# Longest gap between chain runs on a flat/silent feed, so heartbeats and exit checks keep running
+TICK_MAX_QUIET_SEC = float(os.environ.get("Q_TICK_MAX_QUIET_SEC", "5.0"))
+# Event-mode tick source: "poll" (REST last-trade) or "stream" (Polygon WebSocket / replay server)
+PRICE_SOURCE = os.environ.get("Q_PRICE_SOURCE", "poll").lower()
+
+tick_bus = TickBus()
+tick_buffer = TickBuffer()
+# All engine log rows go through one background writer (batched commits off the tick path)
+db_writer = get_writer(db_path)
+# Every fetched quote is shared with the API process (see quote_cache.py)
+quote_cache = get_quote_cache()
+# ...and folded into the memory-mapped chart bars /chart_data reads (see bar_ring.py)
+chart_ring = open_ring(symbol)
+
+def record_quote(sym, price, volume=None, timestamp=None):
+    quote_cache.put(sym, price, volume, timestamp)
+    if sym == symbol:
+        chart_ring.update(timestamp or time.time(), price, volume)
 
 print("✅ QMMX ML Engine initialized.")
-print(f"  Symbol: {symbol}, Poll Interval: {poll_interval:.01f}s")
+if ENGINE_MODE == "event" and PRICE_SOURCE == "stream":
+    print(f"  Symbol: {symbol}, Mode: event, Source: stream")
+elif ENGINE_MODE == "event":
+    print(f"  Symbol: {symbol}, Mode: event, Price Poll: {PRICE_POLL_SEC:.01f}s")
+else:
+    print(f"  Symbol: {symbol}, Mode: legacy, Poll Interval: {poll_interval:.01f}s")
 
 recommender = TradeRecommender()
 portfolio = PortfolioTracker()
 exit_strategy = ExitStrategy()
 recognizer = PatternRecognizer(levels=[])
 entry_planner = SmartEntryPlanner()
-evolution_tracker = PatternEvolutionTracker()  # ✅ INIT
+evolution_tracker = get_tracker()  # ✅ INIT (same instance the recommender reads)
 
 def log_trade_to_db(trade):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
+    db_writer.submit("""
         INSERT INTO trades (
             symbol, direction, entry_price, entry_time,
             confidence, pattern_id, pattern_name,
-            contact_event, status, mode           -- ✅ mode tag added
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            contact_event, status, mode,          -- ✅ mode tag added
+            trade_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         trade["symbol"],
         trade["direction"],
@@ -76,16 +114,13 @@ def log_trade_to_db(trade):
         trade["pattern"],
         str(trade["contact_event"]),
         trade["status"],
-        trade.get("mode", "live")               # ✅ persist mode
+        trade.get("mode", "live"),              # ✅ persist mode
+        trade.get("portfolio_trade_id")         # set by portfolio.execute_trade
     ))
-    conn.commit()
-    conn.close()
 
 def log_false_missed(type_, symbol, price, level, level_color, level_type,
                      reaction, pattern_id, confidence, volume, contact_order, notes=""):
-    conn = sqlite3.connect("qmmx.db")
-    cursor = conn.cursor()
-    cursor.execute("""
+    db_writer.submit("""
         INSERT INTO false_missed_analysis (
             timestamp, type, symbol, price, level, level_color, level_type,
             reaction, pattern_id, confidence, volume, contact_order, notes
@@ -96,33 +131,31 @@ def log_false_missed(type_, symbol, price, level, level_color, level_type,
         type_, symbol, price, level, level_color, level_type,
         reaction, pattern_id, confidence, volume, contact_order, notes
     ))
-    conn.commit()
-    conn.close()
 
 def log_exit_to_db(trade):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE trades
-        SET exit_price = ?, exit_time = ?, pnl = ?, exit_reason = ?, status = ?
-        WHERE symbol = ? AND entry_price = ? AND entry_time = ?
-    """, (
+    values = (
         trade.get("exit_price"),
         trade.get("exit_time"),
         trade.get("pnl"),
         trade.get("exit_reason"),
         trade.get("status"),
-        trade["symbol"],
-        trade["entry_price"],
-        trade["entry_time"]
-    ))
-    conn.commit()
-    conn.close()
+    )
+    if trade.get("portfolio_trade_id") is not None:
+        db_writer.submit("""
+            UPDATE trades
+            SET exit_price = ?, exit_time = ?, pnl = ?, exit_reason = ?, status = ?
+            WHERE trade_id = ?
+        """, values + (trade["portfolio_trade_id"],))
+    else:
+        # Rows logged before trade_id existed
+        db_writer.submit("""
+            UPDATE trades
+            SET exit_price = ?, exit_time = ?, pnl = ?, exit_reason = ?, status = ?
+            WHERE symbol = ? AND entry_price = ? AND entry_time = ?
+        """, values + (trade["symbol"], trade["entry_price"], trade.get("entry_time")))
 
 def log_recommendation_to_db(rec):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
+    db_writer.submit("""
         INSERT INTO trade_recommendations (
             timestamp, symbol, direction,
             level_type, reaction_type,
@@ -139,245 +172,301 @@ def log_recommendation_to_db(rec):
         rec["pattern"].get("macro_position"),
         rec.get("mode", "live")                # ✅ persist mode
     ))
-    conn.commit()
-    conn.close()
 
-def trading_loop():
+def process_tick(snapshot):
+    """
+    Runs one pass of the engine chain for a single TickSnapshot:
+    contacts → pattern → recommendation → entry → exits → diagnostics.
+    Every stage reads price and levels from the snapshot; nothing re-fetches.
+    """
     global _FORCE_ONCE
-    while True:
+    current_price = snapshot.price
+    levels = snapshot.levels
+    # ✅ Heartbeats so tiles go green
+    try:
+        heartbeat.beat("ml engine")
+        heartbeat.beat("price feed")
+    except Exception:
+        pass
+
+    print(f"📡 Current Price: {current_price}")
+    print(f"📏 Loaded Levels: {len(levels)}")
+
+    # ✅ Contact Event Logging
+    try:
+        touched = snapshot.level_index.within(current_price, CONTACT_WINDOW) if current_price is not None else []
+        for level in touched:
+            level_price = level["price"]
+            level_color = level["color"]
+            level_type = level["type"]
+
+            contact_event = evaluate_contact(
+                current_price,
+                {
+                    "price": level_price,
+                    "type": level_type,
+                    "color": level_color
+                },
+                "from_above" if current_price < level_price else "from_below",
+                levels,
+                {},
+                1
+            )
+
+            db_writer.submit("""
+                INSERT INTO contact_events (
+                    timestamp, symbol, level_price, direction,
+                    contact_type, reaction, context,
+                    level_color, level_type, contact_order
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                snapshot.time_str,
+                symbol,
+                level_price,
+                contact_event.get("approach_direction"),
+                "level_touch",
+                contact_event.get("reaction"),
+                str(contact_event.get("context")),
+                level_color,
+                level_type,
+                contact_event.get("contact_order")
+            ))
+
+            print(f"📍 Logged contact: {level_color} {level_type} @ {level_price} → {contact_event.get('reaction')}")
+    except Exception as ce:
+        print("⚠️ Contact event logging failed:", ce)
+
+    if current_price is None:
+        print("⚠️ No live price")
+        return
+
+    print(f"\n📍 {datetime.now().strftime('%H:%M:%S')} Price: {current_price:.2f}")
+
+    timestamp = snapshot.time_str
+
+    # ✅ Optional forced one-time rec to prove E2E wiring (no impact otherwise)
+    if _FORCE_ONCE:
         try:
-            # ✅ Heartbeats so tiles go green
-            try:
-                diagnostic_monitor.ping("ml engine")
-                diagnostic_monitor.ping("price feed")
-            except Exception:
-                pass
-
-            current_price = get_live_stock_price(symbol)
-            levels = load_levels()
-            print(f"📡 Current Price: {current_price}")
-            print(f"📏 Loaded Levels: {[round(lvl['price'], 2) for lvl in levels]}")
-
-            # ✅ Contact Event Logging
-            try:
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-
-                for level in levels:
-                    level_price = level["price"]
-                    level_color = level["color"]
-                    level_type = level["type"]
-                    dist = abs(current_price - level_price)
-
-                    if dist <= 0.05:
-                        contact_event = evaluate_contact(
-                            current_price,
-                            {
-                                "price": level_price,
-                                "type": level_type,
-                                "color": level_color
-                            },
-                            "from_above" if current_price < level_price else "from_below",
-                            levels,
-                            {},
-                            1
-                        )
-
-                        cursor.execute("""
-                            INSERT INTO contact_events (
-                                timestamp, symbol, level_price, direction,
-                                contact_type, reaction, context,
-                                level_color, level_type, contact_order
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            symbol,
-                            level_price,
-                            contact_event.get("approach_direction"),
-                            "level_touch",
-                            contact_event.get("reaction"),
-                            str(contact_event.get("context")),
-                            level_color,
-                            level_type,
-                            contact_event.get("contact_order")
-                        ))
-
-                        conn.commit()
-                        print(f"📍 Logged contact: {level_color} {level_type} @ {level_price} → {contact_event.get('reaction')}")
-
-                conn.close()
-            except Exception as ce:
-                print("⚠️ Contact event logging failed:", ce)
-
-            if current_price is None:
-                print("⚠️ No live price")
-                time.sleep(poll_interval)
-                continue
-
-            print(f"\n📍 {datetime.now().strftime('%H:%M:%S')} Price: {current_price:.2f}")
-
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # ✅ Optional forced one-time rec to prove E2E wiring (no impact otherwise)
-            if _FORCE_ONCE:
+            rec = {
+                "symbol": symbol,
+                "direction": "long",
+                "pattern": {
+                    "level_type": "test",
+                    "reaction_type": "test",
+                    "approach_direction": "test",
+                    "macro_position": "test"
+                },
+                "mode": "demo" if DEMO_LOOSE else "live"
+            }
+            log_recommendation_to_db(rec)
+            # minimal "enter" to show up in UI/DB, honoring cooldown
+            if _cooldown_ok():
+                trade = {
+                    "symbol": symbol,
+                    "direction": rec["direction"],
+                    "entry_price": current_price,
+                    "entry_time": timestamp,
+                    "confidence": 0.72,
+                    "pattern_id": "n/a",
+                    "pattern": "test_break_retest",
+                    "contact_event": rec["pattern"],
+                    "status": "open",
+                    "mode": "demo" if DEMO_LOOSE else "live"
+                }
                 try:
-                    rec = {
-                        "symbol": symbol,
-                        "direction": "long",
-                        "pattern": {
-                            "level_type": "test",
-                            "reaction_type": "test",
-                            "approach_direction": "test",
-                            "macro_position": "test"
-                        },
-                        "mode": "demo" if DEMO_LOOSE else "live"
-                    }
-                    log_recommendation_to_db(rec)
-                    # minimal "enter" to show up in UI/DB, honoring cooldown
-                    if _cooldown_ok():
-                        trade = {
-                            "symbol": symbol,
-                            "direction": rec["direction"],
-                            "entry_price": current_price,
-                            "entry_time": timestamp,
-                            "confidence": 0.72,
-                            "pattern_id": "n/a",
-                            "pattern": "test_break_retest",
-                            "contact_event": rec["pattern"],
-                            "status": "open",
-                            "mode": "demo" if DEMO_LOOSE else "live"
-                        }
-                        try:
-                            diagnostic_monitor.ping("trade recommender", "forced test")
-                            diagnostic_monitor.ping("alerts")
-                        except Exception:
-                            pass
-                        trade.setdefault("contract", None)
-                        portfolio.execute_trade(trade)
-                        log_trade_to_db(trade)
-                    _FORCE_ONCE = False
-                except Exception as fe:
-                    print("⚠️ Forced test failed:", fe)
-                # continue flow to allow normal logic as well
-
-            pattern = recognizer.analyze(symbol)
-
-            if pattern and "pattern_name" in pattern:
-                # ✅ Heartbeats for analysis modules
+                    heartbeat.beat("trade recommender", "forced test")
+                    heartbeat.beat("alerts")
+                except Exception:
+                    pass
+                trade.setdefault("contract", None)
+                portfolio.execute_trade(trade)
+                log_trade_to_db(trade)
+            _FORCE_ONCE = False
+        except Exception as fe:
+            print("⚠️ Forced test failed:", fe)
+        # continue flow to allow normal logic as well
+
+    pattern = recognizer.analyze(symbol, snapshot=snapshot)
+
+    if pattern and "pattern_name" in pattern:
+        # ✅ Heartbeats for analysis modules
+        try:
+            heartbeat.beat("contact event evaluator")
+            heartbeat.beat("pattern discovery")
+            heartbeat.beat("pattern memory engine")
+            heartbeat.beat("confidence monitor")
+        except Exception:
+            pass
+
+        pattern_id = pattern.get("pattern_name", "unknown")
+        ticker = symbol
+        base_score = 0.5
+        scored_confidence = adjust_confidence_with_memory(pattern_id, base_score, ticker)
+        pattern["confidence"] = scored_confidence
+
+        print(f"🧠 Pattern: {pattern['pattern_name']} | Confidence: {pattern.get('confidence')}")
+        contact_event = pattern["structure"]
+
+        recommendation = recommender.recommend_trade(contact_event)
+        if recommendation:
+            # Tag mode for later analysis
+            recommendation["mode"] = "demo" if DEMO_LOOSE else "live"
+
+            print(f"✅ Reco: {recommendation['direction']} @ {current_price:.2f}")
+            log_recommendation_to_db(recommendation)
+
+            # -------------------- GATE (added) --------------------
+            # Only proceed if confidence meets gate AND cooldown ok
+            if (scored_confidence >= MIN_PROB) and _cooldown_ok():
+                # ✅ Heartbeat: recommender is active
                 try:
-                    diagnostic_monitor.ping("contact event evaluator")
-                    diagnostic_monitor.ping("pattern discovery")
-                    diagnostic_monitor.ping("pattern memory engine")
-                    diagnostic_monitor.ping("confidence monitor")
+                    heartbeat.beat("trade recommender", f"emit {pattern['pattern_name']} {scored_confidence:.2f}")
+                    heartbeat.beat("alerts")
                 except Exception:
                     pass
+                # ----------------------------------------------------
 
-                pattern_id = pattern.get("pattern_name", "unknown")
-                ticker = symbol
-                base_score = 0.5
-                scored_confidence = adjust_confidence_with_memory(pattern_id, base_score, ticker)
-                pattern["confidence"] = scored_confidence
-
-                print(f"🧠 Pattern: {pattern['pattern_name']} | Confidence: {pattern.get('confidence')}")
-                contact_event = pattern["structure"]
-
-                recommendation = recommender.recommend_trade(contact_event)
-                if recommendation:
-                    # Tag mode for later analysis
-                    recommendation["mode"] = "demo" if DEMO_LOOSE else "live"
-
-                    print(f"✅ Reco: {recommendation['direction']} @ {current_price:.2f}")
-                    log_recommendation_to_db(recommendation)
-
-                    # -------------------- GATE (added) --------------------
-                    # Only proceed if confidence meets gate AND cooldown ok
-                    if (scored_confidence >= MIN_PROB) and _cooldown_ok():
-                        # ✅ Heartbeat: recommender is active
-                        try:
-                            diagnostic_monitor.ping("trade recommender", f"emit {pattern['pattern_name']} {scored_confidence:.2f}")
-                            diagnostic_monitor.ping("alerts")
-                        except Exception:
-                            pass
-                        # ----------------------------------------------------
-
-                        entry_check = entry_planner.should_enter(
-                            current_price=current_price,
-                            current_volume=0,
-                            current_time=datetime.now().timestamp(),
-                            pattern=pattern
-                        )
-
-                        if entry_check:
-                            trade = {
-                                "symbol": symbol,
-                                "direction": recommendation["direction"],
-                                "entry_price": current_price,
-                                "entry_time": timestamp,
-                                "confidence": pattern.get("confidence", 0.7),
-                                "pattern_id": "n/a",
-                                "pattern": pattern["pattern_name"],
-                                "contact_event": contact_event,
-                                "status": "open",
-                                "mode": "demo" if DEMO_LOOSE else "live"   # ✅ tag
-                            }
-
-                            trade.setdefault("contract", None)
-                            portfolio.execute_trade(trade)
-                            log_trade_to_db(trade)
-                        else:
-                            print("🚫 Entry rejected by SmartEntryPlanner")
-                    else:
-                        print(f"🧯 Skipped by gate: conf {scored_confidence:.2f} < MIN_PROB {MIN_PROB:.2f} or cooling down")
-                    # ------------------ END GATE ---------------------------
+                entry_check = entry_planner.should_enter(
+                    current_price=current_price,
+                    current_volume=snapshot.volume,
+                    current_time=snapshot.timestamp,
+                    pattern=pattern
+                )
 
+                if entry_check:
+                    trade = {
+                        "symbol": symbol,
+                        "direction": recommendation["direction"],
+                        "entry_price": current_price,
+                        "entry_time": timestamp,
+                        "confidence": pattern.get("confidence", 0.7),
+                        "pattern_id": "n/a",
+                        "pattern": pattern["pattern_name"],
+                        "contact_event": contact_event,
+                        "status": "open",
+                        "mode": "demo" if DEMO_LOOSE else "live"   # ✅ tag
+                    }
+
+                    trade.setdefault("contract", None)
+                    portfolio.execute_trade(trade)
+                    log_trade_to_db(trade)
                 else:
-                    print("🛑 No trade recommendation")
+                    print("🚫 Entry rejected by SmartEntryPlanner")
             else:
-                print("⚪ No pattern found")
-
-            exits = exit_strategy.evaluate_exit_conditions(portfolio, current_price, timestamp)
-            for signal in exits:
-                print(f"🚪 Exit: {signal['reason']} | PnL: {signal['pnl_pct']*100:.2f}%")
-                for trade in portfolio.get_open_positions():
-                    if trade["symbol"] == signal["symbol"] and trade["direction"] == signal["direction"]:
-                        exited = portfolio.close_trade(trade, signal["exit_price"])
-                        if exited:
-                            trade["exit_price"] = signal["exit_price"]
-                            trade["exit_time"] = signal["timestamp"]
-                            trade["pnl"] = signal["pnl_pct"]
-                            trade["exit_reason"] = signal["reason"]
-                            trade["status"] = "closed"
-
-                            log_exit_to_db(trade)
-
-                            # During demo/bootstrapping, we still record outcome,
-                            # but since we tagged mode, you can down-weight later in training.
-                            record_pattern_outcome(trade["pattern"], trade["pnl"] > 0)
-                            record_resilience(
-                                pattern_name=trade["pattern"],
-                                outcome="win" if trade["pnl"] > 0 else "loss",
-                                confidence=trade["confidence"],
-                                reaction_score=1.0
-                            )
-                            # ✅ Pattern Evolution Trigger
-                            evolution_tracker.record_result(
-                                pattern_signature=trade["contact_event"],
-                                direction=trade["direction"],
-                                was_successful=(trade["pnl"] > 0)
-                            )
-
-            run_diagnostics()
+                print(f"🧯 Skipped by gate: conf {scored_confidence:.2f} < MIN_PROB {MIN_PROB:.2f} or cooling down")
+            # ------------------ END GATE ---------------------------
+
+        else:
+            print("🛑 No trade recommendation")
+    else:
+        print("⚪ No pattern found")
+
+    exits = exit_strategy.evaluate_exit_conditions(portfolio, current_price, timestamp, snapshot=snapshot)
+    for signal in exits:
+        print(f"🚪 Exit: {signal['reason']} | PnL: {signal['pnl_pct']*100:.2f}%")
+        # Signals carry the book id: one dict lookup instead of a scan per signal
+        trade = portfolio.get_position(signal.get("trade_id"))
+        if trade is not None:
+            exited = portfolio.close_trade(trade, signal["exit_price"])
+            if exited:
+                trade["exit_price"] = signal["exit_price"]
+                trade["exit_time"] = signal["timestamp"]
+                trade["pnl"] = signal["pnl_pct"]
+                trade["exit_reason"] = signal["reason"]
+                trade["status"] = "closed"
+
+                log_exit_to_db(trade)
+
+                # Positions opened before their context was persisted can't feed the learners
+                if not trade["pattern"] or not isinstance(trade["contact_event"], dict):
+                    print(f"⚠️ Trade {trade['id']} has no pattern context; skipping learning updates")
+                    continue
+
+                # During demo/bootstrapping, we still record outcome,
+                # but since we tagged mode, you can down-weight later in training.
+                record_pattern_outcome(trade["pattern"], trade["pnl"] > 0)
+                get_pattern_memory().record_trade(trade["pattern"], trade["pnl"] > 0, trade["confidence"])
+                record_resilience(
+                    pattern_name=trade["pattern"],
+                    outcome="win" if trade["pnl"] > 0 else "loss",
+                    confidence=trade["confidence"],
+                    reaction_score=1.0
+                )
+                # ✅ Pattern Evolution Trigger
+                evolution_tracker.record_result(
+                    pattern_signature=trade["contact_event"],
+                    direction=trade["direction"],
+                    was_successful=(trade["pnl"] > 0)
+                )
+
+    run_diagnostics(snapshot)
+
+    stats = db_writer.stats()
+    if stats["queue_depth"] > stats["queue_capacity"] // 2:
+        print(f"⚠️ DB writer backlog: {stats['queue_depth']} rows, last flush {stats['last_flush_ms']}ms")
+
 
+def trading_loop():
+    """
+    Legacy fixed-interval loop (Q_ENGINE_MODE=legacy): fetch and process every poll_interval.
+    """
+    while True:
+        try:
+            current_price = get_live_stock_price(symbol)
+            record_quote(symbol, current_price)
+            levels, level_index = load_level_set()
+            process_tick(TickSnapshot.build(symbol, current_price, levels=levels, level_index=level_index))
         except Exception as e:
             print("❌ ML Engine Error:", str(e))
 
         time.sleep(poll_interval)
 
 
-threading.Thread(target=trading_loop, daemon=True).start()
+def event_loop():
+    """
+    Event-driven loop: the price source publishes ticks onto the bus and the
+    chain only runs when a new tick arrives. Idle waits block on the bus.
+    """
+    if PRICE_SOURCE == "stream":
+        # Every streamed trade/quote/aggregate lands on the bus; the bus keeps only the newest
+        tick_buffer.subscribe(lambda tick: tick_bus.publish(tick) if tick["symbol"] == symbol else None)
+        stream = PolygonStream(tick_buffer, symbols=[symbol])
+        tick_buffer.subscribe(lambda tick: record_quote(tick["symbol"], tick["price"], stream.bar_volume(tick),
+                                                        tick.get("timestamp")))
+        stream.start()
+    else:
+        PollingPriceSource(tick_bus, symbol, get_live_stock_price, interval=PRICE_POLL_SEC,
+                           on_quote=record_quote, max_quiet=TICK_MAX_QUIET_SEC).start()
+
+    last_seq = 0
+    while True:
+        last_seq, tick = tick_bus.wait_for_tick(last_seq, timeout=TICK_MAX_QUIET_SEC)
+        if tick is None:
+            if tick_bus.closed:
+                break
+            # Silent stream: re-run the chain on the last known price
+            tick = tick_bus.latest()[1]
+            if tick is None:
+                continue
+        try:
+            levels, level_index = load_level_set()
+            process_tick(TickSnapshot.build(
+                tick["symbol"], tick["price"], tick.get("volume"), tick.get("timestamp"),
+                levels=levels, level_index=level_index,
+            ))
+        except Exception as e:
+            print("❌ ML Engine Error:", str(e))
+
+
+_loop = event_loop if ENGINE_MODE == "event" else trading_loop
+threading.Thread(target=_loop, daemon=True).start()
+# Hourly (Q_RETENTION_INTERVAL_SEC) move of old log rows into archive/ Parquet
+RetentionJob().start()
 
 try:
     while True:
-        time.sleep(poll_interval)
+        time.sleep(1.0)
 except KeyboardInterrupt:
+    tick_bus.close()
+    db_writer.close()
     print("🛑 Engine stopped by user.")
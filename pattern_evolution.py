@@ -1,89 +1,126 @@
 # pattern_evolution.py
 
-import sqlite3
+import sys
+import threading
 from datetime import datetime
 
+import migrate
+from db_writer import get_writer
+from storage import DB_PATH, get_connection
+
+# A direction needs this win rate before it is recommended
+MIN_WIN_RATE = 0.55
+# ...and must beat the previous best direction's win rate by more than this
+MIN_EDGE = 0.1
+
+UPSERT_SQL = """
+    INSERT INTO pattern_evolution (pattern_key, direction, confidence_weight, wins, losses, last_updated)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(pattern_key, direction) DO UPDATE SET
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses,
+        confidence_weight = CAST(wins + excluded.wins AS REAL)
+                            / (wins + excluded.wins + losses + excluded.losses),
+        last_updated = excluded.last_updated
+"""
+
+
+def _best_direction(directions):
+    """Same rule the old per-call SQL loop applied, over {direction: [wins, losses]} in row order."""
+    best_direction = None
+    best_win_rate = 0
+    for direction, (wins, losses) in directions.items():
+        total = wins + losses
+        if total == 0:
+            continue
+        win_rate = wins / total
+        if abs(win_rate - best_win_rate) > MIN_EDGE and win_rate > best_win_rate:
+            best_direction = direction
+            best_win_rate = win_rate
+    return best_direction if best_win_rate >= MIN_WIN_RATE else None
+
+
 class PatternEvolutionTracker:
-    def __init__(self, db_path="qmmx.db"):
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self._create_table()
-
-    def _create_table(self):
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS pattern_evolution (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pattern_key TEXT,
-                direction TEXT,
-                confidence_weight REAL,
-                wins INTEGER,
-                losses INTEGER,
-                last_updated TEXT
-            )
-        """)
-        self.conn.commit()
+    """
+    Win/loss counters per (pattern_key, direction), held in memory.
+
+    pattern_evolution is read once at start-up; record_result() bumps the
+    counters, recomputes that pattern's best direction and queues a delta
+    upsert on the shared db_writer, so neither the recommendation path nor
+    the exit path touches SQLite. Use get_tracker() to share one instance.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        migrate.migrate(self.db_path)  # table + unique index; a version read once it's current
+        self._lock = threading.Lock()
+        self._stats = {}  # pattern_key -> {direction: [wins, losses]}
+        self._best = {}   # pattern_key -> best direction (or None)
+        self.reload()
+
+    @property
+    def conn(self):
+        # Per-thread connection: the engine and API threads never share a cursor
+        return get_connection(self.db_path)
 
     def _pattern_key(self, pattern_signature):
-        return f"{pattern_signature.get('level_type')}|{pattern_signature.get('reaction_type')}|{pattern_signature.get('approach_direction')}|{pattern_signature.get('macro_position')}"
+        return sys.intern(f"{pattern_signature.get('level_type')}|{pattern_signature.get('reaction_type')}|{pattern_signature.get('approach_direction')}|{pattern_signature.get('macro_position')}")
+
+    def reload(self):
+        """Rebuild the in-memory table from pattern_evolution (queued writes are flushed first)."""
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT pattern_key, direction, wins, losses FROM pattern_evolution ORDER BY id").fetchall()
+        stats = {}
+        for key, direction, wins, losses in rows:
+            stats.setdefault(sys.intern(key), {})[sys.intern(direction)] = [wins or 0, losses or 0]
+        with self._lock:
+            self._stats = stats
+            self._best = {key: _best_direction(dirs) for key, dirs in stats.items()}
+
+    def flush(self):
+        """Block until every queued counter update is in the DB."""
+        get_writer(self.db_path).flush()
 
     def record_result(self, pattern_signature, direction, was_successful):
         pattern_key = self._pattern_key(pattern_signature)
-        cursor = self.conn.cursor()
-
-        # Fetch existing row
-        cursor.execute("""
-            SELECT wins, losses FROM pattern_evolution
-            WHERE pattern_key = ? AND direction = ?
-        """, (pattern_key, direction))
-        row = cursor.fetchone()
-
-        if row:
-            wins, losses = row
-            wins += 1 if was_successful else 0
-            losses += 0 if was_successful else 1
-            total = wins + losses
-            confidence = wins / total if total else 0.5
-
-            cursor.execute("""
-                UPDATE pattern_evolution
-                SET wins = ?, losses = ?, confidence_weight = ?, last_updated = ?
-                WHERE pattern_key = ? AND direction = ?
-            """, (wins, losses, confidence, datetime.utcnow().isoformat(), pattern_key, direction))
-
-        else:
-            wins = 1 if was_successful else 0
-            losses = 0 if was_successful else 1
-            confidence = wins / (wins + losses) if (wins + losses) else 0.5
-
-            cursor.execute("""
-                INSERT INTO pattern_evolution (pattern_key, direction, confidence_weight, wins, losses, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (pattern_key, direction, confidence, wins, losses, datetime.utcnow().isoformat()))
-
-        self.conn.commit()
+        win, loss = (1, 0) if was_successful else (0, 1)
+
+        with self._lock:
+            directions = self._stats.setdefault(pattern_key, {})
+            counts = directions.setdefault(sys.intern(direction), [0, 0])
+            counts[0] += win
+            counts[1] += loss
+            self._best[pattern_key] = _best_direction(directions)
+
+        # Persist the delta, not the totals: safe if another process bumps the same row
+        get_writer(self.db_path).submit(
+            UPSERT_SQL, (pattern_key, direction, float(win), win, loss, datetime.utcnow().isoformat()))
 
     def get_best_direction_for_pattern(self, pattern_signature):
-        pattern_key = self._pattern_key(pattern_signature)
-        cursor = self.conn.cursor()
-
-        cursor.execute("""
-            SELECT direction, wins, losses FROM pattern_evolution
-            WHERE pattern_key = ?
-        """, (pattern_key,))
-        rows = cursor.fetchall()
-
-        if not rows:
-            return None
-
-        best_direction = None
-        best_win_rate = 0
-        for direction, wins, losses in rows:
-            total = wins + losses
-            if total == 0:
-                continue
-            win_rate = wins / total
-            if abs(win_rate - best_win_rate) > 0.1 and win_rate > best_win_rate:
-                best_direction = direction
-                best_win_rate = win_rate
-
-        return best_direction if best_win_rate >= 0.55 else None
+        return self._best.get(self._pattern_key(pattern_signature))
+
+    def get_best_directions(self):
+        """Every pattern with an edge: {pattern_key: direction}."""
+        with self._lock:
+            return {key: direction for key, direction in self._best.items() if direction is not None}
+
+    def get_stats(self):
+        """Copy of the counters: {pattern_key: {direction: {"wins", "losses"}}}."""
+        with self._lock:
+            return {key: {d: {"wins": w, "losses": l} for d, (w, l) in dirs.items()}
+                    for key, dirs in self._stats.items()}
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(db_path=None):
+    """Process-wide tracker for `db_path`, so every caller shares one stats table."""
+    db_path = db_path or DB_PATH
+    with _trackers_lock:
+        tracker = _trackers.get(db_path)
+        if tracker is None:
+            tracker = _trackers[db_path] = PatternEvolutionTracker(db_path)
+        return tracker
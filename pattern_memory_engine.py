@@ -1,9 +1,10 @@
-import sqlite3
 import datetime
+from memory_recall_engine import get_pattern_memory
+from storage import get_connection
 
 def get_current_pattern():
     try:
-        conn = sqlite3.connect("qmmx.db")
+        conn = get_connection()
         cur = conn.cursor()
         cur.execute("""
             SELECT * FROM patterns
@@ -17,7 +18,6 @@ def get_current_pattern():
 
         columns = [desc[0] for desc in cur.description]
         pattern = dict(zip(columns, row))
-        conn.close()
         return pattern
     except Exception as e:
         print("❌ Error fetching current pattern:", e)
@@ -25,22 +25,30 @@ def get_current_pattern():
 
 def mark_pattern_decision(pattern_id, decision):
     try:
-        conn = sqlite3.connect("qmmx.db")
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE patterns
-            SET decision = ?, reviewed = 1, decision_time = ?
-            WHERE id = ?
-        """, (decision, datetime.datetime.utcnow().isoformat(), pattern_id))
-        conn.commit()
-        conn.close()
+        conn = get_connection()
+        with conn:
+            conn.execute("""
+                UPDATE patterns
+                SET decision = ?, reviewed = 1, decision_time = ?
+                WHERE id = ?
+            """, (decision, datetime.datetime.utcnow().isoformat(), pattern_id))
         print(f"✅ Pattern {pattern_id} marked as {decision}")
     except Exception as e:
         print("❌ Failed to mark pattern decision:", e)
+        return False
+
+    # Feed the decision to confidence scoring, keyed by the pattern name the scorer looks up
+    try:
+        row = conn.execute("SELECT name, kind, confidence FROM patterns WHERE id = ?", (pattern_id,)).fetchone()
+        name = (row and (row[0] or row[1])) or str(pattern_id)
+        get_pattern_memory().record_feedback(name, decision, row[2] if row else None)
+    except Exception as e:
+        print("⚠️ Pattern feedback not recorded:", e)
+    return True
 
 def get_pattern_id(pattern_name):
     try:
-        conn = sqlite3.connect("qmmx.db")
+        conn = get_connection()
         cur = conn.cursor()
         cur.execute("""
             SELECT id FROM patterns
@@ -49,7 +57,6 @@ def get_pattern_id(pattern_name):
             LIMIT 1
         """, (pattern_name,))
         row = cur.fetchone()
-        conn.close()
         return row[0] if row else None
     except Exception as e:
         print("❌ Failed to fetch pattern ID:", e)
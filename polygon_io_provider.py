@@ -1,7 +1,7 @@
 # polygon_io_provider.py
-import requests
 from settings_manager import load_settings
-from diagnostic_monitor import diagnostic_monitor
+from heartbeat import heartbeat
+from http_client import polygon_client
 
 def get_live_price_and_volume(symbol):
     """
@@ -10,20 +10,21 @@ def get_live_price_and_volume(symbol):
     settings = load_settings()
     api_key = settings.get("polygon_api_key", "")
     if not api_key:
-        diagnostic_monitor.report_error("data_provider", "Polygon API key missing")
+        heartbeat.error("data_provider", "Polygon API key missing")
         return None, None
 
     try:
-        url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/prev?adjusted=true&apiKey={api_key}"
-        resp = requests.get(url)
-        resp.raise_for_status()
-        obj = resp.json()["results"][0]
+        obj = polygon_client.get_json(
+            f"/v2/aggs/ticker/{symbol}/prev",
+            params={"adjusted": "true", "apiKey": api_key},
+            endpoint="/v2/aggs/ticker/{symbol}/prev",
+        )["results"][0]
         price = obj["c"]  # close price
         volume = obj["v"]  # volume
-        diagnostic_monitor.ping("data_provider")
+        heartbeat.beat("data_provider")
         return price, volume
     except Exception as e:
-        diagnostic_monitor.report_error("data_provider", str(e))
+        heartbeat.error("data_provider", str(e))
         return None, None
 
 def get_live_stock_price(symbol):
@@ -34,19 +35,20 @@ def get_live_stock_price(symbol):
     settings = load_settings()
     api_key = settings.get("polygon_api_key", "")
     if not api_key:
-        diagnostic_monitor.report_error("data_provider", "Polygon API key missing")
+        heartbeat.error("data_provider", "Polygon API key missing")
         return None
 
     try:
-        url = f"https://api.polygon.io/v1/last/stocks/{symbol}?apiKey={api_key}"
-        resp = requests.get(url)
-        resp.raise_for_status()
-        obj = resp.json()
+        obj = polygon_client.get_json(
+            f"/v1/last/stocks/{symbol}",
+            params={"apiKey": api_key},
+            endpoint="/v1/last/stocks/{symbol}",
+        )
         price = obj["last"]["price"]
-        diagnostic_monitor.ping("data_provider")
+        heartbeat.beat("data_provider")
         return price
     except Exception as e:
-        diagnostic_monitor.report_error("data_provider", str(e))
+        heartbeat.error("data_provider", str(e))
         return None
 
 def get_option_chain(symbol, exp_date, limit=50):
@@ -57,24 +59,23 @@ def get_option_chain(symbol, exp_date, limit=50):
     settings = load_settings()
     api_key = settings.get("polygon_api_key", "")
     if not api_key:
-        diagnostic_monitor.report_error("data_provider", "Polygon API key missing")
+        heartbeat.error("data_provider", "Polygon API key missing")
         return []
 
     try:
-        url = (
-            f"https://api.polygon.io/v3/reference/options/contracts"
-            f"?underlying_ticker={symbol}"
-            f"&expiration_date={exp_date}"
-            f"&limit={limit}"
-            f"&apiKey={api_key}"
-        )
-        resp = requests.get(url)
-        resp.raise_for_status()
-        data = resp.json().get("results", [])
-        diagnostic_monitor.ping("data_provider")
+        data = polygon_client.get_json(
+            "/v3/reference/options/contracts",
+            params={
+                "underlying_ticker": symbol,
+                "expiration_date": exp_date,
+                "limit": limit,
+                "apiKey": api_key,
+            },
+        ).get("results", [])
+        heartbeat.beat("data_provider")
         return data
     except Exception as e:
-        diagnostic_monitor.report_error("data_provider", str(e))
+        heartbeat.error("data_provider", str(e))
         return []
 
 def get_live_option_price(symbol, strike, exp_date, option_type):
@@ -84,20 +85,21 @@ def get_live_option_price(symbol, strike, exp_date, option_type):
     settings = load_settings()
     api_key = settings.get("polygon_api_key", "")
     if not api_key:
-        diagnostic_monitor.report_error("data_provider", "Polygon API key missing")
+        heartbeat.error("data_provider", "Polygon API key missing")
         return None
 
     try:
         option_symbol = build_option_symbol(symbol, exp_date, strike, option_type)
-        url = f"https://api.polygon.io/v3/snapshot/options/{symbol}/{option_symbol}?apiKey={api_key}"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = polygon_client.get_json(
+            f"/v3/snapshot/options/{symbol}/{option_symbol}",
+            params={"apiKey": api_key},
+            endpoint="/v3/snapshot/options/{symbol}/{option}",
+        )
         price = data["results"]["lastQuote"]["askPrice"]
-        diagnostic_monitor.ping("data_provider")
+        heartbeat.beat("data_provider")
         return price
     except Exception as e:
-        diagnostic_monitor.report_error("data_provider", str(e))
+        heartbeat.error("data_provider", str(e))
         return None
 
 def build_option_symbol(symbol, exp_date, strike, option_type):
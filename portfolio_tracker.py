@@ -1,126 +1,173 @@
 # portfolio_tracker.py
-import sqlite3
+import json
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
-DB_PATH = "qmmx.db"
+import migrate
+from db_writer import get_writer
+from heartbeat import heartbeat
+from storage import DB_PATH, get_connection
 
-# Optional heartbeat — safe no-op if unavailable
-try:
-    from diagnostic_monitor import diagnostic_monitor as _diag  # type: ignore
-    def _ping(name: str, detail: str = ""):
-        try:
-            _diag.ping(name, detail)
-        except Exception:
-            pass
-except Exception:
-    def _ping(name: str, detail: str = ""):
-        pass
+
+def _ping(name: str, detail: str = ""):
+    # Shipped to the API's /diagnostics over the heartbeat bus (never blocks)
+    heartbeat.beat(name, detail)
+
+
+def _load_event(text):
+    # contact_event is stored as JSON; anything else comes back as the raw text
+    if text is None:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
 
 
 class PortfolioTracker:
     """
-    Minimal, DB-backed portfolio tracker for QMMX.
+    In-memory position book for QMMX with write-behind persistence.
+
+    The book (positions by id, ids by (symbol, side)) is the source of truth
+    in the engine: opens/closes update it under a lock. An open inserts its
+    portfolio_positions row directly so SQLite assigns the id; the ledger rows
+    and closes are queued on the shared db_writer, so no SQLite I/O happens on
+    the exit path. The DB is read only at startup and on reconcile(), and
+    positions keep their trade context (pattern, confidence, contact event)
+    across restarts. Only one process (the engine) should open/close trades;
+    the API builds a tracker with reload_interval so its read-only view
+    reconciles from the DB at most that often.
 
     Tables used (must match your DB):
       - portfolio_positions(id, opened_at, closed_at, symbol, side, qty,
-                            entry, stop, target, exit_price, pnl)
+                            entry, stop, target, exit_price, pnl,
+                            pattern, pattern_id, confidence, contact_event)
       - portfolio_ledger(id, trade_id, action, price, timestamp)
 
     Public methods expected by the engine:
       - execute_trade(trade: dict) -> int
       - close_trade(trade: dict, exit_price: float) -> bool
       - get_open_positions() -> List[dict]
+      - get_position(trade_id) -> Optional[dict]
+      - get_portfolio() -> dict            (API view)
+      - reconcile()                        (flush + reload from DB)
     """
 
-    def __init__(self, db_path: str = DB_PATH):
+    def __init__(self, db_path: str = DB_PATH, reload_interval: Optional[float] = None):
         self.db_path = db_path
+        self.reload_interval = reload_interval
         self._ensure_schema()
-        self.open_positions: List[Dict] = []
-        self._reload_open_positions()
+        self._lock = threading.RLock()
+        self._positions: Dict[int, Dict] = {}
+        self._by_key: Dict[Tuple[str, str], List[int]] = {}
+        self._loaded_at = 0.0
+        self._writer = None
+        self.reconcile()
 
     # ---------- SQLite helpers ----------
 
     def _conn(self):
-        # small timeout for engine+API concurrent access
-        con = sqlite3.connect(self.db_path, timeout=5)
-        con.execute("PRAGMA busy_timeout=5000;")
-        return con
+        # per-thread pooled connection (see storage.py) — don't close it
+        return get_connection(self.db_path)
 
     def _ensure_schema(self):
-        con = self._conn()
-        cur = con.cursor()
-
-        # portfolio_positions
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS portfolio_positions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            opened_at   TEXT,
-            closed_at   TEXT,
-            symbol      TEXT,
-            side        TEXT,       -- 'long' | 'short'
-            qty         REAL,
-            entry       REAL,
-            stop        REAL,
-            target      REAL,
-            exit_price  REAL,
-            pnl         REAL
-        )
-        """)
-
-        # portfolio_ledger
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS portfolio_ledger (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            trade_id    INTEGER,
-            action      TEXT,       -- 'OPEN' | 'CLOSE'
-            price       REAL,
-            timestamp   TEXT
-        )
-        """)
-
-        con.commit()
-        con.close()
-
-    def _reload_open_positions(self):
-        """Refresh in-memory open positions from DB."""
-        con = self._conn()
-        cur = con.cursor()
+        # portfolio_positions / portfolio_ledger are created by migrate.py;
+        # once the DB is current this is a single cached version check.
+        migrate.migrate(self.db_path)
+
+    def _submit(self, sql, params):
+        if self._writer is None:
+            self._writer = get_writer(self.db_path)
+        self._writer.submit(sql, params)
+
+    def reconcile(self):
+        """Flush queued writes, then rebuild the book from portfolio_positions."""
+        if self._writer is not None:
+            self._writer.flush()
+        cur = self._conn().cursor()
         cur.execute("""
-            SELECT id, symbol, side, qty, entry, stop, target
+            SELECT id, opened_at, symbol, side, qty, entry, stop, target,
+                   pattern, pattern_id, confidence, contact_event
               FROM portfolio_positions
              WHERE closed_at IS NULL
              ORDER BY id ASC
         """)
         rows = cur.fetchall()
-        con.close()
 
-        self.open_positions = []
-        for pid, sym, side, qty, entry, stop, target in rows:
-            self.open_positions.append({
-                "id": pid,
-                "symbol": sym,
-                "direction": side,
-                "qty": qty if qty is not None else 1.0,
-                "entry_price": entry,
-                "stop": stop,
-                "target": target,
-            })
+        with self._lock:
+            self._positions.clear()
+            self._by_key.clear()
+            for pid, opened_at, sym, side, qty, entry, stop, target, pattern, pattern_id, conf, event in rows:
+                self._add({
+                    "id": pid,
+                    "symbol": sym,
+                    "direction": side,
+                    "qty": qty if qty is not None else 1.0,
+                    "entry_price": entry,
+                    "entry_time": opened_at,
+                    "stop": stop,
+                    "target": target,
+                    "pattern": pattern,
+                    "pattern_id": pattern_id,
+                    "confidence": conf,
+                    "contact_event": _load_event(event),
+                })
+            self._loaded_at = time.monotonic()
+
+    def _maybe_reload(self):
+        if self.reload_interval is not None and time.monotonic() - self._loaded_at >= self.reload_interval:
+            self.reconcile()
+
+    # ---------- book helpers (call with the lock held) ----------
+
+    def _add(self, pos: Dict):
+        # Fields the exit path reads; rows opened before they were persisted lack them
+        for key in ("contract", "pattern", "pattern_id", "confidence", "contact_event"):
+            pos.setdefault(key, None)
+        self._positions[pos["id"]] = pos
+        self._by_key.setdefault((pos["symbol"], pos["direction"]), []).append(pos["id"])
+
+    def _remove(self, trade_id: int) -> Optional[Dict]:
+        pos = self._positions.pop(trade_id, None)
+        if pos is not None:
+            ids = self._by_key.get((pos["symbol"], pos["direction"]), [])
+            if trade_id in ids:
+                ids.remove(trade_id)
+            if not ids:
+                self._by_key.pop((pos["symbol"], pos["direction"]), None)
+        return pos
 
     # ---------- Public API used by the engine ----------
 
+    @property
+    def open_positions(self) -> List[Dict]:
+        return self.get_open_positions()
+
     def get_open_positions(self) -> List[Dict]:
-        """Return open positions in the shape the engine/UI expect."""
-        self._reload_open_positions()
-        return list(self.open_positions)
+        """Copies of the open positions, oldest first (safe to read from any thread)."""
+        self._maybe_reload()
+        with self._lock:
+            return [dict(p) for p in self._positions.values()]
+
+    def get_position(self, trade_id: int) -> Optional[Dict]:
+        with self._lock:
+            pos = self._positions.get(trade_id)
+            return dict(pos) if pos is not None else None
+
+    def get_portfolio(self) -> Dict:
+        """API view of the book (copies; callers may annotate them)."""
+        positions = self.get_open_positions()
+        return {"open_positions": positions, "open_count": len(positions)}
 
     def execute_trade(self, trade: Dict) -> int:
         """
-        Open a position and write an OPEN ledger row.
+        Open a position: insert its row (for the id) and queue an OPEN ledger row.
 
         trade dict should include:
           symbol, direction('long'|'short'), entry_price, entry_time (ISO)
-          optional: qty, stop, target
+          optional: qty, stop, target, pattern, pattern_id, confidence, contact_event
         """
         # Ensure contract key exists to avoid KeyError elsewhere
         trade.setdefault("contract", None)
@@ -133,114 +180,91 @@ class PortfolioTracker:
         stop      = float(trade.get("stop", entry - 0.50))
         target    = float(trade.get("target", entry + 0.80))
 
-        con = self._conn()
-        cur = con.cursor()
-
-        # Insert position
-        cur.execute("""
-            INSERT INTO portfolio_positions (opened_at, symbol, side, qty, entry, stop, target)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (opened_at, symbol, side, qty, entry, stop, target))
-        trade_id = cur.lastrowid
+        pattern_id = trade.get("pattern_id")
+        confidence = trade.get("confidence")
+        event = trade.get("contact_event")
+
+        # Synchronous insert (opens are rare): SQLite assigns the id, so no
+        # other writer can collide with it
+        conn = self._conn()
+        with conn:
+            trade_id = conn.execute("""
+                INSERT INTO portfolio_positions (opened_at, symbol, side, qty, entry, stop, target,
+                                                 pattern, pattern_id, confidence, contact_event)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (opened_at, symbol, side, qty, entry, stop, target, trade.get("pattern"),
+                  None if pattern_id is None else str(pattern_id),
+                  None if confidence is None else float(confidence),
+                  None if event is None else json.dumps(event, default=str))).lastrowid
+
+        with self._lock:
+            self._add({
+                "id": trade_id,
+                "symbol": symbol,
+                "direction": side,
+                "qty": qty,
+                "entry_price": entry,
+                "entry_time": opened_at,
+                "stop": stop,
+                "target": target,
+                "contract": trade.get("contract"),
+                "pattern": trade.get("pattern"),
+                "pattern_id": pattern_id,
+                "confidence": confidence,
+                "contact_event": event,
+            })
 
-        # Ledger OPEN
-        cur.execute("""
+        self._submit("""
             INSERT INTO portfolio_ledger (trade_id, action, price, timestamp)
             VALUES (?, 'OPEN', ?, ?)
         """, (trade_id, entry, opened_at))
 
-        con.commit()
-        con.close()
-
         trade["portfolio_trade_id"] = trade_id
-
-        # Update in-memory snapshot
-        self._upsert_open({
-            "id": trade_id,
-            "symbol": symbol,
-            "direction": side,
-            "qty": qty,
-            "entry_price": entry,
-            "stop": stop,
-            "target": target
-        })
-
         _ping("portfolio tracker", f"OPEN {symbol} {side} @ {entry}")
         return trade_id
 
     def close_trade(self, trade: Dict, exit_price: float) -> bool:
         """
-        Close a position by trade dict and write a CLOSE ledger row.
-        If 'portfolio_trade_id' not present, match most recent open for (symbol, direction).
+        Close a position by trade dict and queue the close plus a CLOSE ledger row.
+        If neither 'portfolio_trade_id' nor 'id' is present, close the most
+        recent open position for (symbol, direction).
         """
         # NEW: ensure contract key exists here too (symmetric with execute_trade)
         trade.setdefault("contract", None)  # ← added safeguard
 
-        trade_id: Optional[int] = trade.get("portfolio_trade_id")
-
-        con = self._conn()
-        cur = con.cursor()
-
-        if not trade_id:
-            # Find by symbol+side (most recent open)
-            cur.execute("""
-                SELECT id FROM portfolio_positions
-                 WHERE closed_at IS NULL AND symbol = ? AND side = ?
-              ORDER BY id DESC LIMIT 1
-            """, (trade["symbol"], trade.get("direction", "long")))
-            row = cur.fetchone()
-            if row:
-                trade_id = int(row[0])
-            else:
-                con.close()
-                return False
-
-        # Fetch entry & side for PnL calc
-        cur.execute("SELECT entry, side FROM portfolio_positions WHERE id = ?", (trade_id,))
-        row = cur.fetchone()
-        if not row:
-            con.close()
+        # Engine trade dicts carry portfolio_trade_id; dicts from get_open_positions carry id
+        trade_id: Optional[int] = trade.get("portfolio_trade_id") or trade.get("id")
+        closed_at = trade.get("exit_time", datetime.utcnow().isoformat())
+
+        with self._lock:
+            if not trade_id:
+                ids = self._by_key.get((trade["symbol"], trade.get("direction", "long")))
+                if not ids:
+                    return False
+                trade_id = ids[-1]
+            pos = self._remove(trade_id)
+        if pos is None:
             return False
 
-        entry, side = float(row[0]), row[1]
+        entry, side = float(pos["entry_price"]), pos["direction"]
         sign = 1.0 if side == "long" else -1.0
         pnl_pct = sign * (float(exit_price) - entry) / entry
-        closed_at = trade.get("exit_time", datetime.utcnow().isoformat())
 
-        # Update position with close data
-        cur.execute("""
+        self._submit("""
             UPDATE portfolio_positions
                SET closed_at = ?, exit_price = ?, pnl = ?
              WHERE id = ?
         """, (closed_at, float(exit_price), float(pnl_pct), trade_id))
-
-        # Ledger CLOSE
-        cur.execute("""
+        self._submit("""
             INSERT INTO portfolio_ledger (trade_id, action, price, timestamp)
             VALUES (?, 'CLOSE', ?, ?)
         """, (trade_id, float(exit_price), closed_at))
 
-        con.commit()
-        con.close()
-
-        # Reflect in memory and annotate trade dict
-        self._remove_open(trade_id)
+        # Annotate trade dict
         trade["portfolio_trade_id"] = trade_id
         trade["pnl"] = pnl_pct
         trade["exit_price"] = float(exit_price)
         trade["exit_time"] = closed_at
 
-        _ping("portfolio tracker", f"CLOSE {trade.get('symbol','?')} {side} pnl {pnl_pct:.4f}")
+        _ping("portfolio tracker", f"CLOSE {trade.get('symbol', pos['symbol'])} {side} pnl {pnl_pct:.4f}")
         return True
-
-    # ---------- in-memory mirror helpers ----------
-
-    def _upsert_open(self, pos: Dict):
-        for i, p in enumerate(self.open_positions):
-            if p["id"] == pos["id"]:
-                self.open_positions[i] = pos
-                return
-        self.open_positions.append(pos)
-
-    def _remove_open(self, trade_id: int):
-        self.open_positions = [p for p in self.open_positions if p["id"] != trade_id]
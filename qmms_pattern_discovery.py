@@ -2,33 +2,35 @@
 
 from contact_event_evaluator import evaluate_contact  # ✅ correct usage
 from diagnostic_state import diagnostic_monitor       # ✅ correct source
+from level_index import LevelIndex
 import datetime
 
 class PatternDiscoveryEngine:
     def __init__(self):
         self.contact_history = {}  # key: level price, value: [timestamps]
 
-    def discover(self, features, levels):
+    def discover(self, features, levels, snapshot=None):
         try:
             current_price = features.get("price")
+            if current_price is None and snapshot is not None:
+                current_price = snapshot.price
             if current_price is None:
                 return None
 
             # Search for the nearest level within a tight window
             window = 0.3  # adjustable
-            triggered_level = None
-            print(f"\n🔍 Scanning for contact at price: {current_price}")
-            for level in levels:
-                dist = abs(current_price - level["price"])
-                print(f"  🔸 Level: {level['price']} ({level['color']} {level['type']}) → Δ = {dist:.3f}")
-                if dist <= window:
-                    print("    ✅ Within contact range!")
-                    triggered_level = level
-                    break
+            if snapshot is not None and snapshot.level_index is not None:
+                index = snapshot.level_index
+            else:
+                index = LevelIndex(levels)
+            triggered_level = index.nearest(current_price, window)
 
             if not triggered_level:
                 return None  # No level contacted
 
+            print(f"🔍 Contact at {current_price}: {triggered_level['color']} {triggered_level['type']} "
+                  f"L{triggered_level['price']} (Δ = {abs(current_price - triggered_level['price']):.3f})")
+
             # Determine contact order
             level_key = triggered_level["price"]
             now = datetime.datetime.now()
@@ -22,11 +22,15 @@ class PatternRecognizer:
         self.feature_engineer = FeatureEngineer(self.context)
         self.pattern_discovery = PatternDiscoveryEngine()
 
-    def analyze(self, symbol):
+    def analyze(self, symbol, snapshot=None):
         try:
-            # Load current price and today’s levels
-            current_price = get_latest_price(symbol)
-            levels = get_today_levels(symbol) or self.levels
+            # Use the engine's tick snapshot when given; only fetch on standalone calls
+            if snapshot is not None:
+                current_price = snapshot.price
+                levels = snapshot.levels or self.levels
+            else:
+                current_price = get_latest_price(symbol)
+                levels = get_today_levels(symbol) or self.levels
 
             if not levels or current_price is None:
                 raise ValueError("Missing price or levels")
@@ -35,7 +39,7 @@ class PatternRecognizer:
             features = self.feature_engineer.extract_features(current_price, levels)
 
             # Step 2: Run discovery engine
-            discovered = self.pattern_discovery.discover(features, levels)
+            discovered = self.pattern_discovery.discover(features, levels, snapshot=snapshot)
 
             # Step 3: Store pattern if found
             if discovered:
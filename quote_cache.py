@@ -0,0 +1,142 @@
+# quote_cache.py — last-quote cache shared between engine and API via a memory-mapped file
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+QUOTE_CACHE_PATH = os.environ.get("QMMX_QUOTE_CACHE", "qmmx_quotes.mmap")
+# Quotes older than this (seconds since the engine wrote them) are treated as stale
+QUOTE_MAX_AGE = float(os.environ.get("Q_QUOTE_MAX_AGE", "3"))
+
+_MAGIC = b"QMMXQC01"
+_HEADER = struct.Struct("<8sI")                 # magic, slot count
+_SLOT = struct.Struct("<Q16sdddd")              # seq, symbol, price, volume, quote ts, written ts
+_SEQ = struct.Struct("<Q")
+_HEADER_SIZE = 64
+_SLOT_SIZE = 64
+
+
+class QuoteCache:
+    """
+    Fixed-size table of per-symbol last quotes in a memory-mapped file.
+
+    The engine is the only writer: it `put()`s every quote it fetches, and
+    the Flask process `get()`s them with a staleness bound and only goes to
+    Polygon on a miss (without writing back). Each slot is guarded by a
+    sequence counter (odd while a write is in progress), so readers retry
+    instead of seeing a torn price/timestamp pair, and the stored symbol is
+    checked inside that read so a stale slot lookup is a miss, never another
+    symbol's price. Slots are found by hashing the symbol with linear probing.
+    """
+
+    def __init__(self, path=QUOTE_CACHE_PATH, slots=256):
+        self.path = path
+        self.slots = slots
+        size = _HEADER_SIZE + slots * _SLOT_SIZE
+
+        with open(path, "a+b") as f:
+            if os.path.getsize(path) < size:
+                f.truncate(size)
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), size)
+
+        magic, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            _HEADER.pack_into(self._mm, 0, _MAGIC, slots)
+        elif count != slots:
+            self.slots = min(count, slots)
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def _offset(self, slot):
+        return _HEADER_SIZE + slot * _SLOT_SIZE
+
+    def _stored_key(self, slot):
+        return _SLOT.unpack_from(self._mm, self._offset(slot))[1].rstrip(b"\0")
+
+    def _find_slot(self, symbol, create):
+        key = symbol.encode("utf-8")[:16]
+        slot = self._index.get(symbol)
+        if slot is not None:
+            if self._stored_key(slot) == key or (create and not self._stored_key(slot)):
+                return slot
+            del self._index[symbol]  # slot was reclaimed (cache file recreated); rescan
+        start = zlib.crc32(key) % self.slots
+        for i in range(self.slots):
+            slot = (start + i) % self.slots
+            stored = self._stored_key(slot)
+            if stored == key:
+                self._index[symbol] = slot
+                return slot
+            if not stored:
+                if not create:
+                    return None
+                self._index[symbol] = slot
+                return slot
+        return None
+
+    def put(self, symbol, price, volume=None, timestamp=None):
+        if price is None:
+            return
+        now = time.time()
+        with self._lock:
+            slot = self._find_slot(symbol, create=True)
+            if slot is None:
+                return  # table full
+            off = self._offset(slot)
+            seq = _SEQ.unpack_from(self._mm, off)[0]
+            if seq % 2:
+                seq += 1  # a writer died mid-update; resync to even
+            _SEQ.pack_into(self._mm, off, seq + 1)
+            _SLOT.pack_into(self._mm, off, seq + 1, symbol.encode("utf-8")[:16], float(price),
+                            float(volume) if volume is not None else float("nan"),
+                            float(timestamp) if timestamp is not None else now, now)
+            _SEQ.pack_into(self._mm, off, seq + 2)
+
+    def get(self, symbol, max_age=QUOTE_MAX_AGE):
+        """
+        Returns {"price", "volume", "timestamp", "age"} or None when the symbol
+        is missing or the quote is older than max_age seconds.
+        """
+        slot = self._find_slot(symbol, create=False)
+        if slot is None:
+            return None
+        off = self._offset(slot)
+        for _ in range(100):
+            seq1, stored, price, volume, ts, written = _SLOT.unpack_from(self._mm, off)
+            if seq1 % 2 == 0 and _SEQ.unpack_from(self._mm, off)[0] == seq1:
+                break
+        else:
+            return None
+        if stored.rstrip(b"\0") != symbol.encode("utf-8")[:16]:
+            self._index.pop(symbol, None)  # next lookup rescans
+            return None
+        age = time.time() - written
+        if max_age is not None and age > max_age:
+            return None
+        return {
+            "price": price,
+            "volume": None if volume != volume else volume,  # NaN → unknown
+            "timestamp": ts,
+            "age": age,
+        }
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_quote_cache():
+    """Process-wide QuoteCache on QUOTE_CACHE_PATH (opened on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QuoteCache()
+        return _cache
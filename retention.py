@@ -0,0 +1,213 @@
+# retention.py — move old log rows out of SQLite into date-partitioned Parquet
+#
+#   archive/<table>/date=YYYY-MM-DD/part-<first id>-<last id>.parquet
+#
+# The engine runs RetentionJob in the background; `python retention.py` runs
+# one pass by hand. query_rows() reads archived and live rows together.
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from heartbeat import heartbeat
+from storage import get_connection
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: without it nothing is archived (and nothing deleted)
+    pa = pq = None
+
+ARCHIVE_DIR = os.environ.get("QMMX_ARCHIVE_DIR", "archive")
+# Rows older than this many days (by their timestamp column) leave the live DB
+RETENTION_DAYS = int(os.environ.get("Q_RETENTION_DAYS", "14"))
+# Rows moved per SELECT/write/DELETE round (keeps each write transaction short)
+RETENTION_BATCH = int(os.environ.get("Q_RETENTION_BATCH", "5000"))
+# Seconds between background passes
+RETENTION_INTERVAL_SEC = float(os.environ.get("Q_RETENTION_INTERVAL_SEC", "3600"))
+COMPRESSION = os.environ.get("Q_ARCHIVE_COMPRESSION", "zstd")
+
+# table -> (timestamp column, retention days or None for RETENTION_DAYS)
+RETENTION_TABLES = {
+    "contact_events": ("timestamp", None),
+    "trade_recommendations": ("timestamp", None),
+    "module_status": ("ts", None),
+    "upgrade_score": ("timestamp", None),
+    "false_missed_analysis": ("timestamp", None),
+    # get_resilience_score only looks at recent outcomes; same window purge_old_resilience_data used
+    "pattern_resilience": ("timestamp", 30),
+}
+
+_ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64"}
+
+
+def _cutoff(days, now=None):
+    # Whole days: "< YYYY-MM-DD" sorts correctly for both ISO ("T") and "YYYY-MM-DD HH:MM:SS" stamps
+    return ((now or datetime.utcnow()) - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def _columns(conn, table):
+    return [(r[1], (r[2] or "").upper()) for r in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _arrow_table(columns, rows):
+    arrays, fields = [], []
+    for i, (name, decl) in enumerate(columns):
+        kind = _ARROW_TYPES.get(decl, "string")
+        values = [row[i] for row in rows]
+        if kind == "string":
+            values = [None if v is None else str(v) for v in values]
+        elif kind == "int64":
+            values = [None if v is None else int(v) for v in values]
+        else:
+            values = [None if v is None else float(v) for v in values]
+        arrays.append(pa.array(values, type=getattr(pa, kind)()))
+        fields.append(name)
+    return pa.Table.from_arrays(arrays, names=fields)
+
+
+def _write_partition(table, day, columns, rows, archive_dir):
+    directory = os.path.join(archive_dir, table, f"date={day}")
+    os.makedirs(directory, exist_ok=True)
+    ids = [row[0] for row in rows]
+    path = os.path.join(directory, f"part-{min(ids)}-{max(ids)}.parquet")
+    tmp = path + ".tmp"
+    pq.write_table(_arrow_table(columns, rows), tmp, compression=COMPRESSION)
+    os.replace(tmp, path)  # a re-run of the same batch overwrites instead of duplicating
+    return path
+
+
+def archive_table(table, ts_column, days=RETENTION_DAYS, batch_size=RETENTION_BATCH,
+                  archive_dir=ARCHIVE_DIR, db_path=None, now=None):
+    """
+    Move rows of `table` older than `days` into Parquet, `batch_size` rows at a
+    time (write file, then delete the same id range). Returns rows moved.
+    """
+    if pq is None:
+        raise RuntimeError("Archiving needs the 'pyarrow' package (pip install pyarrow)")
+    conn = get_connection(db_path)
+    columns = _columns(conn, table)
+    if not columns or columns[0][0] != "id" or ts_column not in {c[0] for c in columns}:
+        return 0
+    cutoff = _cutoff(days, now)
+    moved = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT * FROM {table} WHERE {ts_column} < ? ORDER BY id LIMIT ?", (cutoff, batch_size)
+        ).fetchall()
+        if not rows:
+            break
+        ts_index = [c[0] for c in columns].index(ts_column)
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(str(row[ts_index])[:10], []).append(row)
+        for day, day_rows in by_day.items():
+            _write_partition(table, day, columns, day_rows, archive_dir)
+
+        # Exactly the rows just selected: lowest ids with ts < cutoff
+        with conn:
+            conn.execute(f"DELETE FROM {table} WHERE id BETWEEN ? AND ? AND {ts_column} < ?",
+                         (rows[0][0], rows[-1][0], cutoff))
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
+
+
+def run_retention(days=None, batch_size=RETENTION_BATCH, archive_dir=ARCHIVE_DIR, db_path=None, now=None):
+    """One pass over RETENTION_TABLES. Returns {table: rows moved}."""
+    if pq is None:
+        print("⚠️ Retention skipped: pyarrow not installed")
+        return {}
+    moved = {}
+    for table, (ts_column, table_days) in RETENTION_TABLES.items():
+        window = days if days is not None else (table_days or RETENTION_DAYS)
+        try:
+            moved[table] = archive_table(table, ts_column, window, batch_size, archive_dir, db_path, now)
+        except Exception as e:
+            print(f"⚠️ Retention failed for {table}:", e)
+    if any(moved.values()):
+        # Let the WAL shrink back now that pages were freed
+        get_connection(db_path).execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        print("🗄️ Archived rows:", {t: n for t, n in moved.items() if n})
+    heartbeat.beat("retention", f"{sum(moved.values())} rows archived")
+    return moved
+
+
+def query_rows(table, since=None, until=None, archive_dir=ARCHIVE_DIR, db_path=None):
+    """
+    Rows of `table` with since <= timestamp < until from the Parquet archive
+    and the live DB, as dicts in timestamp order. Bounds are strings in the
+    table's timestamp format (a bare "YYYY-MM-DD" works for both formats).
+    """
+    ts_column = RETENTION_TABLES[table][0]
+    rows = []
+
+    base = os.path.join(archive_dir, table)
+    if pq is not None and os.path.isdir(base):
+        for part in sorted(os.listdir(base)):
+            if not part.startswith("date="):
+                continue
+            day = part[5:]
+            if (since and day < since[:10]) or (until and day > until[:10]):
+                continue
+            directory = os.path.join(base, part)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".parquet"):
+                    rows.extend(pq.read_table(os.path.join(directory, name)).to_pylist())
+
+    cursor = get_connection(db_path).cursor()
+    clauses, params = [], []
+    if since:
+        clauses.append(f"{ts_column} >= ?")
+        params.append(since)
+    if until:
+        clauses.append(f"{ts_column} < ?")
+        params.append(until)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor.execute(f"SELECT * FROM {table}{where}", params)
+    names = [d[0] for d in cursor.description]
+    live = [dict(zip(names, r)) for r in cursor.fetchall()]
+
+    rows = [r for r in rows
+            if (not since or str(r[ts_column]) >= since) and (not until or str(r[ts_column]) < until)]
+    rows.extend(live)
+    rows.sort(key=lambda r: (str(r[ts_column]), r["id"]))
+    return rows
+
+
+class RetentionJob:
+    """Background thread running run_retention() every `interval` seconds."""
+
+    def __init__(self, interval=RETENTION_INTERVAL_SEC, **kwargs):
+        self.interval = interval
+        self.kwargs = kwargs
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                run_retention(**self.kwargs)
+            except Exception as e:
+                print("⚠️ Retention pass failed:", e)
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old QMMX log rows to Parquet")
+    parser.add_argument("--days", type=int, default=None, help=f"override every table's window (default {RETENTION_DAYS})")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+    print(run_retention(days=args.days, archive_dir=args.archive_dir))
@@ -1,13 +1,12 @@
 # routes_patch.py — drop-in Blueprint for QMMX API additions
 from flask import Blueprint, jsonify, request
-import sqlite3, os
 from upgrade_monitor import track_module_impact, get_upgrade_status
+from storage import get_connection
 
-DB_PATH = os.environ.get("QMMX_DB_PATH", "qmmx.db")
 bp = Blueprint('qmmx_patch', __name__)
 
 def _db():
-    return sqlite3.connect(DB_PATH)
+    return get_connection()
 
 @bp.route('/health')
 def health():
@@ -24,5 +23,4 @@ def predictions_current():
     cur.execute("""SELECT ts,horizon,target,prob,expected_return,model_version
                   FROM predictions WHERE symbol=? ORDER BY id DESC LIMIT 10""", (symbol,))
     rows=[{"ts":ts,"horizon":h,"target":t,"prob":p,"expected_return":er,"model":mv} for ts,h,t,p,er,mv in cur.fetchall()]
-    conn.close()
     return jsonify({"ok": True, "symbol": symbol, "predictions": rows, "status": "warming_up" if not rows else "live"})
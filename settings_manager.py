@@ -1,21 +1,6 @@
-import json
-import os
-
-SETTINGS_FILE = "settings.json"
-
-def load_settings():
-    if not os.path.exists(SETTINGS_FILE):
-        return {}
-    try:
-        with open(SETTINGS_FILE, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading settings: {e}")
-        return {}
+# settings_manager.py — compatibility wrapper over the cached settings_store
+from settings_store import SETTINGS_FILE, settings_store, load_settings
 
 def save_settings(settings):
-    try:
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(settings, f, indent=4)
-    except Exception as e:
-        print(f"Error saving settings: {e}")
+    if not settings_store.save(settings):
+        print("Error saving settings")
@@ -0,0 +1,107 @@
+# settings_store.py — cached, file-watched settings service
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from heartbeat import heartbeat
+
+SETTINGS_FILE = os.environ.get("QMMX_SETTINGS", "settings.json")
+# Minimum seconds between stat() calls on the settings file per process
+CHECK_INTERVAL_SEC = float(os.environ.get("Q_SETTINGS_CHECK_SEC", "0.5"))
+
+
+class SettingsStore:
+    """
+    Holds the parsed settings.json in memory.
+
+    `get()` returns a copy of the cached dict and only re-reads the file when
+    its mtime/size changes (checked at most every `check_interval` seconds),
+    so other processes pick up saved API keys without a restart.
+    `save()` writes atomically (temp file + rename) and refreshes the cache.
+    """
+
+    def __init__(self, path=SETTINGS_FILE, check_interval=CHECK_INTERVAL_SEC):
+        self.path = path
+        self.check_interval = check_interval
+        self._data = {}
+        self._signature = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _reload(self, signature):
+        if signature is None:
+            self._data = {}
+        else:
+            try:
+                with open(self.path, "r") as f:
+                    self._data = json.load(f)
+            except Exception as e:
+                print(f"Error loading settings: {e}")
+                return  # keep the last good copy (e.g. caught mid-write by another tool)
+        self._signature = signature
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                signature = self._stat_signature()
+                if signature != self._signature:
+                    self._reload(signature)
+            return dict(self._data)
+
+    def save(self, settings):
+        """Atomically replace the settings file with `settings`. Returns True on success."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._lock:
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix=".settings.", suffix=".tmp", dir=directory)
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(settings, f, indent=4)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.path)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+            except Exception as e:
+                print(f"Error saving settings: {e}")
+                return False
+
+            self._data = dict(settings)
+            self._signature = self._stat_signature()
+            self._checked_at = time.monotonic()
+
+        heartbeat.beat("settings_store")
+        return True
+
+    def update(self, **changes):
+        """Merge `changes` into the current settings and save."""
+        settings = self.get()
+        settings.update(changes)
+        return self.save(settings)
+
+
+# Shared store for this process
+settings_store = SettingsStore()
+
+
+def load_settings():
+    return settings_store.get()
+
+
+def save_settings(api_key, phones):
+    """API entry point used by POST /settings."""
+    return settings_store.update(polygon_api_key=api_key, alert_phone_numbers=phones)
@@ -0,0 +1,122 @@
+# storage.py — single place that opens SQLite connections for the engine, API and tools
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# QMMX_DB is what app.py always read; QMMX_DB_PATH is what migrate/routes_patch read.
+DB_PATH = os.environ.get("QMMX_DB") or os.environ.get("QMMX_DB_PATH") or "qmmx.db"
+MEMORY_DB_PATH = os.environ.get("QMMX_MEMORY_DB", "qmmx_memory.db")
+
+# How long a connection waits on another process's write lock before "database is locked"
+BUSY_TIMEOUT_MS = int(os.environ.get("Q_DB_BUSY_TIMEOUT_MS", "10000"))
+# Bytes of the database file read through mmap instead of read() calls
+MMAP_SIZE = int(os.environ.get("Q_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Page cache per connection in KiB (passed to SQLite as a negative cache_size)
+CACHE_SIZE_KB = int(os.environ.get("Q_DB_CACHE_KB", "16384"))
+
+# Idle connections kept for short-lived threads (Flask request threads) to reuse
+POOL_SIZE = int(os.environ.get("Q_DB_POOL_SIZE", "8"))
+
+_local = threading.local()
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+def configure(conn):
+    """Apply the shared pragmas to an open connection."""
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS};")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE};")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB};")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    return conn
+
+
+def connect(db_path=None, check_same_thread=True):
+    """
+    New, caller-owned connection with the shared pragmas.
+    Use for dedicated threads (db_writer) and one-off scripts; close it yourself.
+    """
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000.0,
+                           check_same_thread=check_same_thread)
+    return configure(conn)
+
+
+def _checkout(path):
+    with _pool_lock:
+        idle = _pool.get(path)
+        if idle:
+            return idle.pop()
+    # Pooled connections move between threads, one thread at a time
+    return connect(path, check_same_thread=False)
+
+
+def _checkin(path, conn):
+    try:
+        if conn.in_transaction:
+            conn.rollback()  # never hand the next thread an open transaction / write lock
+    except sqlite3.Error:
+        conn.close()
+        return
+    with _pool_lock:
+        idle = _pool.setdefault(path, [])
+        if len(idle) < POOL_SIZE:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def get_connection(db_path=None):
+    """
+    This thread's cached connection to `db_path` (DB_PATH by default).
+
+    The connection lives as long as the thread (or until
+    release_thread_connections()): don't close() it. Wrap writes in
+    `with conn:` so they commit (or roll back) and never leave the write
+    lock held. Set row_factory on a cursor, not on the shared connection.
+    """
+    path = db_path or DB_PATH
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = conns[path] = _checkout(path)
+    return conn
+
+
+@contextmanager
+def pooled_connection(db_path=None):
+    """A pooled connection for the duration of the block (e.g. a streamed response body)."""
+    path = db_path or DB_PATH
+    conn = _checkout(path)
+    try:
+        yield conn
+    finally:
+        _checkin(path, conn)
+
+
+def release_thread_connections():
+    """
+    Return the calling thread's cached connections to the pool (rolled back
+    if a transaction was left open). Call at the end of short-lived threads,
+    e.g. from Flask's teardown_request.
+    """
+    conns = getattr(_local, "conns", None) or {}
+    for path, conn in conns.items():
+        _checkin(path, conn)
+    conns.clear()
+
+
+def close_thread_connections():
+    """Close the calling thread's cached connections (tests / thread teardown)."""
+    conns = getattr(_local, "conns", None) or {}
+    for conn in conns.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    conns.clear()
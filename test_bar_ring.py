@@ -0,0 +1,51 @@
+from bar_ring import BarRing
+
+T0 = 1_755_000_000 // 60 * 60
+
+
+def test_quotes_fold_into_bars_and_reader_sees_them(tmp_path):
+    path = str(tmp_path / "SPY.ring")
+    writer = BarRing(path, capacity=8, bar_sec=60)
+    reader = BarRing(path, readonly=True)
+
+    writer.update(T0 + 1, 645.10, 100)
+    writer.update(T0 + 30, 645.20, 50)   # same minute: close/volume updated in place
+    writer.update(T0 + 61, 645.05)       # next minute, no volume (REST poll)
+    writer.update(T0 + 20, 640.00, 999)  # late quote for a closed bar is ignored
+
+    times, prices, volumes = reader.last(10)
+    assert list(times) == [T0, T0 + 60]
+    assert list(prices) == [645.20, 645.05]
+    assert list(volumes) == [150, 0]
+
+
+def test_capacity_bounds_history(tmp_path):
+    ring = BarRing(str(tmp_path / "QQQ.ring"), capacity=4, bar_sec=60)
+    ring.extend((T0 + 60 * i, 500.0 + i, 1) for i in range(10))
+
+    times, prices, _ = ring.last(60)
+    assert len(ring) == 4 and ring.written == 10
+    assert list(prices) == [506.0, 507.0, 508.0, 509.0]
+    assert list(ring.last(2)[0]) == [T0 + 480, T0 + 540]
+
+
+def test_streamed_trades_and_aggregates_count_volume_once(tmp_path):
+    from market_stream import PolygonStream, TickBuffer, parse_events
+
+    ring = BarRing(str(tmp_path / "SPY.ring"), capacity=8, bar_sec=60)
+    ms = (T0 + 1) * 1000
+    events = [
+        {"ev": "T", "sym": "SPY", "p": 645.10, "s": 100, "t": ms},
+        {"ev": "Q", "sym": "SPY", "bp": 645.10, "ap": 645.14, "t": ms + 5},
+        {"ev": "T", "sym": "SPY", "p": 645.12, "s": 50, "t": ms + 7},
+        {"ev": "A", "sym": "SPY", "c": 645.12, "v": 150, "s": ms, "e": ms + 1000},  # same 150 shares
+    ]
+    both = PolygonStream(TickBuffer(), channels=("T", "Q", "A"))
+    for tick in parse_events(events):
+        ring.update(tick["timestamp"], tick["price"], both.bar_volume(tick))
+    assert list(ring.last(1)[2]) == [150]
+
+    # Without T, the aggregates carry the volume; gap-fill bars always count
+    aggs = PolygonStream(TickBuffer(), channels=("Q", "A"))
+    assert [aggs.bar_volume(t) for t in parse_events(events)] == [0, 0, 0, 150]
+    assert both.bar_volume({"kind": "A", "volume": 40, "backfill": True}) == 40
@@ -0,0 +1,110 @@
+import importlib.util
+import os
+import random
+import sys
+
+import numpy as np
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load(name):
+    # app/backend modules share names with the root ones; load them by path
+    # (with app/backend importable for their sibling imports, e.g. model_registry)
+    backend = os.path.join(_HERE, "app", "backend")
+    sys.path.insert(0, backend)
+    try:
+        spec = importlib.util.spec_from_file_location(f"app_backend_{name}", os.path.join(backend, f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.remove(backend)
+
+
+def _patterns(n, seed=3):
+    rng = random.Random(seed)
+    return [{
+        "level": 640.0, "color": rng.choice(["blue", "orange", "black", "teal", "red"]),
+        "level_type": rng.choice(["solid", "dashed"]),
+        "dominant_reaction": rng.choice(["rejection", "break", "hold"]),
+        "contact_order": rng.randint(1, 4),
+        "approach_direction": rng.choice(["from_above", "from_below"]),
+        "is_confluence": rng.random() < 0.5,
+    } for _ in range(n)]
+
+
+def test_batch_features_match_single_rows():
+    fe = _load("qmms_feature_engineer").FeatureEngineer(
+        {"volume_norm": 1200.0, "all_levels": [641.3, 630.0, 655.25, 612.8]})
+    patterns = _patterns(200)
+    rng = random.Random(5)
+    prices = [round(rng.uniform(600, 670), 2) for _ in patterns]
+    volumes = [rng.randint(100, 5000) for _ in patterns]
+    stamps = [f"{rng.randint(9, 15)}:{rng.randint(0, 59):02d}:00" for _ in patterns]
+
+    X = fe.extract_features_batch(patterns, prices, volumes, stamps)
+    expected = [fe.extract_features(p, pr, v, t) for p, pr, v, t in zip(patterns, prices, volumes, stamps)]
+    assert X.dtype == np.float32 and X.shape == (200, 12)
+    expected = np.array(expected, dtype=np.float32)
+    # np.round and round() can split a .xxx5 tie differently: allow one unit in the last rounded place
+    np.testing.assert_allclose(X[:, :2], expected[:, :2], atol=1.001e-3)
+    np.testing.assert_array_equal(X[:, 2:], expected[:, 2:])
+
+    # One tick, several patterns: scalars broadcast
+    one = fe.extract_features_batch(patterns[:3], 641.0, 900, "10:15:00")
+    np.testing.assert_array_equal(one[1], np.array(fe.extract_features(patterns[1], 641.0, 900, "10:15:00"), dtype=np.float32))
+
+
+def test_recognize_batch_matches_recognize():
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 12)).astype(np.float32)
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, (X[:, 0] > 0).astype(int))
+    recognizer = _load("qmms_pattern_recognizer").PatternRecognizer(model_path="missing.joblib")
+    recognizer.model = model
+
+    batch = recognizer.recognize_batch(X[:50])
+    assert batch == [recognizer.recognize(row) for row in X[:50]]
+
+
+def test_batch_time_feature_formats():
+    fe = _load("qmms_feature_engineer").FeatureEngineer({})
+    stamps = ["9:45:00", "10:15", "12:00:30.5", "bad", "08:00:00"]
+    got = fe._minutes_since_open_batch(stamps)
+    np.testing.assert_array_equal(got, [fe._minutes_since_open(t) for t in stamps])
+    times = np.array(["2026-01-05T09:45", "2026-01-05T15:59"], dtype="datetime64[ns]")
+    np.testing.assert_array_equal(fe._minutes_since_open_batch(times), [15, 389])
+
+
+def test_batch_score_contacts_matches_single_rows():
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
+    batch_score = _load("batch_score")
+    contacts = pd.DataFrame({
+        "timestamp": ["2026-03-02 10:00:00", "2026-03-02 13:05:00", "2026-03-02 15:30:00"],
+        "level": [600.0, 605.0, 598.5], "entry_price": [600.3, 604.1, None],
+        "level_color": ["blue", "orange", "Teal"], "level_type": ["solid", "dashed", "solid"],
+        "direction": ["from_above", "from_below", None],
+        "reaction": ["rejection", "breakthrough", "hesitation"], "contact_order": [1, 2, 3],
+    })
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(200, 12)).astype(np.float32)
+    recognizer = _load("qmms_pattern_recognizer").PatternRecognizer(model_path="missing.joblib")
+    recognizer.model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, (X[:, 3] > 0).astype(int))
+
+    scored = batch_score.score_contacts(contacts, recognizer)
+    fe = _load("qmms_feature_engineer").FeatureEngineer({"all_levels": [600.0, 605.0, 598.5], "volume_norm": 1.0})
+    singles = [
+        {"level": 600.0, "color": "blue", "level_type": "solid", "dominant_reaction": "rejection",
+         "contact_order": 1, "approach_direction": "from_above"},
+        {"level": 605.0, "color": "orange", "level_type": "dashed", "dominant_reaction": "break",
+         "contact_order": 2, "approach_direction": "from_below"},
+        {"level": 598.5, "color": "teal", "level_type": "solid", "dominant_reaction": "hesitation",
+         "contact_order": 3, "approach_direction": None},
+    ]
+    expected = [recognizer.recognize(fe.extract_features(p, price, 1.0, clock))
+                for p, price, clock in zip(singles, [600.3, 604.1, 598.5], ["10:00", "13:05", "15:30"])]
+    assert scored[["confidence", "label", "model_version"]].to_dict("records") == expected
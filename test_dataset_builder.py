@@ -0,0 +1,75 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset_builder
+import migrate
+from dataset_builder import FEATURE_COLUMNS, build_dataset, label_contacts, to_epoch, training_frame
+
+
+def test_label_contacts_hold_and_break():
+    times = np.arange(0.0, 4000.0, 60.0)
+    prices = np.full(len(times), 101.0)
+    prices[times > 1000] = 99.0          # drops through 100 after ~17 minutes
+    out = label_contacts([0.0, 0.0], [100.0, 100.0], [1.0, -1.0], times, prices)
+    assert out["level_hold_5m"].tolist() == [1.0, 0.0]     # support held; from below it was already through
+    assert out["level_hold_60m"][0] == 0.0 and out["level_break_60m"][0] == 1.0
+    assert out["fwd_ret_15m"][0] == 0.0
+    assert np.isnan(label_contacts([3900.0], [100.0], [1.0], times, prices)["fwd_ret_5m"][0])
+
+
+def test_build_dataset_from_db(tmp_path):
+    db = str(tmp_path / "q.db")
+    migrate.migrate(db)
+    conn = sqlite3.connect(db)
+    conn.executemany(
+        "INSERT INTO contact_events (timestamp, symbol, level_price, direction, reaction, level_color, level_type, contact_order)"
+        " VALUES (?, 'SPY', ?, ?, ?, ?, ?, ?)",
+        [("2026-03-02 10:00:00", 600.0, "from_above", "rejection", "blue", "solid", 1),
+         ("2026-03-02 13:00:00", 605.0, "from_below", "breakthrough", "orange", "dashed", 2)])
+    conn.execute("INSERT INTO trade_recommendations (timestamp, symbol, direction) VALUES ('2026-03-02T10:00:30', 'SPY', 'long')")
+    conn.commit()
+
+    stamps = pd.date_range("2026-03-02 09:30", "2026-03-02 16:00", freq="1min")
+    prices = np.where(stamps < pd.Timestamp("2026-03-02 12:00"), 600.3, 606.0)
+    path = str(tmp_path / "ticks.csv")
+    pd.DataFrame({"timestamp": stamps.strftime("%Y-%m-%d %H:%M:%S"), "price": prices}).to_csv(path, index=False)
+
+    dataset = build_dataset(prices_path=path, db_path=db)
+    assert dataset["level_hold_15m"].tolist() == [1.0, 0.0]
+    assert dataset["level_break_15m"].tolist() == [0.0, 1.0]
+    assert dataset["recommended"].tolist() == [True, False]
+
+    frame = training_frame(dataset)
+    assert list(frame.columns) == FEATURE_COLUMNS + ["label"]
+    first = frame.iloc[0]
+    assert first["level_type_BlueSolid"] == 1 and first["approach_direction_Downward"] == 1
+    assert first["reaction_type_Rejection"] == 1 and first["time_of_day_Morning"] == 1
+    assert frame.iloc[1]["reaction_type_Break"] == 1 and frame.iloc[1]["time_of_day_Midday"] == 1
+
+
+def test_to_epoch_uses_each_rows_dst_offset(monkeypatch):
+    monkeypatch.setattr(dataset_builder, "LOCAL_TZ", "America/New_York")
+    # 2026-03-08 02:00 EST -> 03:00 EDT: rows on either side differ by one wall-clock hour
+    got = to_epoch(["2026-03-08 01:30:00", "2026-03-08 03:30:00", "2026-03-08 12:00:00"])
+    expected = np.array(["2026-03-08T06:30", "2026-03-08T07:30", "2026-03-08T16:00"], dtype="datetime64[s]")
+    expected = expected.astype(np.int64).astype(np.float64)
+    np.testing.assert_array_equal(got, expected)
+    assert to_epoch(["2026-03-08 06:30:00"], utc=True)[0] == expected[0]
+
+
+def test_unreadable_join_fails_the_build(tmp_path):
+    db = str(tmp_path / "q.db")
+    migrate.migrate(db)
+    conn = sqlite3.connect(db)
+    conn.execute("INSERT INTO contact_events (timestamp, symbol, level_price, direction, reaction, level_color, level_type, contact_order)"
+                 " VALUES ('2026-03-02 10:00:00', 'SPY', 600.0, 'from_above', 'rejection', 'blue', 'solid', 1)")
+    conn.execute("DROP TABLE trades")
+    conn.commit()
+    path = str(tmp_path / "ticks.csv")
+    pd.DataFrame({"timestamp": ["2026-03-02 09:59:00", "2026-03-02 10:30:00"], "price": [600.2, 600.4]}).to_csv(path, index=False)
+
+    with pytest.raises(pd.errors.DatabaseError):
+        build_dataset(prices_path=path, db_path=db)
@@ -0,0 +1,28 @@
+import json
+
+from diagnostic_monitor import QDiagnosticMonitor
+from heartbeat import HeartbeatBus, HeartbeatListener
+
+
+def test_beats_and_errors_reach_the_monitor():
+    bus = HeartbeatBus(port=0)
+    bus._thread = object()  # don't start the publisher thread
+    monitor = QDiagnosticMonitor()
+    listener = HeartbeatListener(monitor)
+
+    def deliver():
+        listener.handle(json.dumps({"pid": 1, "beats": bus.snapshot()}).encode("utf-8"))
+
+    bus.beat("portfolio tracker", "OPEN SPY")
+    deliver()
+    assert monitor.status["portfolio_tracker"]["active"]
+
+    bus.error("portfolio_tracker", "No trades found")
+    deliver()
+    status = monitor.status["portfolio_tracker"]
+    assert not status["active"] and status["error"] == "No trades found"
+
+    bus.beat("portfolio_tracker")
+    deliver()
+    assert monitor.status["portfolio_tracker"]["active"]
+    assert monitor.status["portfolio_tracker"]["error"] is None
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_client import PolygonClient
+
+
+class _FakePolygon(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    fail_first = 0
+    delay = 0.0
+    calls = []
+
+    def do_GET(self):
+        cls = type(self)
+        cls.calls.append((self.path, self.client_address[1]))
+        if cls.delay:
+            time.sleep(cls.delay)
+        if len(cls.calls) <= cls.fail_first:
+            status, body = 503, {"status": "ERROR"}
+        else:
+            status, body = 200, {"last": {"price": 645.12}}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    _FakePolygon.calls = []
+    _FakePolygon.fail_first = 0
+    _FakePolygon.delay = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakePolygon)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_reuses_connection_and_records_latency(fake_server):
+    client = PolygonClient(base_url=fake_server)
+    for _ in range(5):
+        obj = client.get_json("/v1/last/stocks/SPY", params={"apiKey": "k"}, endpoint="/v1/last/stocks/{symbol}")
+        assert obj["last"]["price"] == 645.12
+
+    assert len({port for _, port in _FakePolygon.calls}) == 1
+    stats = client.latency_stats()["/v1/last/stocks/{symbol}"]
+    assert stats["count"] == 5 and stats["errors"] == 0
+    assert sum(stats["buckets"].values()) == 5
+
+
+def test_retries_server_errors_with_backoff(fake_server):
+    _FakePolygon.fail_first = 2
+    client = PolygonClient(base_url=fake_server, retries=2, backoff_base=0.01)
+    assert client.get_json("/v1/last/stocks/SPY")["last"]["price"] == 645.12
+    assert len(_FakePolygon.calls) == 3
+    assert client.latency_stats()["/v1/last/stocks/SPY"]["errors"] == 2
+
+
+def test_gives_up_after_retries(fake_server):
+    _FakePolygon.fail_first = 10
+    client = PolygonClient(base_url=fake_server, retries=1, backoff_base=0.01)
+    with pytest.raises(requests.HTTPError):
+        client.get_json("/v1/last/stocks/SPY")
+    assert len(_FakePolygon.calls) == 2
+
+
+def test_read_timeout_does_not_hang(fake_server):
+    _FakePolygon.delay = 0.5
+    client = PolygonClient(base_url=fake_server, timeout=(1.0, 0.1), retries=0)
+    started = time.perf_counter()
+    with pytest.raises(requests.Timeout):
+        client.get("/v1/last/stocks/SPY")
+    assert time.perf_counter() - started < 0.5
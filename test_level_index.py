@@ -0,0 +1,41 @@
+import random
+
+from level_index import LevelIndex
+
+
+def _levels(n, seed=7):
+    rng = random.Random(seed)
+    colors = ["blue", "orange", "black", "teal"]
+    return [
+        {"price": round(rng.uniform(600, 660), 2), "color": rng.choice(colors), "type": rng.choice(["solid", "dashed"])}
+        for _ in range(n)
+    ]
+
+
+def test_within_matches_linear_scan():
+    levels = _levels(400)
+    index = LevelIndex(levels)
+    rng = random.Random(1)
+    for _ in range(2000):
+        price = round(rng.uniform(598, 662), 2)
+        window = rng.choice([0.05, 0.2, 0.3, 0.4])
+        expected = sorted(id(l) for l in levels if abs(price - l["price"]) <= window)
+        assert sorted(id(l) for l in index.within(price, window)) == expected
+
+
+def test_nearest_respects_window():
+    index = LevelIndex([{"price": 645.0, "color": "blue", "type": "solid"},
+                        {"price": 646.0, "color": "teal", "type": "dashed"}])
+    assert index.nearest(645.4)["price"] == 645.0
+    assert index.nearest(645.6)["price"] == 646.0
+    assert index.nearest(645.5, window=0.3) is None
+    assert LevelIndex([]).nearest(645.0) is None
+
+
+def test_from_levels_by_color_tolerates_missing_groups():
+    index = LevelIndex.from_levels_by_color({
+        "blue": {"solid": [645.0], "dashed": [644.5]},
+        "teal": {"solid": [645.1]},
+    })
+    assert len(index) == 3
+    assert [l["color"] for l in index.within(645.05, 0.1)] == ["blue", "teal"]
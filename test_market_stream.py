@@ -0,0 +1,100 @@
+import json
+import time
+
+import pytest
+
+from market_stream import PolygonStream, ReplayServer, TickBuffer, load_recording, parse_events
+
+pytest.importorskip("websocket")
+
+T0 = 1_755_000_000_000  # ms
+
+EVENTS = [
+    {"ev": "T", "sym": "SPY", "p": 645.10, "s": 100, "t": T0},
+    {"ev": "Q", "sym": "SPY", "bp": 645.10, "ap": 645.14, "t": T0 + 5},
+    {"ev": "T", "sym": "QQQ", "p": 560.00, "s": 10, "t": T0 + 7},
+    {"ev": "A", "sym": "SPY", "c": 645.15, "v": 2500, "s": T0, "e": T0 + 1000},
+]
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_parse_events():
+    ticks = parse_events(EVENTS + [{"ev": "status", "status": "connected"}])
+    assert [t["kind"] for t in ticks] == ["T", "Q", "T", "A"]
+    assert ticks[1]["price"] == 645.12
+    assert ticks[3]["timestamp"] == (T0 + 1000) / 1000.0
+
+
+def test_replay_server_feeds_buffer(tmp_path):
+    recording = tmp_path / "ticks.jsonl"
+    recording.write_text("\n".join(json.dumps(ev) for ev in EVENTS))
+
+    server = ReplayServer(load_recording(recording), port=0, speed=0).start()
+    buffer = TickBuffer()
+    seen = []
+    buffer.subscribe(seen.append)
+    stream = PolygonStream(buffer, symbols=["SPY"], url=server.url, api_key="test", backfill=None).start()
+    try:
+        assert _wait_for(lambda: len(seen) >= 3)
+        assert {t["symbol"] for t in seen} == {"SPY"}
+        assert buffer.latest("SPY")["price"] == 645.15
+    finally:
+        stream.stop()
+        server.stop()
+
+
+def test_reconnect_gap_fills_from_last_tick():
+    server = ReplayServer(EVENTS[:1], port=0, speed=0).start()
+    calls = []
+
+    def backfill(symbol, start, end):
+        calls.append((symbol, start))
+        return [{"ev": "A", "sym": symbol, "c": 645.30, "v": 10, "s": T0 + 2000, "e": T0 + 3000}]
+
+    buffer = TickBuffer()
+    stream = PolygonStream(buffer, symbols=["SPY"], url=server.url, api_key="test",
+                           backfill=backfill, max_backoff=0.05).start()
+    try:
+        # The replay ends after one event, the server closes and the client reconnects
+        assert _wait_for(lambda: calls)
+        assert calls[0] == ("SPY", T0 / 1000.0)
+        assert _wait_for(lambda: buffer.latest("SPY")["price"] in (645.30, 645.10))
+        assert any(t["price"] == 645.30 for t in buffer.since("SPY", 0))
+    finally:
+        stream.stop()
+        server.stop()
+
+
+def test_stalled_socket_reconnects():
+    # Second event is 1000s later: the server goes silent and never answers pings
+    server = ReplayServer([EVENTS[0], dict(EVENTS[0], t=T0 + 1_000_000)], port=0, speed=1.0).start()
+    buffer = TickBuffer()
+    stream = PolygonStream(buffer, symbols=["SPY"], url=server.url, api_key="test", backfill=None,
+                           max_backoff=0.05, read_timeout=0.2).start()
+    try:
+        assert _wait_for(lambda: stream.reconnects >= 1)
+    finally:
+        stream.stop()
+        server.stop()
+
+
+def test_recording_is_written_per_session(tmp_path):
+    server = ReplayServer(EVENTS, port=0, speed=0).start()
+    path = tmp_path / "rec.jsonl"
+    stream = PolygonStream(TickBuffer(), symbols=["SPY"], url=server.url, api_key="test", backfill=None,
+                           record_path=str(path), max_backoff=10).start()
+    try:
+        # The replay ends, the session closes and its file is flushed/closed
+        assert _wait_for(lambda: stream.reconnects >= 1)
+        assert [ev["ev"] for ev in load_recording(path)][:3] == ["T", "Q", "A"]
+    finally:
+        stream.stop()
+        server.stop()
@@ -0,0 +1,38 @@
+import sqlite3
+
+import migrate
+
+LEGACY_LEVELS = """CREATE TABLE price_levels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT NOT NULL, price REAL NOT NULL,
+    color TEXT NOT NULL, style TEXT NOT NULL, idx INTEGER DEFAULT 1,
+    active INTEGER DEFAULT 1, note TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP)"""
+
+
+def test_steps_run_once_and_record_history(tmp_path):
+    db = str(tmp_path / "fresh.db")
+    first = migrate.migrate(db)
+    latest = migrate.MIGRATIONS[-1][0]
+    assert first["version"] == latest and len(first["applied"]) == len(migrate.MIGRATIONS)
+
+    migrate._checked.clear()  # as if a second process started
+    assert migrate.migrate(db)["applied"] == []
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == latest
+    assert [r[0] for r in conn.execute("SELECT version FROM schema_migrations ORDER BY version")] == \
+        [m[0] for m in migrate.MIGRATIONS]
+
+
+def test_legacy_price_levels_are_rebuilt(tmp_path):
+    db = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db)
+    conn.execute(LEGACY_LEVELS)
+    conn.execute("INSERT INTO price_levels (symbol, price, color, style, idx) VALUES ('SPY', 640.5, 'blue', 'solid', 2)")
+    conn.commit()
+    conn.close()
+
+    migrate.migrate(db)
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT color, level_type, level_index, price FROM price_levels").fetchall() == \
+        [("blue", "solid", 2, 640.5)]
@@ -0,0 +1,65 @@
+import importlib.util
+import os
+import sys
+
+import sqlite3
+
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+import migrate
+from db_writer import get_writer
+
+_BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "backend")
+
+
+def _registry(name="model_registry"):
+    # model_registry imports tree_ensemble as a sibling, as app/backend runs it
+    sys.path.insert(0, _BACKEND)
+    try:
+        spec = importlib.util.spec_from_file_location(f"app_backend_{name}", os.path.join(_BACKEND, f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.remove(_BACKEND)
+
+
+def test_lazy_load_and_hot_swap(tmp_path):
+    registry = _registry()
+    X = np.array([[0.0], [1.0], [2.0], [3.0]])
+    path = str(tmp_path / "model.joblib")
+    joblib.dump(DecisionTreeClassifier().fit(X, [0, 0, 1, 1]), path)
+
+    handle = registry.get_model(path)
+    assert registry.get_model(path) is handle
+    assert handle._current == (None, None)  # nothing loaded until first use
+
+    model, v1 = handle.current()
+    assert v1.startswith("model@") and model.predict([[3.0]])[0] == 1
+    assert handle.forest()[0].predict_one([3.0]) == 1
+
+    v2 = registry.publish(DecisionTreeClassifier().fit(X, [1, 1, 0, 0]), path)
+    assert v2 != v1 and handle.version == v2
+    assert handle.model.predict([[3.0]])[0] == 0
+    assert handle.forest()[1] == v2 and handle.forest()[0].predict_one([3.0]) == 0
+
+
+def test_predict_writes_tagged_prediction_rows(tmp_path):
+    import pandas as pd
+
+    db = str(tmp_path / "q.db")
+    migrate.migrate(db)
+    X = pd.DataFrame({"contact_order": [1, 2, 3, 4]})
+    path = str(tmp_path / "engine.joblib")
+    joblib.dump(DecisionTreeClassifier().fit(X, [0, 0, 1, 1]), path)
+
+    engine = _registry("ml_engine").MLDecisionEngine(model_path=path, db_path=db)
+    assert engine.predict({"contact_order": 4}, symbol="QQQ") == 1
+    get_writer(db).flush()
+
+    row = sqlite3.connect(db).execute(
+        "SELECT symbol, horizon, target, prob, features_json, model_version FROM predictions").fetchall()
+    assert row == [("QQQ", "15m", "level_hold", 1.0, '{"contact_order": 4}', engine.last_model_version)]
+    assert engine.last_model_version.startswith("engine@")
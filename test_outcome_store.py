@@ -0,0 +1,24 @@
+from backend.confidence_adjuster import OutcomeStore, get_confidence_score
+
+SIG = {"level_type": "BlueSolid", "reaction_type": "Rejection",
+       "approach_direction": "Upward", "macro_position": "mid"}
+
+
+def test_snapshot_restore_and_readonly_view(tmp_path):
+    path = str(tmp_path / "outcomes.json")
+    store = OutcomeStore(path)
+    for ok in (True, True, False):
+        store.record("BlueSolid|Rejection|Upward|mid", ok)
+    store.record("bounce", True)
+
+    assert get_confidence_score(SIG, store=store) == 2 / 3
+    assert get_confidence_score("unseen", store=store) == 0.5
+    assert "unseen" not in store.items()
+
+    view = OutcomeStore(path, readonly=True, poll_sec=0)
+    assert view.get("bounce") == (0, 0)
+    assert store.snapshot() and not store.snapshot()
+    assert view.get("bounce") == (1, 0)
+
+    # A restart restores the counters
+    assert OutcomeStore(path).items() == store.items()
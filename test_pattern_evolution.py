@@ -0,0 +1,46 @@
+import sqlite3
+
+import migrate
+from pattern_evolution import PatternEvolutionTracker
+
+SIG = {"level_type": "BlueSolid", "reaction_type": "Rejection",
+       "approach_direction": "Upward", "macro_position": "mid"}
+
+
+def test_record_result_upserts_one_row(tmp_path):
+    db = str(tmp_path / "evo.db")
+    tracker = PatternEvolutionTracker(db)
+    for ok in (True, True, False):
+        tracker.record_result(SIG, "long", ok)
+    tracker.record_result(SIG, "short", False)
+    tracker.flush()
+
+    rows = sqlite3.connect(db).execute(
+        "SELECT direction, wins, losses, confidence_weight FROM pattern_evolution ORDER BY direction").fetchall()
+    assert rows == [("long", 2, 1, 2 / 3), ("short", 0, 1, 0.0)]
+    assert tracker.get_best_direction_for_pattern(SIG) == "long"
+    assert tracker.get_best_directions() == {"BlueSolid|Rejection|Upward|mid": "long"}
+
+    # A fresh tracker loads the same stats from the DB
+    assert PatternEvolutionTracker(db).get_stats() == tracker.get_stats()
+
+
+def test_migrate_folds_duplicate_rows(tmp_path):
+    db = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db)
+    conn.execute("""CREATE TABLE pattern_evolution (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, pattern_key TEXT, direction TEXT,
+        confidence_weight REAL, wins INTEGER, losses INTEGER, last_updated TEXT)""")
+    conn.executemany(
+        "INSERT INTO pattern_evolution (pattern_key, direction, confidence_weight, wins, losses, last_updated) VALUES (?, ?, 0, ?, ?, ?)",
+        [("k", "long", 1, 0, "a"), ("k", "long", 2, 2, "b"), ("k", "short", 0, 1, "a")])
+    conn.commit()
+    conn.close()
+
+    migrate.migrate(db)
+
+    conn = sqlite3.connect(db)
+    rows = conn.execute("SELECT direction, wins, losses, last_updated FROM pattern_evolution ORDER BY direction").fetchall()
+    assert rows == [("long", 3, 2, "b"), ("short", 0, 1, "a")]
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"ux_pattern_evolution_key_dir", "ux_trades_trade_id", "idx_alerts_ts"} <= names
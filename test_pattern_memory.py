@@ -0,0 +1,54 @@
+import sqlite3
+
+import db_writer
+from memory_recall_engine import PatternMemoryStats
+
+
+def _memory_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE patterns_memory (id TEXT, name TEXT, times_seen INTEGER, times_successful INTEGER, avg_confidence REAL)")
+    conn.execute("CREATE TABLE pattern_feedback (pattern_id TEXT, confidence REAL, outcome TEXT, timestamp TEXT)")
+    conn.execute("INSERT INTO patterns_memory VALUES ('bounce', 'bounce', 8, 6, 0.7)")
+    conn.executemany("INSERT INTO pattern_feedback VALUES (?, 0.5, ?, ?)",
+                     [("bounce", "Reject", "2026-01-01"), ("bounce", "Review Further", "2026-01-02"),
+                      ("other", "Reject", "2026-01-03")])
+    conn.commit()
+    return conn
+
+
+def test_aggregates_load_and_update(tmp_path):
+    db = str(tmp_path / "memory.db")
+    conn = _memory_db(db)
+    stats = PatternMemoryStats(db, window=3, poll_sec=0)
+    assert stats.get("bounce") == {"times_seen": 8, "times_successful": 6, "avg_confidence": 0.7,
+                                   "rejects": 1, "reviews": 1}
+
+    stats.record_trade("bounce", True, confidence=0.25)
+    got = stats.get("bounce")
+    assert (got["times_seen"], got["times_successful"]) == (9, 7)
+    assert abs(got["avg_confidence"] - 0.65) < 1e-9
+
+    # New rows from another process arrive on the next poll; the window drops the oldest
+    conn.execute("INSERT INTO pattern_feedback VALUES ('bounce', 0.5, 'reject', '2026-01-04')")
+    conn.commit()
+    assert stats.get("bounce")["rejects"] == 1
+    assert stats.get("bounce")["reviews"] == 1
+    assert stats.get("missing")["times_seen"] == 0
+
+
+def test_trades_and_feedback_persist(tmp_path):
+    db = str(tmp_path / "memory.db")
+    _memory_db(db).close()
+    stats = PatternMemoryStats(db, window=10, poll_sec=None)
+    stats.record_trade("bounce", False, confidence=0.4)
+    stats.record_trade("fade", True)
+    stats.record_feedback("fade", "reject")
+    assert stats.get("fade")["rejects"] == 1  # folded in at once, not double-counted by the poll
+    db_writer.get_writer(db).flush()
+
+    # A restart (or another process) reads the same aggregates back
+    again = PatternMemoryStats(db, window=10, poll_sec=None)
+    assert again.get("bounce") == stats.get("bounce")
+    assert abs(again.get("bounce")["avg_confidence"] - (0.7 * 8 + 0.4) / 9) < 1e-9
+    assert again.get("fade") == {"times_seen": 1, "times_successful": 1, "avg_confidence": 0.0,
+                                 "rejects": 1, "reviews": 0}
@@ -0,0 +1,38 @@
+from portfolio_tracker import PortfolioTracker
+
+
+def test_book_persists_through_writer(tmp_path):
+    db = str(tmp_path / "book.db")
+    pt = PortfolioTracker(db)
+    long_id = pt.execute_trade({"symbol": "SPY", "direction": "long", "entry_price": 100.0})
+    short_id = pt.execute_trade({"symbol": "SPY", "direction": "short", "entry_price": 100.0})
+    assert [p["id"] for p in pt.get_open_positions()] == [long_id, short_id]
+
+    trade = pt.get_position(long_id)
+    assert pt.close_trade(trade, 101.0)
+    assert trade["pnl"] == 0.01
+    assert pt.get_position(long_id) is None
+    assert not pt.close_trade({"id": long_id}, 101.0)
+
+    # A second tracker (e.g. the API's) sees the same book once writes land
+    pt.reconcile()
+    view = PortfolioTracker(db, reload_interval=0)
+    assert [p["id"] for p in view.get_portfolio()["open_positions"]] == [short_id]
+    assert view.execute_trade({"symbol": "QQQ", "entry_price": 1.0}) == short_id + 1
+
+
+def test_restart_keeps_trade_context_and_ids_come_from_sqlite(tmp_path):
+    db = str(tmp_path / "book.db")
+    event = {"level_type": "BlueSolid", "reaction_type": "rejection"}
+    pt = PortfolioTracker(db)
+    trade_id = pt.execute_trade({"symbol": "SPY", "direction": "long", "entry_price": 100.0,
+                                 "pattern": "break_retest", "confidence": 0.7, "contact_event": event})
+
+    # Another process opens a position in between: no id collision
+    other = PortfolioTracker(db)
+    assert other.execute_trade({"symbol": "SPY", "entry_price": 100.0}) == trade_id + 1
+
+    restarted = PortfolioTracker(db)
+    pos = restarted.get_position(trade_id)
+    assert pos["pattern"] == "break_retest" and pos["confidence"] == 0.7
+    assert pos["contact_event"] == event
@@ -0,0 +1,54 @@
+import time
+
+from quote_cache import QuoteCache
+
+
+def test_writer_and_reader_share_quotes(tmp_path):
+    path = str(tmp_path / "quotes.mmap")
+    engine = QuoteCache(path, slots=8)
+    api = QuoteCache(path, slots=8)  # a second process maps the same file
+    try:
+        engine.put("SPY", 645.12, volume=300)
+        engine.put("QQQ", 560.0)
+        quote = api.get("SPY", max_age=5)
+        assert quote["price"] == 645.12 and quote["volume"] == 300
+        assert api.get("QQQ", max_age=5)["volume"] is None
+        assert api.get("IWM", max_age=5) is None
+
+        engine.put("SPY", 645.20)
+        assert api.get("SPY", max_age=5)["price"] == 645.20
+    finally:
+        engine.close()
+        api.close()
+
+
+def test_stale_quotes_are_ignored(tmp_path):
+    cache = QuoteCache(str(tmp_path / "quotes.mmap"), slots=4)
+    try:
+        cache.put("SPY", 645.0)
+        time.sleep(0.05)
+        assert cache.get("SPY", max_age=0.01) is None
+        assert cache.get("SPY", max_age=None)["price"] == 645.0
+    finally:
+        cache.close()
+
+
+def test_reader_never_returns_another_symbols_price(tmp_path):
+    path = str(tmp_path / "quotes.mmap")
+    engine = QuoteCache(path, slots=4)
+    api = QuoteCache(path, slots=4)
+    try:
+        engine.put("SPY", 645.0)
+        assert api.get("SPY", max_age=5)["price"] == 645.0
+        # The slot api remembers for SPY is reclaimed by another symbol
+        slot = api._index["SPY"]
+        engine._index.clear()
+        engine._mm[engine._offset(slot):engine._offset(slot) + 64] = bytes(64)
+        engine._index["QQQ"] = slot
+        engine.put("QQQ", 560.0)
+        assert api.get("SPY", max_age=5) is None
+        engine.put("SPY", 646.0)
+        assert api.get("SPY", max_age=5)["price"] == 646.0
+    finally:
+        engine.close()
+        api.close()
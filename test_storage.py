@@ -0,0 +1,38 @@
+import threading
+
+import storage
+
+
+def _in_thread(fn):
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("value", fn()))
+    t.start()
+    t.join()
+    return out["value"]
+
+
+def test_request_threads_reuse_pooled_connections(tmp_path):
+    path = str(tmp_path / "pool.db")
+
+    def request():
+        conn = storage.get_connection(path)
+        storage.release_thread_connections()
+        return id(conn)
+
+    assert _in_thread(request) == _in_thread(request)
+
+
+def test_release_rolls_back_an_open_transaction(tmp_path):
+    path = str(tmp_path / "pool.db")
+    with storage.pooled_connection(path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+
+    def failed_request():
+        conn = storage.get_connection(path)
+        conn.execute("INSERT INTO t VALUES (1)")  # handler raised before commit
+        storage.release_thread_connections()
+        return conn.in_transaction
+
+    assert _in_thread(failed_request) is False
+    with storage.pooled_connection(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
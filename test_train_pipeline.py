@@ -0,0 +1,32 @@
+import importlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+_BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "backend")
+
+
+def test_search_persists_results_and_publishes(tmp_path, monkeypatch):
+    # Imported under its own name so pool workers can unpickle _evaluate
+    monkeypatch.syspath_prepend(_BACKEND)
+    pipeline = importlib.import_module("train_pipeline")
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.integers(0, 2, size=(120, 4)), columns=["a", "b", "c", "d"])
+    y = (X["a"] | X["c"]).astype(int)
+    model_path = str(tmp_path / "model.joblib")
+
+    out = pipeline.run_search(X, y, grid={"n_estimators": [5, 10], "max_depth": [2, None]}, folds=3,
+                              jobs=2, runs_dir=str(tmp_path / "runs"), model_path=model_path)
+
+    with open(out["results_path"]) as f:
+        assert len([json.loads(line) for line in f]) == 4
+    assert out["best"]["mean"] == max(r["mean"] for r in out["results"])
+    with open(str(tmp_path / "model.metrics.json")) as f:
+        metrics = json.load(f)
+    assert metrics["version"] == out["version"] and metrics["params"] == out["best"]["params"]
+    handle = sys.modules["model_registry"].get_model(model_path)
+    assert handle.version == out["version"]
+    assert handle.model.n_jobs is None  # trained on the pool, served single-threaded
@@ -0,0 +1,33 @@
+import importlib.util
+import os
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+_BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "backend")
+
+
+def _load(name):
+    # app/backend isn't a package on sys.path; load the module by path
+    spec = importlib.util.spec_from_file_location(f"app_backend_{name}", os.path.join(_BACKEND, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_compiled_forest_matches_sklearn(tmp_path):
+    CompiledForest = _load("tree_ensemble").CompiledForest
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 16)).astype(np.float32)
+    y = (X[:, 0] + X[:, 3] * X[:, 5] > 0).astype(int) + (X[:, 7] > 1)
+    model = RandomForestClassifier(n_estimators=25, max_depth=None, random_state=0).fit(X[:1500], y[:1500])
+
+    path = str(tmp_path / "forest.npz")
+    CompiledForest.from_sklearn(model).save(path)
+    forest = CompiledForest.load(path)
+
+    test = X[1500:]
+    np.testing.assert_allclose(forest.predict_proba(test, chunk=128), model.predict_proba(test), atol=1e-12)
+    for row in test[:50]:
+        np.testing.assert_allclose(forest.predict_proba_one(row), model.predict_proba(row[None])[0], atol=1e-12)
+    assert list(forest.predict(test)) == list(model.predict(test))
@@ -0,0 +1,106 @@
+# tick_bus.py
+
+import threading
+import time
+from datetime import datetime
+
+
+class TickBus:
+    """
+    Latest-value mailbox between a price source and the engine.
+
+    Publishers overwrite the pending tick (the engine only ever needs the newest
+    price), and consumers block on a condition until the sequence number moves,
+    so an idle market costs no CPU.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._tick = None
+        self._seq = 0
+        self._closed = False
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def publish(self, tick):
+        """Store `tick` as the newest tick and wake any waiting consumer."""
+        with self._cond:
+            self._tick = tick
+            self._seq += 1
+            self._cond.notify_all()
+        return self._seq
+
+    def latest(self):
+        with self._cond:
+            return self._seq, self._tick
+
+    def wait_for_tick(self, last_seq, timeout=None):
+        """
+        Block until a tick newer than `last_seq` is published.
+        Returns (seq, tick), or (last_seq, None) on timeout / close.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != last_seq or self._closed, timeout=timeout)
+            if self._seq == last_seq:
+                return last_seq, None
+            return self._seq, self._tick
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class PollingPriceSource:
+    """
+    Publishes ticks from a REST price function (e.g. get_live_stock_price).
+
+    Polls every `interval` seconds and publishes when the price changes, or
+    when `max_quiet` seconds have passed since the last publish, so a flat
+    quote doesn't re-run every stage but heartbeats and exit checks still
+    run. `on_quote`, if given, is called with (symbol, price) on every
+    successful fetch.
+    """
+
+    def __init__(self, bus, symbol, fetch_price, interval=0.1, on_quote=None, max_quiet=5.0):
+        self.bus = bus
+        self.symbol = symbol
+        self.fetch_price = fetch_price
+        self.interval = interval
+        self.on_quote = on_quote
+        self.max_quiet = max_quiet
+        self.last_price = None
+        self._published_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="price-source", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                price = self.fetch_price(self.symbol)
+                if price is not None and self.on_quote:
+                    self.on_quote(self.symbol, price)
+                quiet = time.monotonic() - self._published_at >= self.max_quiet
+                if price is not None and (price != self.last_price or quiet):
+                    self.last_price = price
+                    self._published_at = time.monotonic()
+                    self.bus.publish({
+                        "symbol": self.symbol,
+                        "price": price,
+                        "volume": None,
+                        "timestamp": datetime.now().timestamp(),
+                    })
+            except Exception as e:
+                print("⚠️ Price source error:", e)
+
+            self._stop.wait(self.interval)
@@ -0,0 +1,50 @@
+# tick_context.py
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Optional, Tuple
+
+from level_index import LevelIndex
+
+
+@dataclass(frozen=True)
+class TickSnapshot:
+    """
+    Immutable view of the market for one engine tick.
+
+    Built once per tick (one price fetch, one level load) and handed to every
+    stage — recognizer, discovery, exits, diagnostics — so they all agree on
+    the same price and level set.
+    """
+    symbol: str
+    price: Optional[float]
+    volume: float
+    timestamp: float
+    levels: Tuple[MappingProxyType, ...]
+    level_index: LevelIndex = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def build(cls, symbol, price, volume=None, timestamp=None, levels=(), level_index=None):
+        """
+        Pass `level_index` together with an already-frozen `levels` tuple (as
+        returned by level_loader.load_level_set) to reuse the cached index.
+        """
+        if level_index is None:
+            frozen = tuple(MappingProxyType(dict(lvl)) for lvl in levels or ())
+            level_index = LevelIndex(frozen)
+        else:
+            frozen = tuple(levels)
+        return cls(
+            symbol=symbol,
+            price=price,
+            volume=volume or 0,
+            timestamp=timestamp if timestamp is not None else datetime.now().timestamp(),
+            levels=frozen,
+            level_index=level_index,
+        )
+
+    @property
+    def time_str(self):
+        """Timestamp in the "%Y-%m-%d %H:%M:%S" form the DB rows use."""
+        return datetime.fromtimestamp(self.timestamp).strftime("%Y-%m-%d %H:%M:%S")
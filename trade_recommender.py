@@ -1,9 +1,9 @@
-from pattern_evolution import PatternEvolutionTracker
-import requests  # ✅ Added
+from pattern_evolution import get_tracker
+from heartbeat import heartbeat
 
 class TradeRecommender:
     def __init__(self):
-        self.pattern_tracker = PatternEvolutionTracker()
+        self.pattern_tracker = get_tracker()  # shared with the engine's exit path
         self.last_recommendation = None  # ✅ Store last recommendation for /get_recommendations
 
     def recommend_trade(self, contact_event):
@@ -11,10 +11,7 @@ class TradeRecommender:
         Given a contact event, determine if a trade should be taken and in what direction.
         """
         # ✅ Pulse panel heartbeat
-        try:
-            requests.post("http://127.0.0.1:5000/ping", json={"module": "trade_recommender"})
-        except:
-            pass
+        heartbeat.beat("trade_recommender")
 
         pattern_signature = {
             "level_type": contact_event.get("level_type"),